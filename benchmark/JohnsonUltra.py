@@ -6,9 +6,16 @@ Created on Mon Apr 26 17:24:36 2021
 
 Customized Johnson's func from networkx implementation
     Recovers acutal distance from dijkstra results
+
+johnson_dist: distance-only variant for the env
+    no path lists, distances written into a 2-D array in a given node order
+    optional predecessor matrix, paths rebuilt on demand with johnson_path
 """
 
+from heapq import heappop, heappush
+
 import networkx as nx
+import numpy as np
 from networkx.algorithms.shortest_paths.weighted import _weight_function, _bellman_ford, _dijkstra
 
 def johnsonU(G, weight="weight"):
@@ -66,3 +73,82 @@ def johnsonU(G, weight="weight"):
                 
     return results_path, actual_dist
     #return {v: dist_path(v) for v in G}
+
+
+def johnson_dist(G, nodes=None, weight="weight", out=None, return_pred=False):
+    '''
+    Johnson's APSP without path reconstruction
+        nodes: row/column order of the result, default list(G)
+        out: preallocated (n, n) float array to fill, allocated if None
+        return_pred: also return pred, pred[i, j] is the node index before
+            j on a shortest i->j path (-1 if none)
+    Unreachable pairs are np.inf
+    Raises nx.NetworkXUnbounded on a negative cycle, same as johnsonU
+    '''
+    if not nx.is_weighted(G, weight=weight):
+        raise nx.NetworkXError("Graph is not weighted.")
+
+    if nodes is None:
+        nodes = list(G)
+    index = {v: k for k, v in enumerate(nodes)}
+    n = len(nodes)
+    weight = _weight_function(G, weight)
+
+    dist = {v: 0 for v in G}
+    pred = {v: [] for v in G}
+    dist_bellman = _bellman_ford(G, list(G), weight, pred=pred, dist=dist)
+    h = [dist_bellman[v] for v in nodes]
+
+    # reweighted adjacency lists by node index, all weights >= 0
+    adj = [[] for _ in range(n)]
+    for u, v, d in G.edges(data=True):
+        iu, iv = index[u], index[v]
+        adj[iu].append((iv, weight(u, v, d) + h[iu] - h[iv]))
+
+    if out is None:
+        out = np.empty((n, n))
+    pred_mat = np.full((n, n), -1, dtype=np.int64) if return_pred else None
+    inf = float('inf')
+    for src in range(n):
+        row = [inf] * n
+        row[src] = 0
+        done = [False] * n
+        prev = [-1] * n
+        heap = [(0, src)]
+        while heap:
+            du, u = heappop(heap)
+            if done[u]:
+                continue
+            done[u] = True
+            for v, w in adj[u]:
+                dv = du + w
+                if dv < row[v]:
+                    row[v] = dv
+                    prev[v] = u
+                    heappush(heap, (dv, v))
+        out[src] = row
+        if return_pred:
+            pred_mat[src] = prev
+
+    # D(u, v) + h(v) - h(u), inf stays inf
+    h = np.array(h, dtype=np.float64)
+    out += h[None, :] - h[:, None]
+
+    if return_pred:
+        return out, pred_mat
+    return out
+
+def johnson_path(pred, nodes, source, target):
+    '''
+    Shortest source->target path from the pred matrix of johnson_dist
+        None if target is unreachable
+    '''
+    index = {v: k for k, v in enumerate(nodes)}
+    i, j = index[source], index[target]
+    if i != j and pred[i, j] < 0:
+        return None
+
+    path = [j]
+    while path[-1] != i:
+        path.append(pred[i, path[-1]])
+    return [nodes[k] for k in reversed(path)]
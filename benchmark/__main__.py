@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 14:22:47 2026
+
+Benchmark harness
+    runs EDF v1/v2/v3 and a trained ScheduleNet checkpoint over a range of
+    instances in a process pool, compares against Gurobi solutions and
+    writes one row per (method, instance) to a CSV or Parquet file
+
+Usage
+    python -m benchmark --path-to-test ./data --path-to-solutions ./gurobiv9
+        --start-no 374 --end-no 374 --methods edf-v1 edf-v2 edf-v3 gnn
+        --checkpoint ./checkpoint.tar --output results.csv
+"""
+
+import argparse
+import csv
+import importlib.util
+import multiprocessing as mp
+import os
+import time
+
+import numpy as np
+
+from benchmark.edf import edf_schedule
+from utils import SchedulingEnv
+
+FIELDS = ['method', 'instance', 'num_tasks', 'num_robots', 'feasible',
+          'makespan', 'gurobi_makespan', 'gap', 'wall_time']
+
+# set per worker process by init_worker
+_worker = {}
+
+'''
+Makespan of the Gurobi solution, replayed through SchedulingEnv
+    Return None if there is no solution or it turns out infeasible
+'''
+def gurobi_makespan(instance):
+    graph_no, fname, solname = instance
+    if not os.path.isfile(solname + '_w.txt'):
+        return None
+
+    env = SchedulingEnv(fname)
+    optimals = []
+    for i in range(env.num_robots):
+        if os.path.isfile(solname + '_%d.txt' % i):
+            optimals.append(np.loadtxt(solname + '_%d.txt' % i, dtype=np.int32, ndmin=1))
+        else:
+            optimals.append([])
+    optimalw = np.loadtxt(solname + '_w.txt', dtype=np.int32, ndmin=1)
+
+    for ti in optimalw:
+        for j in range(env.num_robots):
+            if ti in optimals[j]:
+                rj = j
+                break
+        rt, reward, done = env.insert_robot(ti, rj)
+        if not rt:
+            return None
+
+    return env.min_makespan
+
+'''
+Pool initializer, loads the policy net once per process when needed
+'''
+def init_worker(methods, checkpoint, map_width, temporal_edges='full', temporal_k=8):
+    _worker['map_width'] = map_width
+    _worker['temporal_edges'] = (temporal_edges, temporal_k)
+    if 'gnn' in methods:
+        import torch
+        from benchmark import gnnutils
+        from benchmark.gnnutils import load_policy_net
+        if map_width is None:
+            # hetgraphs shaped as in training
+            _worker['map_width'] = gnnutils.map_width
+        # one intra-op thread per process, the pool provides the parallelism
+        torch.set_num_threads(1)
+        _worker['device'] = torch.device('cpu')
+        _worker['policy_net'] = load_policy_net(checkpoint, _worker['device'])
+
+'''
+Solve one instance with one method
+    job: (method, graph_no, fname, gurobi makespan or None)
+'''
+def run_job(job):
+    method, graph_no, fname, opt = job
+
+    start_t = time.time()
+    if method == 'gnn':
+        from benchmark.gnnutils import gnn_schedule
+        env = SchedulingEnv(fname, *_worker['temporal_edges'])
+        feasible, makespan, _ = gnn_schedule(env, _worker['policy_net'], _worker['device'],
+                                             _worker['map_width'])
+    else:
+        env = SchedulingEnv(fname)
+        version = method.split('-')[1]
+        feasible, makespan, _ = edf_schedule(env, version)
+    wall_time = time.time() - start_t
+
+    if feasible and opt is not None and opt > 0:
+        gap = (makespan - opt) / opt
+    else:
+        gap = float('nan')
+
+    return {'method': method, 'instance': graph_no,
+            'num_tasks': env.num_tasks, 'num_robots': env.num_robots,
+            'feasible': int(feasible), 'makespan': float(makespan),
+            'gurobi_makespan': float('nan') if opt is None else float(opt),
+            'gap': gap, 'wall_time': wall_time}
+
+'''
+Parquet output needs pandas and a Parquet engine (pyarrow or fastparquet)
+'''
+def parquet_available():
+    return (importlib.util.find_spec('pandas') is not None
+            and any(importlib.util.find_spec(engine) is not None
+                    for engine in ('pyarrow', 'fastparquet')))
+
+def write_results(rows, output):
+    if output.endswith('.parquet'):
+        # optional dependency, only needed for Parquet output
+        import pandas as pd
+        pd.DataFrame(rows, columns=FIELDS).to_parquet(output, index=False)
+    else:
+        with open(output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+'''
+Print feasibility, gap, throughput and latency percentiles of one method
+'''
+def print_summary(method, rows, elapsed):
+    feasible = [r for r in rows if r['feasible']]
+    gaps = [r['gap'] for r in feasible if not np.isnan(r['gap'])]
+    latency = np.array([r['wall_time'] for r in rows]) * 1000.0
+
+    print('[%s] feasible: %d/%d' % (method, len(feasible), len(rows)))
+    if len(feasible) > 0:
+        print('    mean makespan: %.4f' % np.mean([r['makespan'] for r in feasible]))
+    if len(gaps) > 0:
+        print('    mean gap vs gurobi: %.4f (%d compared)' % (np.mean(gaps), len(gaps)))
+    print('    throughput: %.2f instances/s' % (len(rows) / elapsed))
+    print('    latency ms: p50 %.2f, p90 %.2f, p99 %.2f, max %.2f'
+          % tuple(np.percentile(latency, [50, 90, 99, 100])))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python -m benchmark')
+    parser.add_argument('--path-to-test', default='./gen/r2t20_001', type=str)
+    parser.add_argument('--path-to-solutions', default=None, type=str,
+                        help='defaults to <path-to-test>v9')
+    parser.add_argument('--start-no', default=1, type=int)
+    parser.add_argument('--end-no', default=100, type=int)
+    parser.add_argument('--methods', nargs='+', default=['edf-v1', 'edf-v2', 'edf-v3'],
+                        choices=['edf-v1', 'edf-v2', 'edf-v3', 'gnn'])
+    parser.add_argument('--checkpoint', default=None, type=str)
+    parser.add_argument('--map-width', default=None, type=int,
+                        help='map width of the gnn HetGraphs, defaults to the one of '
+                        'training (lr_scheduler_train.py)')
+    parser.add_argument('--temporal-edges', default='full', choices=['full', 'reduced', 'topk'],
+                        help='temporal edges of the HetGraph for gnn, see SchedulingEnv')
+    parser.add_argument('--temporal-k', default=8, type=int)
+    parser.add_argument('--processes', default=os.cpu_count(), type=int)
+    parser.add_argument('--output', default='benchmark_results.csv', type=str)
+    args = parser.parse_args()
+
+    if 'gnn' in args.methods and args.checkpoint is None:
+        parser.error('--checkpoint is required for method gnn')
+    # fail before running every job, not when writing the results
+    if args.output.endswith('.parquet') and not parquet_available():
+        parser.error('Parquet output needs pandas and pyarrow (or fastparquet), '
+                     'install them or write a .csv file')
+
+    solfolder = args.path_to_solutions
+    if solfolder is None:
+        solfolder = args.path_to_test + 'v9'
+
+    instances = []
+    for graph_no in range(args.start_no, args.end_no+1):
+        fname = args.path_to_test + '/%05d' % graph_no
+        if os.path.isfile(fname + '_dur.txt'):
+            instances.append((graph_no, fname, solfolder + '/%05d' % graph_no))
+    print('Instances found: %d' % len(instances))
+
+    all_rows = []
+    with mp.Pool(args.processes, initializer=init_worker,
+                 initargs=(args.methods, args.checkpoint, args.map_width,
+                           args.temporal_edges, args.temporal_k)) as pool:
+        opts = pool.map(gurobi_makespan, instances)
+        print('Gurobi solutions found: %d/%d'
+              % (sum(opt is not None for opt in opts), len(instances)))
+        for method in args.methods:
+            jobs = [(method, graph_no, fname, opt)
+                    for (graph_no, fname, _), opt in zip(instances, opts)]
+            start_t = time.time()
+            rows = pool.map(run_job, jobs)
+            elapsed = time.time() - start_t
+            print_summary(method, rows, elapsed)
+            all_rows.extend(rows)
+
+    write_results(all_rows, args.output)
+    print('Results saved to %s' % args.output)
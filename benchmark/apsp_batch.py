@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 24 11:40:07 2026
+
+Batched APSP benchmark
+    serial johnsonU (one STN at a time, what the env used to run) against
+    the batched Floyd-Warshall kernels on the same padded batch
+        numpy: stn.floyd_warshall_batch
+        torch: stn_torch.floyd_warshall_batch, per torch thread count
+    STNs are the initial STNs of generated instances; each result is
+    checked against johnsonU (consistency and distances)
+
+Usage
+    python -m benchmark.apsp_batch --tasks 20 50 --batch-sizes 1 8 32 128
+        --threads 1 2 4 [--block 64]
+"""
+
+import argparse
+import time
+
+import networkx as nx
+import numpy as np
+import torch
+
+from benchmark.JohnsonUltra import johnsonU
+from generator import default_params, sample_instance
+from stn import floyd_warshall_batch, pad_batch, stn_edges, stn_matrix
+from stn_torch import floyd_warshall_batch as floyd_warshall_batch_torch
+
+'''
+Mean and min wall time of func over repeats, plus its last return value
+'''
+def measure(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start_t = time.perf_counter()
+        ret = func()
+        times.append(time.perf_counter() - start_t)
+    return float(np.mean(times)), float(np.min(times)), ret
+
+'''
+Run johnsonU on every STN
+Return
+    list of (V, V) distance matrices, None where inconsistent
+'''
+def johnson_serial(graphs):
+    results = []
+    for g in graphs:
+        try:
+            _, d_ultra = johnsonU(g)
+        except nx.NetworkXUnbounded:
+            results.append(None)
+            continue
+        nodes = list(g)
+        results.append(np.array([[d_ultra[u][v] for v in nodes] for u in nodes]))
+    return results
+
+def check(reference, dist, consistent):
+    for b, ref in enumerate(reference):
+        if (ref is not None) != bool(consistent[b]):
+            return False
+        if ref is not None and not np.array_equal(dist[b, :len(ref), :len(ref)], ref):
+            return False
+    return True
+
+def sample_batch(rng, batch_size, num_tasks, num_robots):
+    params = default_params()
+    params.update(tasks=(num_tasks, num_tasks), robots=(num_robots, num_robots))
+    matrices, graphs = [], []
+    for _ in range(batch_size):
+        instance = sample_instance(rng, params)
+        num_nodes, u, v, w = stn_edges(instance['dur'], instance['ddl'], instance['wait'])
+        matrices.append(stn_matrix(num_nodes, u, v, w))
+        g = nx.DiGraph()
+        g.add_nodes_from(range(num_nodes))
+        g.add_weighted_edges_from(zip(u.tolist(), v.tolist(), w.tolist()))
+        graphs.append(g)
+    return matrices, graphs
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tasks', nargs='+', default=[20, 50], type=int)
+    parser.add_argument('--robots', default=5, type=int)
+    parser.add_argument('--batch-sizes', nargs='+', default=[1, 8, 32, 128], type=int)
+    parser.add_argument('--threads', nargs='+', default=[1, 2, 4], type=int)
+    parser.add_argument('--block', default=64, type=int,
+                        help='pivots per pass of the torch kernel')
+    parser.add_argument('--repeats', default=3, type=int)
+    parser.add_argument('--seed', default=0, type=int)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print('%6s %6s %-10s %12s %12s %9s %6s'
+          % ('tasks', 'batch', 'kernel', 'mean ms', 'min ms', 'speedup', 'match'))
+    for num_tasks in args.tasks:
+        for batch_size in args.batch_sizes:
+            matrices, graphs = sample_batch(rng, batch_size, num_tasks, args.robots)
+            weights, _ = pad_batch(matrices)
+
+            # serial Johnson's is the baseline, one run is enough
+            base_t, _, reference = measure(lambda: johnson_serial(graphs), 1)
+            rows = [('johnsonU', base_t, base_t, True)]
+
+            mean_t, min_t, (dist, consistent) = measure(lambda: floyd_warshall_batch(weights),
+                                                        args.repeats)
+            rows.append(('numpy', mean_t, min_t, check(reference, dist, consistent)))
+
+            for threads in args.threads:
+                torch.set_num_threads(threads)
+                mean_t, min_t, (dist, consistent) = measure(
+                    lambda: floyd_warshall_batch_torch(weights, args.block), args.repeats)
+                rows.append(('torch/%d' % threads, mean_t, min_t,
+                             check(reference, dist.numpy(), consistent.numpy())))
+
+            for kernel, mean_t, min_t, match in rows:
+                print('%6d %6d %-10s %12.2f %12.2f %9.1f %6s'
+                      % (num_tasks, batch_size, kernel, mean_t * 1000, min_t * 1000,
+                         base_t / mean_t, match))
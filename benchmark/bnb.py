@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 10:24:51 2026
+
+Branch-and-bound solver for labeling instances without Gurobi
+
+Searches over the same insertions as SchedulingEnv.insert_robot: a node is
+a partial schedule, a branch appends an unscheduled task to a robot.
+    consistency: the APSP matrix is updated incrementally with the
+        insertion edges (stn.add_edges) instead of rerunning Johnson's
+    lower bound: max of the earliest finish time of all tasks, and the
+        total assigned/min duration spread over the robots
+    incumbent: the EDF baseline schedule
+Subtrees below the first levels are searched in parallel, sharing the
+incumbent makespan. With a time limit the best schedule found is written
+and marked as not proven optimal.
+
+Solutions are written in the gurobiv9 layout, _w.txt and _<robot>.txt
+one task per line, so fill_demo_data can read them.
+
+Usage
+    python -m benchmark.bnb --path-to-test ./gen/r2t20_001 --start-no 1
+        --end-no 100 --time-limit 60 --processes 8
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import time
+
+import numpy as np
+
+from benchmark.edf import edf_schedule
+from stn import add_edges
+from utils import SchedulingEnv
+
+'''
+Search state, schedules keep the leading 0 like env.partials
+'''
+class Node(object):
+    def __init__(self, dist, partials, partialw, busy):
+        self.dist = dist
+        self.partials = partials
+        self.partialw = partialw
+        # assigned duration of each robot
+        self.busy = busy
+        self.lb = 0.0
+
+'''
+Lower bound on the makespan of any full schedule below dist
+    insertions only add constraints, so earliest finish times never decrease
+'''
+def lower_bound(env, dist, busy, unsch_mask):
+    lb_stn = np.max(-1.0 * dist[3:2*env.num_tasks+2:2, 0])
+    total = busy.sum() + env.dur[unsch_mask].min(axis=1).sum()
+    lb_load = np.ceil(total / env.num_robots - 1e-9)
+    return max(lb_stn, lb_load)
+
+'''
+Makespan of a full schedule, same as env.min_makespan after the last insertion
+'''
+def makespan(env, dist):
+    return np.max(-1.0 * dist[3:2*env.num_tasks+2:2, 0])
+
+def unscheduled_mask(env, partialw):
+    mask = np.ones(env.num_tasks + 1, dtype=bool)
+    mask[partialw] = False
+    return mask[1:]
+
+'''
+Apply insertion (ti, rj) to node
+Return
+    child node, None if the STN becomes inconsistent
+'''
+def insert(env, node, ti, rj, diff):
+    partialw = node.partialw + [ti]
+    u, v, w = env.insertion_edges(ti, rj, node.partials[rj][-1],
+                                  unscheduled_mask(env, partialw), diff)
+    dist = add_edges(node.dist, u, v, w)
+    if dist is None:
+        return None
+
+    partials = list(node.partials)
+    partials[rj] = partials[rj] + [ti]
+    busy = node.busy.copy()
+    busy[rj] += env.dur[ti-1][rj]
+    return Node(dist, partials, partialw, busy)
+
+'''
+Feasible children of node with their lower bounds, best first
+    robots with identical durations and empty schedules are interchangeable,
+    only the first of them is branched on
+'''
+def expand(env, node, bound, diff):
+    empty_seen = set()
+    robots = []
+    for rj in range(env.num_robots):
+        if len(node.partials[rj]) == 1:
+            key = env.dur[:, rj].tobytes()
+            if key in empty_seen:
+                continue
+            empty_seen.add(key)
+        robots.append(rj)
+
+    children = []
+    unsch_tasks = np.flatnonzero(unscheduled_mask(env, node.partialw)) + 1
+    for ti in unsch_tasks:
+        for rj in robots:
+            child = insert(env, node, int(ti), rj, diff)
+            if child is None:
+                continue
+            lb = lower_bound(env, child.dist, child.busy,
+                             unscheduled_mask(env, child.partialw))
+            if lb < bound:
+                child.lb = lb
+                est = -1.0 * child.dist[2*ti, 0]
+                children.append((lb, est, env.dur[ti-1][rj], child))
+
+    children.sort(key=lambda x: x[:3])
+    return children
+
+def root_node(env):
+    return Node(env.min_dist, [[0] for _ in range(env.num_robots)], [0],
+                np.zeros(env.num_robots))
+
+'''
+Depth first branch-and-bound below node
+    incumbent: shared mp.Value holding the best makespan over all workers,
+        or None when searching in a single process
+Return
+    best makespan found (np.inf if none beats bound), its node,
+    finished (False if the time limit cut the search), node count
+'''
+def dfs(env, node, bound, deadline, diff, incumbent=None):
+    best, best_node = bound, None
+    stack = [node]
+    count = 0
+    while len(stack) > 0:
+        if count % 64 == 0:
+            if time.time() > deadline:
+                return best, best_node, False, count
+            if incumbent is not None:
+                best = min(best, incumbent.value)
+        node = stack.pop()
+        # the incumbent may have improved since node was pushed
+        if node.lb >= best:
+            continue
+        count += 1
+
+        if len(node.partialw) == env.num_tasks + 1:
+            ms = makespan(env, node.dist)
+            if ms < best:
+                best, best_node = ms, node
+                if incumbent is not None:
+                    with incumbent.get_lock():
+                        if ms < incumbent.value:
+                            incumbent.value = ms
+            continue
+
+        children = expand(env, node, best, diff)
+        # best child on top of the stack
+        stack.extend(child for _, _, _, child in reversed(children))
+
+    return best, best_node, True, count
+
+'''
+Worker side of the parallel search, env and incumbent are set per process
+'''
+_worker = {}
+
+def init_worker(dur, ddl, wait, loc, incumbent):
+    _worker['env'] = SchedulingEnv.from_arrays(dur, ddl, wait, loc)
+    _worker['incumbent'] = incumbent
+
+def search_subtree(job):
+    actions, deadline, diff = job
+    env = _worker['env']
+    incumbent = _worker['incumbent']
+    node = root_node(env)
+    for ti, rj in actions:
+        node = insert(env, node, ti, rj, diff)
+    best, best_node, finished, count = dfs(env, node, incumbent.value, deadline,
+                                           diff, incumbent)
+    if best_node is None:
+        return np.inf, None, finished, count
+    return best, (best_node.partials, best_node.partialw), finished, count
+
+'''
+Actions leading from the root to node, in insertion order
+'''
+def node_actions(node):
+    robot_of = {}
+    for rj, partial in enumerate(node.partials):
+        for ti in partial[1:]:
+            robot_of[ti] = rj
+    return [(ti, robot_of[ti]) for ti in node.partialw[1:]]
+
+'''
+Solve one instance
+    time_limit: seconds for the whole search
+    processes: > 1 splits the first levels of the tree into subtrees
+Return
+    dict with makespan, partials, partialw, optimal, nodes, edf_makespan
+'''
+def solve(env, time_limit=60.0, processes=1, diff=1.0):
+    start_t = time.time()
+    deadline = start_t + time_limit
+    result = {'makespan': env.M, 'partials': None, 'partialw': None,
+              'optimal': False, 'nodes': 0, 'edf_makespan': env.M}
+    # initial STN infeasible
+    if not hasattr(env, 'min_dist'):
+        return result
+
+    root = root_node(env)
+
+    # EDF incumbent, best of all versions, each run on a copy of the env
+    bound = np.inf
+    for version in ['v1', 'v2', 'v3']:
+        edf_env = SchedulingEnv.from_arrays(env.dur, env.ddl, env.wait, env.loc)
+        feasible, edf_ms, _ = edf_schedule(edf_env, version)
+        if feasible and edf_ms < bound:
+            bound = edf_ms
+            result.update(makespan=edf_ms, edf_makespan=edf_ms,
+                          partials=[list(p) for p in edf_env.partials],
+                          partialw=list(edf_env.partialw))
+
+    if processes <= 1:
+        best, best_node, finished, count = dfs(env, root, bound, deadline, diff)
+        result['nodes'] = count
+        if best_node is not None:
+            result.update(makespan=best, partials=best_node.partials,
+                          partialw=best_node.partialw)
+        result['optimal'] = finished
+        return result
+
+    # split into enough subtrees to keep all processes busy
+    frontier = [root]
+    while 0 < len(frontier) < 4 * processes:
+        if len(frontier[0].partialw) == env.num_tasks + 1:
+            break
+        next_frontier = []
+        for node in frontier:
+            next_frontier.extend(child for _, _, _, child in expand(env, node, bound, diff))
+        result['nodes'] += len(frontier)
+        frontier = next_frontier
+
+    incumbent = mp.Value('d', bound)
+    jobs = [(node_actions(node), deadline, diff) for node in frontier]
+    finished_all = True
+    with mp.Pool(processes, initializer=init_worker,
+                 initargs=(env.dur, env.ddl, env.wait, env.loc, incumbent)) as pool:
+        for best, solution, finished, count in pool.imap_unordered(search_subtree, jobs):
+            result['nodes'] += count
+            finished_all &= finished
+            if solution is not None and best < result['makespan']:
+                result.update(makespan=best, partials=solution[0], partialw=solution[1])
+
+    result['optimal'] = finished_all
+    return result
+
+'''
+Write a solution in the gurobiv9 layout
+'''
+def save_solution(solname, partials, partialw):
+    np.savetxt(solname + '_w.txt', np.array(partialw[1:], dtype=np.int32), fmt='%d')
+    for rj, partial in enumerate(partials):
+        np.savetxt(solname + '_%d.txt' % rj, np.array(partial[1:], dtype=np.int32), fmt='%d')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path-to-test', default='./gen/r2t20_001', type=str)
+    parser.add_argument('--path-to-solutions', default=None, type=str,
+                        help='default: <path-to-test>v9, read by fill_demo_data')
+    parser.add_argument('--start-no', default=1, type=int)
+    parser.add_argument('--end-no', default=100, type=int)
+    parser.add_argument('--time-limit', default=60.0, type=float,
+                        help='seconds per instance')
+    parser.add_argument('--processes', default=1, type=int)
+    parser.add_argument('--overwrite', default=False, action='store_true',
+                        help='replace existing solution files')
+    args = parser.parse_args()
+
+    sol_folder = args.path_to_solutions
+    if sol_folder is None:
+        sol_folder = args.path_to_test + 'v9'
+    if not os.path.exists(sol_folder):
+        os.makedirs(sol_folder)
+
+    total_no = 0
+    optimal_no = 0
+    start_t = time.time()
+    for graph_no in range(args.start_no, args.end_no+1):
+        fname = args.path_to_test + '/%05d' % graph_no
+        solname = sol_folder + '/%05d' % graph_no
+        if not os.path.isfile(fname + '_dur.txt'):
+            continue
+        if os.path.isfile(solname + '_w.txt') and not args.overwrite:
+            print('%05d: solution exists, skipped' % graph_no)
+            continue
+        total_no += 1
+
+        env = SchedulingEnv(fname)
+        t = time.time()
+        result = solve(env, args.time_limit, args.processes)
+        if result['partialw'] is not None:
+            save_solution(solname, result['partials'], result['partialw'])
+        optimal_no += result['optimal']
+        print('%05d: makespan %.1f (EDF %.1f), optimal %d, nodes %d, %.2f s'
+              % (graph_no, result['makespan'], result['edf_makespan'],
+                 result['optimal'], result['nodes'], time.time() - t))
+
+    print('Solved %d instances, %d proven optimal, %.2f s'
+          % (total_no, optimal_no, time.time() - start_t))
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:12:31 2026
+
+Event-driven EDF baseline
+
+Instead of probing every integer time point, the scheduler jumps straight
+to the next time something can change:
+    1. a busy robot becomes available (RobotTeam heap)
+    2. an unscheduled task reaches its earliest start time
+    3. the task EDF prefers for a robot becomes startable under its rSTN
+
+Usage
+    python -m benchmark.edf --path-to-test ./data --start-no 374 --end-no 374
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from benchmark.edfutils import RobotTeam, pick_task_vec
+from utils import SchedulingEnv
+
+'''
+Earliest start time of each task in a min distance matrix
+    si->s0: A, s0 - si <= A, si >= -A
+'''
+def earliest_start(min_dist, tasks):
+    return -1.0 * min_dist[2 * np.asarray(tasks), 0]
+
+'''
+Earliest finish time of each task in a min distance matrix
+'''
+def earliest_finish(min_dist, tasks):
+    return -1.0 * min_dist[2 * np.asarray(tasks) + 1, 0]
+
+'''
+Run EDF on env until a full schedule is found or it becomes infeasible
+    version: robot picking rule of RobotTeam.pick_robot_by_min_dur
+Return
+    feasible, makespan, robots (RobotTeam holding the schedule)
+'''
+def edf_schedule(env, version='v1', verbose=False):
+    robots = RobotTeam(env.num_robots)
+    # initial STN infeasible, halfDG was never built
+    if not hasattr(env, 'halfDG'):
+        return False, env.M, robots
+    t = 0
+
+    while t <= env.max_deadline:
+        # candidate event times found while scheduling at t
+        events = []
+        exclude = []
+        robot_chosen = robots.pick_robot_by_min_dur_vec(t, env, version, exclude)
+        while robot_chosen is not None:
+            valid_mask = env.get_unscheduled_mask() & (env.get_earliest_start_times() <= t)
+            valid_tasks = np.flatnonzero(valid_mask) + 1
+            if len(valid_tasks) == 0:
+                break
+
+            rSTN, consistent = env.get_rSTN_dist(robot_chosen, valid_tasks)
+            task_chosen = pick_task_vec(rSTN, valid_tasks, t) if consistent else -1
+
+            if task_chosen >= 0:
+                task_dur = env.dur[task_chosen-1][robot_chosen]
+                rt, reward, done = env.insert_robot(task_chosen, robot_chosen)
+                robots.update_status(task_chosen, robot_chosen, task_dur, t)
+                if verbose:
+                    print('Time: %d, Robot %d, Task %02d, Dur %02d'
+                          % (t, robot_chosen+1, task_chosen, task_dur))
+                if not rt:
+                    return False, env.min_makespan, robots
+                if done:
+                    return True, env.min_makespan, robots
+            else:
+                if consistent:
+                    # the preferred task only becomes startable later
+                    idx = np.argmin(earliest_finish(rSTN, valid_tasks))
+                    events.append(earliest_start(rSTN, valid_tasks[idx:idx+1])[0])
+                exclude.append(robot_chosen)
+
+            robot_chosen = robots.pick_robot_by_min_dur_vec(t, env, version, exclude)
+
+        '''
+        Jump to the next event
+        '''
+        release = robots.next_release_time(t)
+        if release is not None:
+            events.append(release)
+        unsch_mask = env.get_unscheduled_mask()
+        events.extend(env.get_earliest_start_times()[unsch_mask])
+
+        events = [e for e in events if e > t]
+        if len(events) == 0:
+            break
+        t = min(events)
+
+    # deadline passed or no event left to make progress
+    return False, env.M, robots
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path-to-test', default='./gen/r2t20_001', type=str)
+    parser.add_argument('--start-no', default=1, type=int)
+    parser.add_argument('--end-no', default=100, type=int)
+    parser.add_argument('--version', default='v1', choices=['v1', 'v2', 'v3'])
+    parser.add_argument('--verbose', default=False, action='store_true')
+    args = parser.parse_args()
+
+    makespans = []
+    feas_count = 0
+    total_no = 0
+
+    start_t = time.time()
+    for graph_no in range(args.start_no, args.end_no+1):
+        fname = args.path_to_test + '/%05d' % graph_no
+        if not os.path.isfile(fname + '_dur.txt'):
+            continue
+        total_no += 1
+
+        env = SchedulingEnv(fname)
+        feasible, makespan, robots = edf_schedule(env, args.version, args.verbose)
+        if feasible:
+            feas_count += 1
+            makespans.append(makespan)
+        print('%05d: feasible %d, makespan %.1f' % (graph_no, feasible, makespan))
+    end_t = time.time()
+
+    print('EDF %s, feasible: %d/%d' % (args.version, feas_count, total_no))
+    if feas_count > 0:
+        print('Mean makespan of feasible: %.4f' % np.mean(makespans))
+    if total_no > 0:
+        print('Time: %.4f s, %.2f instances/s'
+              % (end_t - start_t, total_no / (end_t - start_t)))
@@ -7,6 +7,7 @@ Created on Fri Jun  7 16:05:04 2019
 Utils for EDF
 """
 
+import heapq
 import sys
 import numpy as np
 
@@ -38,6 +39,11 @@ class RobotTeam(object):
     def __init__(self, num_robots):
         self.num_robots = num_robots
         self.robots = [Robot(i) for i in range(num_robots)]
+        # next_available_time of all robots as an array, robot id as index
+        self.next_available = np.zeros(num_robots)
+        # min-heap of (next_available_time, robot id)
+        # a robot gets a new entry every time it is assigned a task
+        self.heap = [(0, i) for i in range(num_robots)]
 
     # Return a robot id that is available at a given time point
     # new: return all the available robots
@@ -79,6 +85,32 @@ class RobotTeam(object):
 
         return min(dur_and_robot)[1]
 
+    def pick_robot_by_min_dur_vec(self, time, env: SchedulingEnv, version, exclude=[]):
+        """Vectorized pick_robot_by_min_dur, same picking rule and tie-breaking.
+        Task filtering and the min/mean durations of all robots are done with
+        masked array reductions over env.dur
+        """
+        task_mask = env.get_unscheduled_mask()
+        if version == 'v3':
+            task_mask &= env.get_earliest_start_times() <= time
+        if not task_mask.any():
+            return None
+
+        dur = env.dur[task_mask]
+        if version == 'v2':
+            dur_robot = dur.min(axis=0)
+        else:
+            dur_robot = dur.mean(axis=0)
+
+        available = self.next_available <= time
+        available[list(exclude)] = False
+        # No robot is available
+        if not available.any():
+            return None
+
+        # argmin returns the lowest robot id on ties, same as min over tuples
+        return int(np.argmin(np.where(available, dur_robot, np.inf)))
+
     def __len__(self):
         return len(self.robots)
     
@@ -86,6 +118,19 @@ class RobotTeam(object):
     def update_status(self, task_chosen, robot_chosen, task_dur, t):
         self.robots[robot_chosen].schedule.append(Task(task_chosen, t, t + task_dur))
         self.robots[robot_chosen].next_available_time = t + task_dur  
+        self.next_available[robot_chosen] = t + task_dur
+        heapq.heappush(self.heap, (t + task_dur, robot_chosen))
+
+    # Return the earliest time after timepoint at which a busy robot
+    # becomes available, None if all robots are already idle
+    # Entries at or before timepoint are dropped: those robots stay idle
+    # until they are assigned again, which pushes a new entry
+    def next_release_time(self, timepoint):
+        while self.heap and self.heap[0][0] <= timepoint:
+            heapq.heappop(self.heap)
+        if len(self.heap) == 0:
+            return None
+        return self.heap[0][0]
 
     # print all robots' schedules
     def print_schedule(self):
@@ -124,6 +169,27 @@ def pick_task(minDG, act_task, timepoint):
     else:
         return -1
 
+'''
+Vectorized pick_task
+    min_dist: APSP distance matrix in SchedulingEnv.node_names order
+        si has index 2*i, fi has index 2*i+1, column 0 is s000
+    act_task: unscheduled tasks
+'''
+def pick_task_vec(min_dist, act_task, timepoint):
+    if len(act_task) == 0:
+        return -1
+    
+    act_task = np.asarray(act_task)
+    # pick the task with the earlist possible finish time
+    finish_times = -1.0 * min_dist[2 * act_task + 1, 0]
+    task_chosen = act_task[np.argmin(finish_times)]
+    
+    time_sk = -1.0 * min_dist[2 * task_chosen, 0]
+    if time_sk <= timepoint:
+        return task_chosen
+    else:
+        return -1
+
 if __name__ == '__main__':
     t = Task(4, 3, 5)
     print(t.id, t.start_time, t.end_time)
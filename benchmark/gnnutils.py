@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 13:40:05 2026
+
+Utils for scheduling with a trained ScheduleNet
+    model configuration (and training map_width) from lr_scheduler_train.py
+
+Inference export: eval mode, frozen parameters and dynamic int8 nn.Linear
+layers (torch.ao), saved as a state dict and rebuilt by load_policy_net
+"""
+
+import copy
+
+import numpy as np
+import torch
+
+from benchmark.edfutils import RobotTeam
+from hetnet import ScheduleNet4Layer
+from hetgraph import build_hetgraph, hetgraph_node_helper
+# single definition of the model configuration and map width of training
+from lr_scheduler_train import in_dim, hid_dim, out_dim, cetypes, num_heads, map_width
+
+
+'''
+Build ScheduleNet and load the weights of a trained checkpoint
+    also accepts an artifact of export_policy_net, which is CPU only
+'''
+def load_policy_net(checkpoint, device):
+    # this allow to load checkpoint trained via GPU to CPU-only
+    cp = torch.load(checkpoint, map_location=device)
+    if 'inference_state_dict' in cp:
+        policy_net = ScheduleNet4Layer(in_dim, hid_dim, out_dim, cetypes, num_heads)
+        policy_net = optimize_policy_net(policy_net, cp['quantized'])
+        policy_net.load_state_dict(cp['inference_state_dict'])
+        return policy_net
+
+    policy_net = ScheduleNet4Layer(in_dim, hid_dim, out_dim, cetypes, num_heads).to(device)
+    policy_net.load_state_dict(cp['policy_net_state_dict'])
+    policy_net.eval()
+    return policy_net
+
+'''
+Inference-only copy of a policy net on CPU
+    eval mode and no gradients; with quantize, the per-relation nn.Linear
+    layers (fc.<relation> of every layer) become dynamic int8 ones (int8
+    weights, activations quantized per call), the attention (attn_fc*,
+    edge_fc*) and aggregation stay in float32
+'''
+def optimize_policy_net(policy_net, quantize=True):
+    policy_net = copy.deepcopy(policy_net).cpu().eval()
+    policy_net.requires_grad_(False)
+    if quantize:
+        relation_fc = {name for name, module in policy_net.named_modules()
+                       if '.fc.' in name and isinstance(module, torch.nn.Linear)}
+        policy_net = torch.ao.quantization.quantize_dynamic(policy_net, relation_fc,
+                                                            dtype=torch.qint8)
+    return policy_net
+
+'''
+Write the optimized policy net of a checkpoint to path
+    the artifact is loaded with load_policy_net(path, 'cpu')
+'''
+def export_policy_net(checkpoint, path, quantize=True):
+    policy_net = optimize_policy_net(load_policy_net(checkpoint, 'cpu'), quantize)
+    torch.save({'quantized': quantize,
+                'inference_state_dict': policy_net.state_dict()}, path)
+    return policy_net
+
+'''
+Pick a task using GNN value function
+    hetg: HetGraph in DGL
+    act_task: unscheduled/available tasks
+    pnet: trained GNN model
+    ft_dict: input feature dict
+'''
+def gnn_pick_task(hetg, act_task, pnet, ft_dict):
+    length = len(act_task)
+    if length == 0:
+        return -1
+
+    if length == 1:
+        return act_task[0]
+
+    with torch.no_grad():
+        result = pnet(hetg, ft_dict)
+        # Lx1
+        q_s_a = result['value']
+        idx = int(q_s_a.argmax())
+
+    return act_task[idx]
+
+'''
+Build the HetGraph and input features of the current env state
+    for robot_chosen picking among valid_tasks
+'''
+def build_state_graph(env, robot_chosen, valid_tasks, map_width, loc_dist_threshold, device):
+    unsch_tasks = np.array(env.get_unscheduled_tasks(), dtype=np.int64)
+    g = build_hetgraph(env.halfDG, env.num_tasks, env.num_robots, env.dur,
+                       map_width, np.array(env.loc, dtype=np.int64),
+                       loc_dist_threshold, env.partials, unsch_tasks, robot_chosen,
+                       valid_tasks)
+    g = g.to(device)
+
+    feat_dict = hetgraph_node_helper(env.halfDG.number_of_nodes(),
+                                     env.partialw,
+                                     env.partials, env.loc, env.dur,
+                                     map_width, env.num_robots,
+                                     len(valid_tasks))
+
+    feat_dict_tensor = {}
+    for key in feat_dict:
+        feat_dict_tensor[key] = torch.Tensor(feat_dict[key]).to(device)
+
+    return g, feat_dict_tensor
+
+'''
+Generate a full schedule with ScheduleNet picking tasks
+    robots are picked with RobotTeam.pick_robot_by_min_dur_vec
+    time jumps from event to event as in benchmark/edf.py
+Return
+    feasible, makespan, robots (RobotTeam holding the schedule)
+'''
+def gnn_schedule(env, policy_net, device, map_width, loc_dist_threshold=1.0,
+                 version='v1'):
+    robots = RobotTeam(env.num_robots)
+    # initial STN infeasible, halfDG was never built
+    if not hasattr(env, 'halfDG'):
+        return False, env.M, robots
+    t = 0
+
+    while t <= env.max_deadline:
+        exclude = []
+        robot_chosen = robots.pick_robot_by_min_dur_vec(t, env, version, exclude)
+        while robot_chosen is not None:
+            valid_mask = env.get_unscheduled_mask() & (env.get_earliest_start_times() <= t)
+            valid_tasks = np.flatnonzero(valid_mask) + 1
+            if len(valid_tasks) == 0:
+                break
+
+            g, feat_dict_tensor = build_state_graph(env, robot_chosen, valid_tasks,
+                                                    map_width, loc_dist_threshold,
+                                                    device)
+            task_chosen = gnn_pick_task(g, valid_tasks, policy_net, feat_dict_tensor)
+
+            task_dur = env.dur[task_chosen-1][robot_chosen]
+            rt, reward, done = env.insert_robot(task_chosen, robot_chosen)
+            robots.update_status(task_chosen, robot_chosen, task_dur, t)
+            if not rt:
+                return False, env.min_makespan, robots
+            if done:
+                return True, env.min_makespan, robots
+
+            robot_chosen = robots.pick_robot_by_min_dur_vec(t, env, version, exclude)
+
+        '''
+        Jump to the next event
+        '''
+        events = list(env.get_earliest_start_times()[env.get_unscheduled_mask()])
+        release = robots.next_release_time(t)
+        if release is not None:
+            events.append(release)
+
+        events = [e for e in events if e > t]
+        if len(events) == 0:
+            break
+        t = min(events)
+
+    return False, env.M, robots
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Oct 23 11:02:19 2026
+
+Import-time benchmark
+    imports each module in a fresh interpreter, as a pool worker would,
+    and reports the median wall time and whether torch/dgl got loaded
+
+Usage
+    python -m benchmark.import_time [--modules utils benchmark.edf] [--repeats 5]
+"""
+
+import argparse
+import subprocess
+import sys
+
+import numpy as np
+
+MODULES = ['utils', 'benchmark.edfutils', 'benchmark.edf', 'hetgraph']
+
+_probe = '''
+import sys, time
+start_t = time.perf_counter()
+import {module}
+print(time.perf_counter() - start_t, int('torch' in sys.modules), int('dgl' in sys.modules))
+'''
+
+'''
+Import module once in a new interpreter
+Return
+    (seconds, torch loaded, dgl loaded), None if the import failed
+'''
+def probe(module):
+    ret = subprocess.run([sys.executable, '-c', _probe.format(module=module)],
+                         capture_output=True, text=True)
+    if ret.returncode != 0:
+        return None
+    seconds, torch_loaded, dgl_loaded = ret.stdout.split()[-3:]
+    return float(seconds), bool(int(torch_loaded)), bool(int(dgl_loaded))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--modules', nargs='+', default=MODULES)
+    parser.add_argument('--repeats', default=5, type=int)
+    args = parser.parse_args()
+
+    print('%-22s %10s %10s %6s %6s' % ('module', 'median ms', 'min ms', 'torch', 'dgl'))
+    for module in args.modules:
+        results = [probe(module) for _ in range(args.repeats)]
+        if any(r is None for r in results):
+            print('%-22s import failed' % module)
+            continue
+        times = np.array([r[0] for r in results]) * 1000
+        print('%-22s %10.1f %10.1f %6s %6s'
+              % (module, np.median(times), times.min(), results[0][1], results[0][2]))
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 24 16:22:48 2026
+
+Parity check and benchmark of the stn_jit kernels against the numpy paths
+    bellman_ford:  consistency of generated initial STNs (stn.bellman_ford)
+    add_edges:     insertion edges on rollout states (stn.add_edges)
+    floyd_warshall: padded batches of STNs (stn.floyd_warshall_batch)
+    earliest_starts: longest path over random forward edges (verify.py)
+Each case is run through the numpy implementation and the kernel; results
+must match exactly (flags and distances; for floyd_warshall only the
+distances of STNs flagged consistent, the values left by a negative cycle
+depend on the relaxation order). Kernels are compiled with numba
+when it is installed, otherwise they run as plain Python and only the
+parity columns are meaningful.
+
+Usage
+    python -m benchmark.jit_kernels [--instances 30] [--tasks 20] [--repeats 3]
+"""
+
+import argparse
+import io
+import time
+from contextlib import redirect_stdout
+
+import numpy as np
+
+import stn
+import stn_jit
+import verify
+from generator import default_params, sample_instance
+from utils import SchedulingEnv
+
+'''
+Run every case through func, with the kernels turned on or off
+Return
+    list of results, total seconds of the fastest repeat
+'''
+def run_cases(func, cases, jit, repeats, compile=True):
+    if jit:
+        stn_jit.enable(compile)
+    else:
+        stn_jit.disable()
+    best = np.inf
+    for _ in range(repeats):
+        start_t = time.perf_counter()
+        results = [func(*case) for case in cases]
+        best = min(best, time.perf_counter() - start_t)
+    stn_jit.disable()
+    return results, best
+
+def same(a, b):
+    if isinstance(a, tuple):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    if a is None or b is None:
+        return a is None and b is None
+    return np.array_equal(np.asarray(a), np.asarray(b))
+
+'''
+(dist, consistent) of floyd_warshall_batch: same flags, same distances
+    of the consistent STNs
+'''
+def same_apsp(a, b):
+    (dist_a, consistent_a), (dist_b, consistent_b) = a, b
+    return (np.array_equal(consistent_a, consistent_b)
+            and np.array_equal(dist_a[consistent_a], dist_b[consistent_b]))
+
+def consistency_cases(rng, num_instances, num_tasks):
+    params = default_params()
+    params.update(tasks=(num_tasks, num_tasks))
+    return [stn.stn_edges(inst['dur'], inst['ddl'], inst['wait'])
+            for inst in (sample_instance(rng, params) for _ in range(num_instances))]
+
+'''
+(min_dist, u, v, w) of a random insertion on the states of random rollouts
+'''
+def insertion_cases(rng, num_instances, num_tasks):
+    params = default_params()
+    params.update(tasks=(num_tasks, num_tasks))
+    cases = []
+    for _ in range(num_instances):
+        with redirect_stdout(io.StringIO()):
+            env = SchedulingEnv.from_arrays(**sample_instance(rng, params))
+            if not hasattr(env, 'min_dist'):
+                continue
+            while True:
+                unsch = env.get_unscheduled_tasks()
+                ti = int(rng.choice(unsch))
+                rj = int(rng.integers(env.num_robots))
+                u, v, w = env.insertion_edges(ti, rj, env.partials[rj][-1],
+                                              env.get_unscheduled_mask())
+                cases.append((env.min_dist, u, v, w))
+                rt, _, done = env.insert_robot(ti, rj)
+                if not rt or done:
+                    break
+    return cases
+
+def batch_cases(rng, num_batches, num_tasks, batch_size=8):
+    cases = []
+    for _ in range(num_batches):
+        edges = consistency_cases(rng, batch_size, num_tasks)
+        cases.append((stn.pad_batch([stn.stn_matrix(*e) for e in edges])[0],))
+    return cases
+
+def longest_path_cases(rng, num_instances, num_tasks):
+    cases = []
+    for _ in range(num_instances):
+        num_edges = 4 * num_tasks
+        u = rng.integers(0, num_tasks - 1, num_edges)
+        v = u + rng.integers(1, num_tasks - u)
+        c = rng.integers(0, 10, num_edges).astype(np.float64)
+        cases.append((num_tasks, u, v, c))
+    return cases
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--instances', default=30, type=int)
+    parser.add_argument('--tasks', default=20, type=int)
+    parser.add_argument('--repeats', default=3, type=int)
+    parser.add_argument('--seed', default=0, type=int)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    kernels = [('bellman_ford', stn.bellman_ford, same,
+                consistency_cases(rng, args.instances, args.tasks)),
+               ('add_edges', stn.add_edges, same,
+                insertion_cases(rng, args.instances, args.tasks)),
+               ('floyd_warshall', stn.floyd_warshall_batch, same_apsp,
+                batch_cases(rng, max(1, args.instances // 8), args.tasks)),
+               ('earliest_starts', verify.earliest_starts, same,
+                longest_path_cases(rng, args.instances, args.tasks))]
+
+    try:
+        stn_jit.enable()
+        backend = 'numba'
+    except ImportError:
+        backend = 'python'
+    stn_jit.disable()
+    print('kernel backend: %s' % backend)
+
+    print('%-16s %6s %6s %12s %12s %12s %9s'
+          % ('kernel', 'cases', 'match', 'compile ms', 'numpy ms', 'kernel ms', 'speedup'))
+    for name, func, compare, cases in kernels:
+        ref, numpy_t = run_cases(func, cases, False, args.repeats)
+        # the first call compiles (or loads the cache) for each signature
+        _, first_t = run_cases(func, cases[:1], True, 1, backend == 'numba')
+        res, kernel_t = run_cases(func, cases, True, args.repeats, backend == 'numba')
+        match = sum(compare(a, b) for a, b in zip(ref, res))
+        print('%-16s %6d %6d %12.1f %12.2f %12.2f %9.1f'
+              % (name, len(cases), match, first_t * 1000, numpy_t * 1000,
+                 kernel_t * 1000, numpy_t / kernel_t))
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 27 10:36:05 2026
+
+Eager vs lazy demonstration replay buffers (utils.LazyReplayMemory)
+    fills both from the same solved instances with fill_demo_data and
+    reports their pickled size, checks that every lazy transition
+    rebuilds the eager one (halfDG edges and weights, schedules, actions,
+    rewards) and times sampling at several LRU cache sizes
+
+Usage
+    python -m benchmark.lazy_replay --path-to-train ./gen/r2t20_001
+        --start-no 1 --end-no 100 --batch-size 8 --batches 200
+        --cache-sizes 0 256 4096
+"""
+
+import argparse
+import io
+import pickle
+import random
+import time
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from lr_scheduler_train import fill_demo_data
+from utils import LazyReplayMemory, ReplayMemory
+
+def same_transition(a, b):
+    for field in ('curr_g', 'next_g'):
+        ga, gb = getattr(a, field), getattr(b, field)
+        if list(ga.nodes) != list(gb.nodes):
+            return False
+        if list(ga.edges(data='weight')) != list(gb.edges(data='weight')):
+            return False
+    for field in ('curr_partials', 'next_partials'):
+        pa, pb = getattr(a, field), getattr(b, field)
+        if len(pa) != len(pb) or not all(np.array_equal(x, y) for x, y in zip(pa, pb)):
+            return False
+    for field in ('curr_partialw', 'next_partialw', 'locs', 'durs'):
+        if not np.array_equal(getattr(a, field), getattr(b, field)):
+            return False
+    return (a.act_task == b.act_task and a.act_robot == b.act_robot
+            and a.reward_n == b.reward_n and a.next_done == b.next_done)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path-to-train', default='./gen/r2t20_001', type=str)
+    parser.add_argument('--start-no', default=1, type=int)
+    parser.add_argument('--end-no', default=100, type=int)
+    parser.add_argument('--gamma', default=0.99, type=float)
+    parser.add_argument('--temporal-edges', default='full', choices=['full', 'reduced', 'topk'])
+    parser.add_argument('--temporal-k', default=8, type=int)
+    parser.add_argument('--batch-size', default=8, type=int)
+    parser.add_argument('--batches', default=200, type=int)
+    parser.add_argument('--cache-sizes', nargs='+', default=[0, 256, 4096], type=int)
+    parser.add_argument('--seed', default=0, type=int)
+    args = parser.parse_args()
+
+    with redirect_stdout(io.StringIO()):
+        start_t = time.perf_counter()
+        eager = fill_demo_data(args.path_to_train, args.start_no, args.end_no, args.gamma,
+                               ReplayMemory(1000*20), args.temporal_edges, args.temporal_k)
+        eager_fill_t = time.perf_counter() - start_t
+        start_t = time.perf_counter()
+        lazy = fill_demo_data(args.path_to_train, args.start_no, args.end_no, args.gamma,
+                              LazyReplayMemory(ReplayMemory(1000*20), args.temporal_edges,
+                                               args.temporal_k),
+                              args.temporal_edges, args.temporal_k)
+        lazy_fill_t = time.perf_counter() - start_t
+    print('Transitions: %d eager, %d lazy' % (len(eager), len(lazy)))
+    if len(eager) == 0:
+        raise SystemExit('no solved instances found')
+
+    eager_bytes = len(pickle.dumps(eager))
+    lazy_bytes = len(pickle.dumps(lazy))
+    print('%-6s %12s %10s' % ('buffer', 'pickled KB', 'fill s'))
+    print('%-6s %12.1f %10.2f' % ('eager', eager_bytes / 1024, eager_fill_t))
+    print('%-6s %12.1f %10.2f' % ('lazy', lazy_bytes / 1024, lazy_fill_t))
+    print('Memory reduction: %.1fx' % (eager_bytes / lazy_bytes))
+
+    with redirect_stdout(io.StringIO()):
+        rebuilt = lazy.materialize(lazy.memory)
+    match = sum(same_transition(a, b) for a, b in zip(eager.memory, rebuilt))
+    print('Rebuilt transitions matching: %d/%d' % (match, len(eager)))
+
+    print('%10s %12s %10s %10s' % ('cache', 'ms/batch', 'hit rate', 'eager ms'))
+    random.seed(args.seed)
+    start_t = time.perf_counter()
+    for _ in range(args.batches):
+        eager.sample(args.batch_size)
+    eager_t = (time.perf_counter() - start_t) / args.batches
+    for cache_size in args.cache_sizes:
+        lazy.cache_size = cache_size
+        lazy.cache.clear()
+        lazy.hits = lazy.misses = 0
+        random.seed(args.seed)
+        with redirect_stdout(io.StringIO()):
+            start_t = time.perf_counter()
+            for _ in range(args.batches):
+                lazy.sample(args.batch_size)
+            lazy_t = (time.perf_counter() - start_t) / args.batches
+        hit_rate = lazy.hits / max(1, lazy.hits + lazy.misses)
+        print('%10d %12.2f %10.2f %10.3f' % (cache_size, lazy_t * 1000, hit_rate,
+                                             eager_t * 1000))
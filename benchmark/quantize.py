@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 25 10:14:36 2026
+
+Export and benchmark of the CPU inference artifact of ScheduleNet
+    eager:  load_policy_net, as used by benchmark/__main__.py
+    frozen: eval mode, no gradients, float32
+    int8:   frozen + dynamic int8 per-relation fc layers, written by
+            export_policy_net and read back with load_policy_net
+Decision states are the HetGraphs the eager net scores while scheduling the
+instance with gnn_schedule. For each variant it reports decisions/s and,
+against eager, the mean/max |Q - Q_eager| and how often the greedy task is
+the same, plus the makespan of a full gnn_schedule run.
+
+Usage
+    python -m benchmark.quantize --checkpoint ./checkpoint.tar
+        --instance ./data/00374 --output ./schedulenet_int8.pt
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import torch
+
+from benchmark.gnnutils import (export_policy_net, gnn_schedule, load_policy_net,
+                                map_width, optimize_policy_net)
+from utils import SchedulingEnv
+
+'''
+Policy net wrapper that keeps every (graph, features) it is called with
+'''
+class StateRecorder(object):
+    def __init__(self, policy_net):
+        self.policy_net = policy_net
+        self.states = []
+
+    def __call__(self, g, feat_dict):
+        self.states.append((g, feat_dict))
+        return self.policy_net(g, feat_dict)
+
+def q_values(policy_net, states):
+    with torch.inference_mode():
+        return [policy_net(g, feat_dict)['value'].numpy().ravel() for g, feat_dict in states]
+
+def decisions_per_second(policy_net, states, repeats):
+    best = np.inf
+    with torch.inference_mode():
+        for _ in range(repeats):
+            start_t = time.perf_counter()
+            for g, feat_dict in states:
+                policy_net(g, feat_dict)
+            best = min(best, time.perf_counter() - start_t)
+    return len(states) / best
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--checkpoint', required=True, type=str)
+    parser.add_argument('--instance', default='./data/00374', type=str)
+    parser.add_argument('--output', default='./schedulenet_int8.pt', type=str)
+    parser.add_argument('--map-width', default=map_width, type=int,
+                        help='defaults to the map width of training')
+    parser.add_argument('--repeats', default=5, type=int)
+    parser.add_argument('--threads', default=1, type=int)
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    device = torch.device('cpu')
+
+    eager = load_policy_net(args.checkpoint, device)
+    export_policy_net(args.checkpoint, args.output, quantize=True)
+    print('Artifact saved to %s (%.1f kB, checkpoint %.1f kB)'
+          % (args.output, os.path.getsize(args.output) / 1024,
+             os.path.getsize(args.checkpoint) / 1024))
+
+    recorder = StateRecorder(eager)
+    feasible, makespan, _ = gnn_schedule(SchedulingEnv(args.instance), recorder, device,
+                                         args.map_width)
+    states = recorder.states
+    print('Decision states: %d' % len(states))
+
+    variants = [('eager', eager),
+                ('frozen', optimize_policy_net(eager, quantize=False)),
+                ('int8', load_policy_net(args.output, device))]
+    q_eager = q_values(eager, states)
+
+    print('%-8s %12s %10s %10s %10s %10s'
+          % ('variant', 'decisions/s', 'mean |dQ|', 'max |dQ|', 'agreement', 'makespan'))
+    for name, policy_net in variants:
+        q = q_values(policy_net, states)
+        dev = np.concatenate([np.abs(a - b) for a, b in zip(q, q_eager)])
+        agree = np.mean([np.argmax(a) == np.argmax(b) for a, b in zip(q, q_eager)])
+        feasible, makespan, _ = gnn_schedule(SchedulingEnv(args.instance), policy_net,
+                                             device, args.map_width)
+        print('%-8s %12.1f %10.5f %10.5f %10.3f %10s'
+              % (name, decisions_per_second(policy_net, states, args.repeats),
+                 dev.mean(), dev.max(), agree,
+                 '%.1f' % makespan if feasible else 'infeasible'))
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 16:03:18 2026
+
+Scalability benchmark
+    generates synthetic instances over a grid of task count, robot count
+    and map width, then times the hot paths on each of them
+        env_init: SchedulingEnv.__init__
+        insert_robot: per insertion, averaged over the first few steps
+        johnsonU: APSP on the initial STN
+        johnson_dist: same, distances only (what SchedulingEnv runs)
+        build_hetgraph / hetgraph_node_helper / forward: model input & pass
+    and records the peak Python heap usage (tracemalloc) of each one
+
+Results are stored as JSON tagged with the current git commit, and a
+previous result file can be passed to --compare to spot regressions.
+
+Usage
+    python -m benchmark.scalability --tasks 20 50 100 --robots 2 5 10
+        --map-widths 3 10 --output scal.json [--compare old.json]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmark.JohnsonUltra import johnson_dist, johnsonU
+from generator import write_instance_txt
+from utils import SchedulingEnv
+
+COMPONENTS = ['env_init', 'insert_robot', 'johnsonU', 'johnson_dist',
+              'build_hetgraph', 'hetgraph_node_helper', 'forward']
+
+'''
+Sample a random instance that is always consistent
+    wait constraints always point from a later task to an earlier one so
+    they cannot form a cycle, deadlines are kept loose
+Return
+    dict of dur, ddl, wait, loc arrays as generator.sample_instance
+'''
+def sample_instance(num_tasks, num_robots, map_width, rng):
+    dur = rng.integers(1, 11, size=(num_tasks, num_robots))
+
+    num_ddl = max(1, num_tasks // 10)
+    ddl_tasks = rng.choice(num_tasks, num_ddl, replace=False) + 1
+    ddl = np.stack([ddl_tasks, rng.integers(num_tasks * 5, num_tasks * 10, num_ddl)], axis=1)
+
+    num_wait = max(1, num_tasks // 4)
+    wait = []
+    for _ in range(num_wait):
+        ti, tj = np.sort(rng.choice(num_tasks, 2, replace=False) + 1)[::-1]
+        wait.append([ti, tj, rng.integers(1, 6)])
+    wait = np.array(wait)
+
+    loc = rng.integers(1, map_width + 1, size=(num_tasks, 2))
+
+    return {'dur': dur.astype(np.int32), 'ddl': ddl.astype(np.int32),
+            'wait': wait.astype(np.int32), 'loc': loc.astype(np.int32)}
+
+'''
+Call func repeats times for timing, plus one traced call for memory
+    tracing slows allocations down, so it is kept out of the timed calls
+Return
+    (mean seconds, min seconds, peak traced bytes, last return value)
+'''
+def measure(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start_t = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start_t)
+
+    tracemalloc.start()
+    ret = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return float(np.mean(times)), float(np.min(times)), peak, ret
+
+'''
+Insert the first num_steps tasks in earliest start order, round robin
+    over robots, on a fresh env
+'''
+def insert_steps(fname, num_steps):
+    env = SchedulingEnv(fname)
+    steps = 0
+    start_t = time.perf_counter()
+    for step in range(num_steps):
+        unsch_mask = env.get_unscheduled_mask()
+        est = np.where(unsch_mask, env.get_earliest_start_times(), np.inf)
+        ti = int(np.argmin(est)) + 1
+        rt, reward, done = env.insert_robot(ti, step % env.num_robots)
+        steps += 1
+        if not rt or done:
+            break
+    return (time.perf_counter() - start_t) / max(steps, 1)
+
+def run_config(fname, num_tasks, num_robots, map_width, components, repeats, num_steps):
+    result = {'num_tasks': num_tasks, 'num_robots': num_robots,
+              'map_width': map_width, 'timings': {}}
+
+    def record(name, func):
+        mean_t, min_t, peak, ret = measure(func, repeats)
+        result['timings'][name] = {'mean_s': mean_t, 'min_s': min_t,
+                                   'peak_bytes': peak}
+        return ret
+
+    env = record('env_init', lambda: SchedulingEnv(fname))
+    if not hasattr(env, 'halfDG'):
+        result['feasible'] = False
+        return result
+    result['feasible'] = True
+    result['halfDG_edges'] = env.halfDG.number_of_edges()
+
+    if 'insert_robot' in components:
+        # time per insertion instead of per call to insert_steps
+        per_step = []
+        mean_t, min_t, peak, _ = measure(lambda: per_step.append(insert_steps(fname, num_steps)),
+                                         repeats)
+        result['timings']['insert_robot'] = {'mean_s': float(np.mean(per_step[:repeats])),
+                                             'min_s': float(np.min(per_step[:repeats])),
+                                             'peak_bytes': peak}
+    if 'johnsonU' in components:
+        record('johnsonU', lambda: johnsonU(env.g))
+    if 'johnson_dist' in components:
+        record('johnson_dist', lambda: johnson_dist(env.g, env.node_names))
+
+    if not set(components) & {'build_hetgraph', 'hetgraph_node_helper', 'forward'}:
+        return result
+
+    import torch
+    from hetgraph import build_hetgraph, hetgraph_node_helper
+
+    unsch_tasks = np.array(env.get_unscheduled_tasks(), dtype=np.int64)
+    locs = np.array(env.loc, dtype=np.int64)
+    g = record('build_hetgraph',
+               lambda: build_hetgraph(env.halfDG, env.num_tasks, env.num_robots, env.dur,
+                                      map_width, locs, 1.0, env.partials, unsch_tasks,
+                                      0, unsch_tasks))
+    feat_dict = record('hetgraph_node_helper',
+                       lambda: hetgraph_node_helper(env.halfDG.number_of_nodes(),
+                                                    env.partialw, env.partials,
+                                                    env.loc, env.dur, map_width,
+                                                    env.num_robots, len(unsch_tasks)))
+
+    if 'forward' in components:
+        from hetnet import ScheduleNet4Layer
+        from benchmark.gnnutils import in_dim, hid_dim, out_dim, cetypes, num_heads
+
+        policy_net = ScheduleNet4Layer(in_dim, hid_dim, out_dim, cetypes, num_heads)
+        policy_net.eval()
+        feat_dict_tensor = {key: torch.Tensor(feat_dict[key]) for key in feat_dict}
+
+        def forward():
+            with torch.no_grad():
+                return policy_net(g, feat_dict_tensor)
+        record('forward', forward)
+
+    return result
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+'''
+Print the mean time ratio new/old for every matching config & component
+'''
+def compare(results, old_results):
+    key = lambda r: (r['num_tasks'], r['num_robots'], r['map_width'])
+    old = {key(r): r for r in old_results['results']}
+    print('Compared with commit %s' % old_results.get('commit'))
+    for r in results['results']:
+        if key(r) not in old:
+            continue
+        for name, timing in r['timings'].items():
+            if name in old[key(r)]['timings']:
+                ratio = timing['mean_s'] / max(old[key(r)]['timings'][name]['mean_s'], 1e-12)
+                print('    t%d r%d w%d %-22s x%.2f' % (key(r) + (name, ratio)))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tasks', nargs='+', default=[20, 50, 100], type=int)
+    parser.add_argument('--robots', nargs='+', default=[2, 5, 10], type=int)
+    parser.add_argument('--map-widths', nargs='+', default=[3, 10], type=int)
+    parser.add_argument('--components', nargs='+', default=COMPONENTS, choices=COMPONENTS)
+    parser.add_argument('--repeats', default=3, type=int)
+    parser.add_argument('--insert-steps', default=5, type=int)
+    parser.add_argument('--seed', default=0, type=int)
+    parser.add_argument('--output', default='scalability.json', type=str)
+    parser.add_argument('--compare', default=None, type=str)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    results = {'commit': git_commit(),
+               'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+               'python': platform.python_version(),
+               'results': []}
+
+    with tempfile.TemporaryDirectory() as folder:
+        for num_tasks, num_robots, map_width in itertools.product(args.tasks, args.robots,
+                                                                  args.map_widths):
+            fname = os.path.join(folder, 't%dr%dw%d' % (num_tasks, num_robots, map_width))
+            write_instance_txt(fname, sample_instance(num_tasks, num_robots, map_width, rng))
+            result = run_config(fname, num_tasks, num_robots, map_width,
+                                args.components, args.repeats, args.insert_steps)
+            results['results'].append(result)
+
+            print('tasks %d, robots %d, map %dx%d' % (num_tasks, num_robots, map_width, map_width))
+            for name, timing in result['timings'].items():
+                print('    %-22s %10.4f ms  peak %8.1f KB'
+                      % (name, timing['mean_s'] * 1000, timing['peak_bytes'] / 1024))
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print('Results saved to %s' % args.output)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 25 15:48:22 2026
+
+Load generator for service.SchedulingService
+    runs concurrent clients, each scheduling instances one decision at a
+    time: robots in round robin, every unscheduled task is a candidate,
+    the task comes from the service; a finished (or infeasible) instance
+    is replaced by the next one
+    env setup and insertions run in a thread pool, off the event loop
+
+Reports decisions/s, p50/p99 latency and the mean batch size, for the
+batched service and, with --baseline, for one graph per forward.
+
+Usage
+    python -m benchmark.service_load --checkpoint ./checkpoint.tar
+        --path-to-test ./gen/r2t20_001 --start-no 1 --end-no 50
+        --clients 32 --decisions 50 --max-latency-ms 5 --baseline
+"""
+
+import argparse
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+
+from benchmark.gnnutils import load_policy_net, map_width
+from service import SchedulingService
+from utils import SchedulingEnv
+
+async def client(service, fnames, num_decisions, executor, offset):
+    loop = asyncio.get_running_loop()
+    k = offset
+    env = None
+    step = 0
+    for _ in range(num_decisions):
+        while env is None or not hasattr(env, 'halfDG'):
+            env = await loop.run_in_executor(executor, SchedulingEnv, fnames[k % len(fnames)])
+            k += 1
+            step = 0
+        valid_tasks = np.flatnonzero(env.get_unscheduled_mask()) + 1
+        robot_chosen = step % env.num_robots
+        task_chosen = await service.decide(env, robot_chosen, valid_tasks)
+        rt, reward, done = await loop.run_in_executor(executor, env.insert_robot, task_chosen,
+                                                      robot_chosen)
+        step += 1
+        if not rt or done:
+            env = None
+
+async def run_load(policy_net, fnames, args, max_batch_size):
+    executor = ThreadPoolExecutor(args.client_workers)
+    service = SchedulingService(policy_net, args.map_width,
+                                max_batch_size=max_batch_size,
+                                max_latency=args.max_latency_ms / 1000.0,
+                                build_workers=args.build_workers)
+    async with service:
+        await asyncio.gather(*[client(service, fnames, args.decisions, executor, i)
+                               for i in range(args.clients)])
+        metrics = service.metrics()
+    executor.shutdown()
+    return metrics
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--checkpoint', required=True, type=str)
+    parser.add_argument('--path-to-test', default='./gen/r2t20_001', type=str)
+    parser.add_argument('--start-no', default=1, type=int)
+    parser.add_argument('--end-no', default=50, type=int)
+    parser.add_argument('--map-width', default=map_width, type=int,
+                        help='defaults to the map width of training')
+    parser.add_argument('--clients', default=32, type=int)
+    parser.add_argument('--decisions', default=50, type=int,
+                        help='decisions requested by each client')
+    parser.add_argument('--max-batch-size', default=32, type=int)
+    parser.add_argument('--max-latency-ms', default=5.0, type=float)
+    parser.add_argument('--build-workers', default=None, type=int,
+                        help='graph building processes, 0 builds on the event loop; '
+                        'default cpu_count - 1')
+    parser.add_argument('--client-workers', default=4, type=int)
+    parser.add_argument('--threads', default=1, type=int,
+                        help='torch intra-op threads of the forward')
+    parser.add_argument('--baseline', default=False, action='store_true',
+                        help='also run with one graph per forward')
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    policy_net = load_policy_net(args.checkpoint, torch.device('cpu'))
+    fnames = [args.path_to_test + '/%05d' % graph_no
+              for graph_no in range(args.start_no, args.end_no+1)
+              if os.path.isfile(args.path_to_test + '/%05d_dur.txt' % graph_no)]
+    print('Instances found: %d' % len(fnames))
+
+    runs = [('batched', args.max_batch_size)]
+    if args.baseline:
+        runs.append(('unbatched', 1))
+    print('%-10s %10s %12s %10s %10s %12s'
+          % ('mode', 'decisions', 'decisions/s', 'p50 ms', 'p99 ms', 'mean batch'))
+    for name, max_batch_size in runs:
+        m = asyncio.run(run_load(policy_net, fnames, args, max_batch_size))
+        print('%-10s %10d %12.1f %10.2f %10.2f %12.2f'
+              % (name, m['decisions'], m['throughput'], m['p50_ms'], m['p99_ms'],
+                 m['mean_batch_size']))
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Oct 22 14:18:40 2026
+
+Benchmark of the temporal_edges options of SchedulingEnv
+    full / reduced / topk halfDG on generated instances of growing size
+
+For every mode and size, averaged over the instances and the first few
+states of a rollout (tasks inserted in earliest start order):
+    edges: number of 'temporal' edges in the HetGraph
+    fidelity: share of halfDG node pairs whose shortest distance over the
+        kept edges equals the full APSP distance (1.0 for reduced)
+    build_ms / forward_ms: build_hetgraph and ScheduleNet forward time
+    agreement / q_dev: with --checkpoint, how often the greedy task matches
+        the one picked on the full graph, and the mean |Q - Q_full|
+
+Usage
+    python -m benchmark.temporal_edges --tasks 20 50 100 --robots 5
+        [--checkpoint cp/checkpoint_30000.tar]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from generator import default_params, sample_instance
+from stn import is_consistent
+from utils import SchedulingEnv
+
+MODES = ['full', 'reduced', 'topk']
+
+'''
+Share of node pairs whose distance over the halfDG edges matches dist
+'''
+def distance_fidelity(env):
+    half_idx = [0, 1] + list(range(2, 2*env.num_tasks+2, 2))
+    dist = env.min_dist[np.ix_(half_idx, half_idx)]
+    index = {env.node_names[i]: k for k, i in enumerate(half_idx)}
+
+    sparse = np.full(dist.shape, np.inf)
+    for u, v, w in env.halfDG.edges.data('weight'):
+        sparse[index[u], index[v]] = w
+    for k in range(len(sparse)):
+        sparse = np.minimum(sparse, sparse[:, k, None] + sparse[None, k, :])
+    return np.mean(np.isclose(sparse, dist))
+
+def sample_feasible(rng, num_tasks, num_robots, map_width):
+    params = default_params()
+    params.update(tasks=(num_tasks, num_tasks), robots=(num_robots, num_robots),
+                  map_width=map_width)
+    while True:
+        instance = sample_instance(rng, params)
+        if is_consistent(instance['dur'], instance['ddl'], instance['wait']):
+            return instance
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tasks', nargs='+', default=[20, 50, 100], type=int)
+    parser.add_argument('--robots', default=5, type=int)
+    parser.add_argument('--map-width', default=3, type=int)
+    parser.add_argument('--topk', default=8, type=int)
+    parser.add_argument('--instances', default=5, type=int)
+    parser.add_argument('--states', default=5, type=int,
+                        help='rollout states measured per instance')
+    parser.add_argument('--checkpoint', default=None, type=str,
+                        help='trained ScheduleNet, enables forward time and accuracy')
+    parser.add_argument('--seed', default=0, type=int)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    policy_net = None
+    if args.checkpoint is not None:
+        from benchmark.gnnutils import load_policy_net
+        policy_net = load_policy_net(args.checkpoint, 'cpu')
+
+    import torch
+    from benchmark.gnnutils import build_state_graph
+
+    print('%6s %-8s %10s %9s %10s %11s %10s %8s'
+          % ('tasks', 'mode', 'edges', 'fidelity', 'build_ms', 'forward_ms',
+             'agreement', 'q_dev'))
+    for num_tasks in args.tasks:
+        stats = {mode: {'edges': [], 'fidelity': [], 'build': [], 'forward': [],
+                        'agree': [], 'q_dev': []} for mode in MODES}
+        for _ in range(args.instances):
+            instance = sample_feasible(rng, num_tasks, args.robots, args.map_width)
+            envs = {mode: SchedulingEnv.from_arrays(**instance, temporal_edges=mode,
+                                                    temporal_k=args.topk)
+                    for mode in MODES}
+            if not hasattr(envs['full'], 'halfDG'):
+                continue
+
+            for step in range(args.states):
+                q_full = None
+                for mode in MODES:
+                    env = envs[mode]
+                    st = stats[mode]
+                    st['edges'].append(env.halfDG.number_of_edges())
+                    st['fidelity'].append(distance_fidelity(env))
+
+                    unsch_tasks = np.flatnonzero(env.get_unscheduled_mask()) + 1
+                    start_t = time.perf_counter()
+                    g, feat_dict = build_state_graph(env, 0, unsch_tasks, args.map_width,
+                                                     1.0, 'cpu')
+                    st['build'].append(time.perf_counter() - start_t)
+
+                    if policy_net is not None:
+                        # Q values of robot 0 over the unscheduled tasks
+                        start_t = time.perf_counter()
+                        with torch.no_grad():
+                            q = policy_net(g, feat_dict)['value'].numpy().ravel()
+                        st['forward'].append(time.perf_counter() - start_t)
+                        if mode == 'full':
+                            q_full = q
+                        st['agree'].append(np.argmax(q) == np.argmax(q_full))
+                        st['q_dev'].append(np.abs(q - q_full).mean())
+
+                # same insertion on every env: earliest start, round robin robots
+                est = np.where(envs['full'].get_unscheduled_mask(),
+                               envs['full'].get_earliest_start_times(), np.inf)
+                ti = int(np.argmin(est)) + 1
+                results = [envs[mode].insert_robot(ti, step % args.robots) for mode in MODES]
+                if not all(rt for rt, _, done in results) or results[0][2]:
+                    break
+
+        for mode in MODES:
+            st = stats[mode]
+            mean = lambda x, scale=1.0: np.mean(x) * scale if len(x) > 0 else np.nan
+            print('%6d %-8s %10.1f %9.4f %10.3f %11.3f %10.3f %8.4f'
+                  % (num_tasks, mode, mean(st['edges']), mean(st['fidelity']),
+                     mean(st['build'], 1000), mean(st['forward'], 1000),
+                     mean(st['agree']), mean(st['q_dev'])))
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 26 09:52:14 2026
+
+Non-blocking checkpointing for the training loop
+    CheckpointWriter: background thread writing torch/pickle files
+        atomically (temp file in the same folder + os.replace), so a crash
+        never leaves a half-written checkpoint; the caller hands over CPU
+        copies (to_cpu) and keeps training while they are written
+    LossLog: append-only text file of 'step loss' lines, so checkpoints
+        no longer carry the whole loss history
+
+Usage
+    writer = CheckpointWriter()
+    writer.save_torch(to_cpu({'policy_net_state_dict': net.state_dict()}), path)
+    writer.close()    # waits for pending writes, raises a failed write
+"""
+
+import os
+import pickle
+import queue
+import tempfile
+import threading
+
+import numpy as np
+import torch
+
+'''
+Copy of a (nested) state dict with every tensor cloned to CPU
+    later in-place updates of the model/optimizer do not reach the copy
+'''
+def to_cpu(obj):
+    if torch.is_tensor(obj):
+        return obj.detach().to('cpu', copy=True)
+    if isinstance(obj, dict):
+        return type(obj)((k, to_cpu(v)) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(to_cpu(v) for v in obj)
+    return obj
+
+'''
+Write a file through write_fn(obj, file object) to a temp file next to
+    path, then move it into place; missing folders are created
+    mode: permissions of the file (mkstemp creates 0600 files)
+'''
+def atomic_write(obj, path, write_fn, mode=0o644):
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix='.' + os.path.basename(path),
+                                    suffix='.tmp')
+    try:
+        # fdopen first, the file object closes fd on every path
+        with os.fdopen(fd, 'wb') as f:
+            os.fchmod(f.fileno(), mode)
+            write_fn(obj, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class CheckpointWriter(object):
+    '''
+    max_pending: writes queued at most, save_* blocks beyond that so
+        CPU copies cannot pile up when the disk is slower than training
+    '''
+    def __init__(self, max_pending=2):
+        self.queue = queue.Queue(max_pending)
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                obj, path, write_fn, done_msg = item
+                atomic_write(obj, path, write_fn)
+                if done_msg is not None:
+                    print(done_msg)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.queue.task_done()
+
+    def check(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def save_torch(self, obj, path, done_msg=None):
+        self.check()
+        self.queue.put((obj, path, torch.save, done_msg))
+
+    def save_pickle(self, obj, path, done_msg=None):
+        self.check()
+        self.queue.put((obj, path, pickle.dump, done_msg))
+
+    '''
+    Block until every queued write is on disk
+    '''
+    def wait(self):
+        self.queue.join()
+        self.check()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        self.check()
+
+class LossLog(object):
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.f = open(path, 'a')
+
+    def append(self, step, loss):
+        self.f.write('%d %.8g\n' % (step, loss))
+
+    def flush(self):
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+'''
+Read a LossLog file
+    steps repeated after resuming from an earlier checkpoint keep the
+    last value written
+Return
+    steps, losses sorted by step
+'''
+def load_loss_history(path):
+    data = np.loadtxt(path, ndmin=2)
+    history = dict(zip(data[:, 0].astype(np.int64), data[:, 1]))
+    steps = np.array(sorted(history), dtype=np.int64)
+    return steps, np.array([history[k] for k in steps])
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 15:46:09 2026
+
+Synthetic instance generator
+    samples problems with controlled task/robot counts and deadline/wait
+    density, screens them for feasibility and streams the accepted ones
+    into a packed binary file (see packed.py) from a process pool
+
+Screening
+    stn: initial STN consistency with a vectorized Bellman-Ford (fast)
+    edf: additionally require the EDF v1 baseline to find a schedule
+
+Usage
+    python generator.py --output gen/r2t20.pack --num 100000 --tasks 20 20
+        --robots 2 2 --map-width 2 --processes 16
+    python generator.py --format txt --output gen/r2t20_001 --num 1000 ...
+        (legacy _dur/_ddl/_wait/_loc text files, numbered from 00001)
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import time
+
+import numpy as np
+
+from packed import PackedWriter, write_instance
+from stn import is_consistent
+
+'''
+Sample one instance
+    params: dict with the keys of default_params()
+Return
+    dict of dur (N, R), ddl (k, 2), wait (m, 3), loc (N, 2) int32 arrays
+'''
+def sample_instance(rng, params):
+    num_tasks = int(rng.integers(params['tasks'][0], params['tasks'][1] + 1))
+    num_robots = int(rng.integers(params['robots'][0], params['robots'][1] + 1))
+
+    dur = rng.integers(params['dur'][0], params['dur'][1] + 1, size=(num_tasks, num_robots))
+
+    # deadlines on distinct tasks, scaled with the number of tasks
+    num_ddl = int(round(params['deadline_density'] * num_tasks))
+    ddl_tasks = rng.choice(num_tasks, num_ddl, replace=False) + 1
+    lo, hi = params['deadline_factor']
+    ddl_values = rng.integers(int(lo * num_tasks), int(hi * num_tasks) + 1, size=num_ddl)
+    ddl = np.stack([ddl_tasks, ddl_values], axis=1)
+
+    # wait constraints on distinct ordered pairs (ti, tj), ti != tj
+    num_wait = int(round(params['wait_density'] * num_tasks))
+    pairs = rng.choice(num_tasks * (num_tasks - 1), num_wait, replace=False)
+    ti = pairs // (num_tasks - 1)
+    tj = pairs % (num_tasks - 1)
+    tj = tj + (tj >= ti)
+    wait = np.stack([ti + 1, tj + 1,
+                     rng.integers(1, params['wait_max'] + 1, size=num_wait)], axis=1)
+
+    loc = rng.integers(1, params['map_width'] + 1, size=(num_tasks, 2))
+
+    return {'dur': dur.astype(np.int32), 'ddl': ddl.astype(np.int32),
+            'wait': wait.astype(np.int32), 'loc': loc.astype(np.int32)}
+
+def default_params():
+    return {'tasks': (20, 20), 'robots': (2, 2), 'map_width': 2,
+            'dur': (1, 10), 'deadline_density': 0.1, 'deadline_factor': (1.0, 2.0),
+            'wait_density': 0.25, 'wait_max': 10, 'screen': 'stn'}
+
+def accept(instance, screen):
+    if not is_consistent(instance['dur'], instance['ddl'], instance['wait']):
+        return False
+    if screen == 'edf':
+        from benchmark.edf import edf_schedule
+        from utils import SchedulingEnv
+        env = SchedulingEnv.from_arrays(**instance)
+        feasible, _, _ = edf_schedule(env, 'v1')
+        return feasible
+    return True
+
+'''
+Write an instance in the legacy four text file layout
+'''
+def write_instance_txt(fname, instance):
+    for key in ['dur', 'ddl', 'wait', 'loc']:
+        np.savetxt(fname + '_%s.txt' % key, instance[key], fmt='%d')
+
+'''
+Worker: generate count accepted instances
+    job: (seed sequence, count, params)
+Return
+    list of accepted instances, number of sampled instances
+'''
+def generate_chunk(job):
+    seed, count, params = job
+    rng = np.random.default_rng(seed)
+    instances = []
+    attempts = 0
+    while len(instances) < count:
+        attempts += 1
+        instance = sample_instance(rng, params)
+        if accept(instance, params['screen']):
+            instances.append(instance)
+        if attempts >= params['max_attempts'] * count:
+            break
+    return instances, attempts
+
+if __name__ == '__main__':
+    defaults = default_params()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output', default='./gen/instances.pack', type=str)
+    parser.add_argument('--format', default='packed', choices=['packed', 'txt'])
+    parser.add_argument('--num', default=1000, type=int)
+    parser.add_argument('--tasks', nargs=2, default=defaults['tasks'], type=int)
+    parser.add_argument('--robots', nargs=2, default=defaults['robots'], type=int)
+    parser.add_argument('--map-width', default=defaults['map_width'], type=int)
+    parser.add_argument('--dur', nargs=2, default=defaults['dur'], type=int)
+    parser.add_argument('--deadline-density', default=defaults['deadline_density'], type=float)
+    parser.add_argument('--deadline-factor', nargs=2, default=defaults['deadline_factor'],
+                        type=float)
+    parser.add_argument('--wait-density', default=defaults['wait_density'], type=float)
+    parser.add_argument('--wait-max', default=defaults['wait_max'], type=int)
+    parser.add_argument('--screen', default=defaults['screen'], choices=['stn', 'edf'])
+    parser.add_argument('--max-attempts', default=100, type=int,
+                        help='give up after this many samples per requested instance')
+    parser.add_argument('--processes', default=os.cpu_count(), type=int)
+    parser.add_argument('--chunk-size', default=1000, type=int)
+    parser.add_argument('--seed', default=0, type=int)
+    args = parser.parse_args()
+
+    params = {'tasks': tuple(args.tasks), 'robots': tuple(args.robots),
+              'map_width': args.map_width, 'dur': tuple(args.dur),
+              'deadline_density': args.deadline_density,
+              'deadline_factor': tuple(args.deadline_factor),
+              'wait_density': args.wait_density, 'wait_max': args.wait_max,
+              'screen': args.screen, 'max_attempts': args.max_attempts}
+
+    counts = [args.chunk_size] * (args.num // args.chunk_size)
+    if args.num % args.chunk_size > 0:
+        counts.append(args.num % args.chunk_size)
+    seeds = np.random.SeedSequence(args.seed).spawn(len(counts))
+    jobs = [(seed, count, params) for seed, count in zip(seeds, counts)]
+
+    out_dir = os.path.dirname(args.output) if args.format == 'packed' else args.output
+    if out_dir and not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    writer = PackedWriter(args.output) if args.format == 'packed' else None
+
+    written = 0
+    sampled = 0
+    start_t = time.time()
+    with mp.Pool(args.processes) as pool:
+        # chunks arrive in order, so instance numbers are reproducible
+        for instances, attempts in pool.imap(generate_chunk, jobs):
+            sampled += attempts
+            for instance in instances:
+                written += 1
+                if writer is not None:
+                    write_instance(writer, written, **instance)
+                else:
+                    write_instance_txt(args.output + '/%05d' % written, instance)
+            elapsed = time.time() - start_t
+            print('Generated {}/{}, acceptance {:.3f}, {:.1f} instances/s'
+                  .format(written, args.num, written / sampled, written / elapsed), end='\r')
+    if writer is not None:
+        writer.close()
+
+    print('')
+    print('Done: {} instances written to {} in {:.2f} s'
+          .format(written, args.output, time.time() - start_t))
@@ -21,6 +21,8 @@ import torch.nn.functional as F
 
 import dgl.function as fn
 
+import instrument
+
 # in_dim: dict of input feature dimension for each node
 # out_dim: dict of output feature dimension for each node
 # cetypes: reutrn of G.canonical_etypes
@@ -284,6 +286,7 @@ class HeteroGATLayer(nn.Module):
     '''
     Main forward pass
     '''
+    @instrument.timed('model.gat_layer')
     def forward(self, g, feat_dict):
         '''
         Equation (1) for each relation type
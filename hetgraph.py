@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Oct 23 10:12:45 2026
+
+HetGraph construction for ScheduleNet
+    build_hetgraph / hetgraph_node_helper, moved out of utils.py so that
+    the env and the EDF baselines do not import dgl and torch
+"""
+
+from collections import Counter
+
+import dgl
+import numpy as np
+import torch
+
+import instrument
+
+
+# (map_width, loc_dist_threshold) -> (src, dst) of the 'near' relation
+_loc_near_cache = {}
+
+def loc_near_edges(map_width, loc_dist_threshold):
+    """
+    Edges between locations within loc_dist_threshold, self-loops included
+    Computed once per (map_width, loc_dist_threshold) from the grid stencil
+    of offsets within the threshold, O(L) for L locations, and shared as
+    index tensors by all graphs built afterwards
+    """
+    key = (map_width, loc_dist_threshold)
+    if key not in _loc_near_cache:
+        r = int(np.floor(loc_dist_threshold))
+        x, y = np.meshgrid(np.arange(map_width), np.arange(map_width))
+        x, y = x.ravel(), y.ravel()
+        src, dst = [], []
+        for dx in range(-r, r + 1):
+            for dy in range(-r, r + 1):
+                if dx * dx + dy * dy > loc_dist_threshold ** 2:
+                    continue
+                valid = (x + dx >= 0) & (x + dx < map_width) & (y + dy >= 0) & (y + dy < map_width)
+                # serialized as y * width + x, same as the located_in edges
+                src.append((y * map_width + x)[valid])
+                dst.append(((y + dy) * map_width + x + dx)[valid])
+        _loc_near_cache[key] = (torch.from_numpy(np.concatenate(src)).long(),
+                                torch.from_numpy(np.concatenate(dst)).long())
+    return _loc_near_cache[key]
+
+@instrument.timed('hetgraph.build')
+def build_hetgraph(halfDG, num_tasks, num_robots, dur, map_width, locs, loc_dist_threshold,
+                   partials, unsch_tasks, selected_robot, valid_tasks):
+    """
+    Helper function for building HetGraph
+    Q nodes are built w.r.t selected_robot & unsch_tasks
+        valid_tasks: available tasks filtered from unsch_tasks
+        
+    Args:
+        loc_dist_threshold: Distance threshold for two locations to be connected by an edge
+    """
+
+    num_locs = map_width * map_width
+    num_values = len(valid_tasks)
+    
+    num_nodes_dict = {'task': num_tasks + 2,
+                      'loc': num_locs,
+                      'robot': num_robots,
+                      'state': 1,
+                      'value': num_values}
+
+    # Serializing [x, y] locations to 1D array
+    # E.g. [1, 1] => 0 * width + 0 = 0
+    #      [2, 1] => 0 * width + 1 = 1
+    serialized_locs = [(locs[i, 1] - 1) * map_width + locs[i, 0] - 1 for i in range(locs.shape[0])]
+
+    # Sort the nodes and assign an index to each one
+    task_name_to_idx = {node: idx for idx, node in enumerate(sorted(halfDG.nodes))}
+    task_edge_to_idx = {(from_node, to_node): idx for idx, (from_node, to_node) in enumerate(halfDG.edges)}
+
+    # List of (task id, robot id) tuples
+    task_to_robot_data = []
+
+    for rj in range(num_robots):
+        # add f0
+        task_to_robot_data.append((0, rj))
+        # add si (including s0)
+        for i in range(len(partials[rj])):
+            ti = partials[rj][i].item()
+            task_id = ti + 1
+            task_to_robot_data.append((task_id, rj))
+
+    unsch_task_to_robot = []
+    for rj in range(num_robots):
+        for t in unsch_tasks:
+            task_id = t + 1
+            unsch_task_to_robot.append((task_id, rj))
+
+    robot_com_data = [(i, j) for i in range(num_robots) for j in range(num_robots)]
+
+    data_dict = {
+        ('task', 'temporal', 'task'): (
+            # Convert named edges to indexes
+            [task_name_to_idx[from_node] for from_node, _ in halfDG.edges],
+            [task_name_to_idx[to_node] for _, to_node in halfDG.edges],
+        ),
+        ('task', 'located_in', 'loc'): (
+            list(range(2, num_tasks + 2)),
+            serialized_locs,
+        ),
+        ('loc', 'near', 'loc'): loc_near_edges(map_width, loc_dist_threshold),
+        ('task', 'assigned_to', 'robot'): (
+            [task for task, _ in task_to_robot_data],
+            [robot for _, robot in task_to_robot_data],
+        ),
+        ('task', 'take_time', 'robot'): (
+            [task for task, _ in unsch_task_to_robot],
+            [robot for _, robot in unsch_task_to_robot],
+        ),
+        ('robot', 'use_time', 'task'): (
+            [robot for _, robot in unsch_task_to_robot],
+            [task for task, _ in unsch_task_to_robot],
+        ),
+        ('robot', 'com', 'robot'): (
+            [i for i, _ in robot_com_data],
+            [j for _, j in robot_com_data],
+        ),
+        # 4. Add graph summary nodes
+        # [task] — [in] — [state]
+        ('task', 'tin', 'state'): (
+            list(range(num_tasks + 2)),
+            np.zeros(num_tasks + 2, dtype=np.int64),
+        ),
+        # [loc] — [in] — [state]
+        ('loc', 'lin', 'state'): (
+            list(range(num_locs)),
+            np.zeros(num_locs, dtype=np.int64),
+        ),
+        # [robot] — [in] — [state]
+        ('robot', 'rin', 'state'): (
+            list(range(num_robots)),
+            np.zeros(num_robots, dtype=np.int64),
+        ),
+        # [state] — [in] — [state] self-loop
+        ('state', 'sin', 'state'): (
+            [0],
+            [0],
+        ),
+        # 5.1 Q value node
+        # [task] — [to] — [value]
+        ('task', 'tto', 'value'): (
+            valid_tasks + 1,
+            list(range(num_values)),
+        ),
+        # [robot] — [to] — [value]
+        ('robot', 'rto', 'value'): (
+            np.full(num_values, selected_robot, dtype=np.int64),
+            list(range(num_values)),
+        ),
+        # [state] — [to] — [value]
+        ('state', 'sto', 'value'): (
+            np.zeros(num_values, dtype=np.int64),
+            list(range(num_values)),
+        ),
+        # [value] — [to] — [value] self-loop
+        ('value', 'vto', 'value'): (
+            list(range(num_values)),
+            list(range(num_values)),
+        ),
+    }
+
+    graph = dgl.heterograph(data_dict, num_nodes_dict=num_nodes_dict, idtype=torch.int64)
+
+    # Store data of edges by index, as DiGraph.edges.data does not guarantee to have exactly the same
+    # ordering as Digraph.edges
+    temporal_edge_weights = torch.zeros((len(halfDG.edges), 1), dtype=torch.float32)
+    # Unpack indexes of edge weights
+    weights_idx = [task_edge_to_idx[from_node, to_node] for from_node, to_node, _ in halfDG.edges.data('weight')]
+    # Put weights in tensor according to their indexes
+    temporal_edge_weights[weights_idx, :] = torch.tensor([[weight] for _, _, weight in halfDG.edges.data('weight')],
+                                                      dtype=torch.float32)
+    graph.edges['temporal'].data['weight'] = temporal_edge_weights
+
+    takes_time_weight = torch.zeros((len(unsch_task_to_robot), 1), dtype=torch.float32)
+    for idx, (task, robot) in enumerate(unsch_task_to_robot):
+        # Subtract 2 because task 1's node id is 2, but has index 0 in dur
+        takes_time_weight[idx] = dur[task - 2, robot]
+    graph.edges['take_time'].data['t'] = takes_time_weight
+    # Ordering of takes_time and uses_time edges are exactly the same
+    graph.edges['use_time'].data['t'] = takes_time_weight.detach().clone()
+
+    return graph
+
+@instrument.timed('hetgraph.features')
+def hetgraph_node_helper(number_of_nodes, curr_partialw, curr_partials,
+                         locations, durations, map_width, num_robots, num_values):
+    """
+    Generate initial node features for hetgraph
+    The input of hetgraph is a dictionary of node features for each type
+        number_of_nodes: numer of nodes in half distance graph (halfDG)
+        curr_partialw: partial solution/whole
+        curr_partials: partial solution/seperate
+        locations: np array locations
+        durations: np array task durations
+        map_width: map grid size
+        num_robots: number of robots
+        num_values: number of actions / Q values
+    Return
+        feat_dict: node features stored in a dict
+    """
+    feat_dict = {}
+    num_locations = map_width * map_width
+
+    # Task features.
+    # For scheduled tasks, the feature is [1 0 dur 0 dur 0]
+    # For unscheduled ones, the feature is [0 1 min max-min mean std]
+    feat_dict['task'] = np.zeros((number_of_nodes, 6))
+
+    max_dur, min_dur = durations.max(axis=1), durations.min(axis=1)
+    mean_dur, std_dur = durations.mean(axis=1), durations.std(axis=1)
+
+    # f0
+    feat_dict['task'][0, 0] = 1
+
+    # s0~si. s0 has index 1
+    scheduled = np.zeros(number_of_nodes - 1, dtype=bool)
+    scheduled[np.asarray(curr_partialw, dtype=np.int64)] = True
+    robot = np.zeros(number_of_nodes - 1, dtype=np.int64)
+    for j in range(num_robots):
+        robot[np.asarray(curr_partials[j], dtype=np.int64)] = j
+
+    sch_tasks = np.flatnonzero(scheduled[1:]) + 1
+    unsch_tasks = np.flatnonzero(~scheduled[1:]) + 1
+    feat_dict['task'][1, 0] = 1
+    feat_dict['task'][sch_tasks + 1, 0] = 1
+    sch_dur = durations[sch_tasks - 1, robot[sch_tasks]]
+    feat_dict['task'][sch_tasks + 1, 2] = sch_dur
+    feat_dict['task'][sch_tasks + 1, 4] = sch_dur
+    feat_dict['task'][unsch_tasks + 1] = np.stack(
+        [np.zeros(len(unsch_tasks)), np.ones(len(unsch_tasks)),
+         min_dur[unsch_tasks - 1], max_dur[unsch_tasks - 1] - min_dur[unsch_tasks - 1],
+         mean_dur[unsch_tasks - 1], std_dur[unsch_tasks - 1]], axis=1)
+    
+    # [loc]
+    feat_dict['loc'] = np.zeros((num_locations, 1))
+    serialized_locs = [(locations[i, 1] - 1) * map_width + locations[i, 0] - 1 for i in range(locations.shape[0])]
+    loc_counter = Counter(serialized_locs)
+    for i in range(num_locations):
+        # number of tasks in location
+        feat_dict['loc'][i, 0] = loc_counter[i]
+    
+    # [robot]
+    feat_dict['robot'] = np.zeros((num_robots, 1))
+    for i in range(num_robots):
+        # number of tasks assigned so far
+        # including s0
+        feat_dict['robot'][i, 0] = len(curr_partials[i])
+    
+    # [state]
+    feat_dict['state'] = np.array((number_of_nodes-1, len(curr_partialw),
+                                   num_locations, num_robots)).reshape(1,4)
+    
+    # [value]
+    feat_dict['value'] = np.zeros((num_values, 1))
+
+    return feat_dict
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 09:18:52 2026
+
+Lightweight instrumentation for the hot paths
+    named timers and counters, aggregated into per-phase histograms,
+    with an optional Chrome trace (chrome://tracing, Perfetto)
+
+Off by default. Turn on with the environment variable MRC_PROFILE=1
+(MRC_PROFILE=trace also records trace events) or by calling enable().
+When disabled, timer() returns a shared no-op context manager.
+
+Usage
+    import instrument
+    with instrument.timer('env.apsp'):
+        ...
+    instrument.count('env.edges_added', n)
+    instrument.report()
+    instrument.save_chrome_trace('trace.json')
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+_profile_env = os.environ.get('MRC_PROFILE', '0')
+_enabled = _profile_env not in ('', '0')
+_trace = _profile_env == 'trace'
+# cap on stored trace events, so long runs do not grow without bound
+_max_trace_events = 1000000
+
+_durations = defaultdict(list)
+_counters = defaultdict(int)
+_trace_events = []
+_t0 = time.perf_counter()
+_null_timer = contextlib.nullcontext()
+
+def enable(trace=False, max_trace_events=1000000):
+    global _enabled, _trace, _max_trace_events
+    _enabled = True
+    _trace = trace
+    _max_trace_events = max_trace_events
+
+def disable():
+    global _enabled, _trace
+    _enabled = False
+    _trace = False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    _durations.clear()
+    _counters.clear()
+    del _trace_events[:]
+
+@contextlib.contextmanager
+def _timer(name):
+    start_t = time.perf_counter()
+    try:
+        yield
+    finally:
+        end_t = time.perf_counter()
+        _durations[name].append(end_t - start_t)
+        if _trace and len(_trace_events) < _max_trace_events:
+            _trace_events.append({'name': name, 'ph': 'X', 'pid': os.getpid(),
+                                  'tid': threading.get_ident(),
+                                  'ts': (start_t - _t0) * 1e6,
+                                  'dur': (end_t - start_t) * 1e6})
+
+'''
+Context manager timing the enclosed block under name
+'''
+def timer(name):
+    if not _enabled:
+        return _null_timer
+    return _timer(name)
+
+'''
+Decorator timing every call of a function under name
+'''
+def timed(name):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+'''
+Add n to counter name
+'''
+def count(name, n=1):
+    if _enabled:
+        _counters[name] += n
+
+'''
+Aggregate all timers and counters
+    each timer reports call count, total/mean/percentiles in ms and a
+    histogram with power-of-two buckets in microseconds:
+        bucket '2^k' counts calls taking [2^k, 2^(k+1)) us
+'''
+def summary():
+    timers = {}
+    for name, durations in _durations.items():
+        d = np.array(durations)
+        buckets = np.floor(np.log2(np.maximum(d * 1e6, 1.0))).astype(np.int64)
+        values, counts = np.unique(buckets, return_counts=True)
+        p50, p90, p99 = np.percentile(d, [50, 90, 99]) * 1000
+        timers[name] = {'calls': len(d),
+                        'total_ms': d.sum() * 1000,
+                        'mean_ms': d.mean() * 1000,
+                        'p50_ms': p50, 'p90_ms': p90, 'p99_ms': p99,
+                        'max_ms': d.max() * 1000,
+                        'histogram_us': {'2^%d' % v: int(c) for v, c in zip(values, counts)}}
+    return {'timers': timers, 'counters': dict(_counters)}
+
+'''
+Print timers sorted by total time, then counters
+'''
+def report():
+    stats = summary()
+    if len(stats['timers']) > 0:
+        print('%-28s %8s %12s %10s %10s %10s' % ('timer', 'calls', 'total ms',
+                                                'mean ms', 'p50 ms', 'p99 ms'))
+    for name, t in sorted(stats['timers'].items(), key=lambda x: -x[1]['total_ms']):
+        print('%-28s %8d %12.2f %10.4f %10.4f %10.4f'
+              % (name, t['calls'], t['total_ms'], t['mean_ms'], t['p50_ms'], t['p99_ms']))
+    for name, n in sorted(stats['counters'].items()):
+        print('%-28s %8d' % (name, n))
+
+def save(path):
+    with open(path, 'w') as f:
+        json.dump(summary(), f, indent=2)
+
+def save_chrome_trace(path):
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': _trace_events, 'displayTimeUnit': 'ms'}, f)
@@ -5,6 +5,12 @@ Created on Fri Nov  8 13:47:42 2019
 @author: pheno
 
 Supervised training
+    --world-size N trains data-parallel on N CPU processes (gloo),
+    --scaling 1 2 4 8 reports the scaling efficiency
+    checkpoints are written in the background (checkpoint.py), losses go
+    to <cpsave>/loss_history.txt
+    --lazy-replay keeps demonstrations as action sequences and rebuilds
+    sampled states (utils.LazyReplayMemory)
 """
 
 import copy
@@ -13,29 +19,44 @@ import pickle
 import time
 import argparse
 
+import dgl
 import numpy as np
 import torch
+import torch.distributed as dist
 import torch.nn.functional as F
+from torch.nn.parallel import DistributedDataParallel as DDP
 from torch.optim.lr_scheduler import ReduceLROnPlateau
 
+import instrument
+from checkpoint import CheckpointWriter, LossLog, to_cpu
 from hetnet import ScheduleNet4Layer
-from utils import ReplayMemory, Transition, action_helper_rollout
-from utils import SchedulingEnv, hetgraph_node_helper, build_hetgraph
+from utils import ReplayMemory, PrioritizedReplayMemory, LazyReplayMemory, Transition
+from utils import action_helper_rollout
+from utils import SchedulingEnv
+from hetgraph import hetgraph_node_helper, build_hetgraph
 
 '''
 Fill memory buffer with demonstration data set
     use minDG
+    memory: buffer to fill, a new ReplayMemory is created if None
+        a LazyReplayMemory only gets the episodes (instance arrays and
+        actions, keyed by instance file name) and one (instance, step,
+        reward_n) record per transition
+    temporal_edges, temporal_k: halfDG options of SchedulingEnv
 '''
-def fill_demo_data(folder, start_no, end_no, gamma_d):
-    memory = ReplayMemory(1000*20)
+def fill_demo_data(folder, start_no, end_no, gamma_d, memory=None,
+                   temporal_edges='full', temporal_k=8):
+    if memory is None:
+        memory = ReplayMemory(1000*20)
 
+    lazy = isinstance(memory, LazyReplayMemory)
     total_no = end_no - start_no + 1
     gurobi_count = 0
     
     for graph_no in range(start_no, end_no+1):
         print('Loading.. {}/{}'.format(graph_no, total_no), end='\r')
         fname = folder + '/%05d' % graph_no
-        env = SchedulingEnv(fname)
+        env = SchedulingEnv(fname, temporal_edges, temporal_k)
 
         # check if the graph is feasible for Gurobi
         solname = folder + 'v9/%05d' % graph_no
@@ -66,9 +87,10 @@ def fill_demo_data(folder, start_no, end_no, gamma_d):
         rewards = []
         terminates = []
         
-        state_graphs.append(copy.deepcopy(env.halfDG))
-        partials.append(copy.deepcopy(env.partials))
-        partialw.append(copy.deepcopy(env.partialw))
+        if not lazy:
+            state_graphs.append(copy.deepcopy(env.halfDG))
+            partials.append(copy.deepcopy(env.partials))
+            partialw.append(copy.deepcopy(env.partialw))
         terminates.append(False)
 
         for i in range(env.num_tasks):
@@ -84,9 +106,10 @@ def fill_demo_data(folder, start_no, end_no, gamma_d):
             rt, reward, done = env.insert_robot(act_chosen, rj)
             #print(rt, reward, done, env.min_makespan)
             
-            state_graphs.append(copy.deepcopy(env.halfDG))
-            partials.append(copy.deepcopy(env.partials))
-            partialw.append(copy.deepcopy(env.partialw))
+            if not lazy:
+                state_graphs.append(copy.deepcopy(env.halfDG))
+                partials.append(copy.deepcopy(env.partials))
+                partialw.append(copy.deepcopy(env.partialw))
             actions_task.append(act_chosen)
             actions_robot.append(rj)
             rewards.append(reward)
@@ -95,16 +118,23 @@ def fill_demo_data(folder, start_no, end_no, gamma_d):
         '''
         save transitions into memory buffer
         '''
+        if lazy:
+            memory.add_episode(fname, env.dur, env.ddl, env.wait, env.loc,
+                               actions_task, actions_robot, terminates)
         for t in range(env.num_tasks):
+            # calculate discounted reward
+            reward_n = 0.0
+            for j in range(t, env.num_tasks):
+                reward_n += (gamma_d**(j-t)) * rewards[j]
+            if lazy:
+                memory.push(fname, t, reward_n)
+                continue
+
             curr_g = copy.deepcopy(state_graphs[t])
             curr_partials = copy.deepcopy(partials[t])
             curr_partialw = copy.deepcopy(partialw[t])
             act_task = actions_task[t]
             act_robot = actions_robot[t]
-            # calculate discounted reward
-            reward_n = 0.0
-            for j in range(t, env.num_tasks):
-                reward_n += (gamma_d**(j-t)) * rewards[j]
             next_g = copy.deepcopy(state_graphs[t+1])
             next_partials = copy.deepcopy(partials[t+1])
             next_partialw = copy.deepcopy(partialw[t+1])
@@ -123,26 +153,166 @@ def fill_demo_data(folder, start_no, end_no, gamma_d):
     print('Memory buffer size: {}'.format(len(memory)))
     return memory
     
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--cpu', default=False, action='store_true')
-    parser.add_argument('--path-to-train', default='./gen/r2t20_001', type=str)
-    parser.add_argument('--num-robots', default=2, type=int)
-    parser.add_argument('--train-start-no', default=1, type=int)
-    parser.add_argument('--train-end-no', default=1000, type=int)
-    parser.add_argument('--steps', default=30000, type=int)
-    parser.add_argument('--gamma', default=0.99, type=float)
-    parser.add_argument('--batch-size', default=8, type=int)
-    parser.add_argument('--lr', default=1e-4, type=float)
-    parser.add_argument('--weight-decay', default=1e-5, type=float)
-    parser.add_argument('--resume-training', default=False, action='store_true')
-    parser.add_argument('--path-to-checkpoint', default='./sltrain02/checkpoint_07000.tar', type=str)
-    parser.add_argument('--load-memory', default=False, action='store_true')
-    parser.add_argument('--path-to-replay-buffer', default='./buffer/buffer_half_C3.pkl', type=str)
-    parser.add_argument('--checkpoint-interval', default=1000, type=int)
-    parser.add_argument('--save-replay-buffer-to', default=None, type=str)
-    parser.add_argument('--cpsave', default='./cp', type=str)
-    args = parser.parse_args()
+in_dim = {'task': 6,
+          'loc': 1,
+          'robot': 1,
+          'state': 4,
+          'value': 1
+          }
+
+hid_dim = {'task': 64,
+           'loc': 64,
+           'robot': 64,
+           'state': 64,
+           'value': 64
+           }
+
+out_dim = {'task': 32,
+           'loc': 32,
+           'robot': 32,
+           'state': 32,
+           'value': 1
+           }
+
+cetypes = [('task', 'temporal', 'task'),
+           ('task', 'located_in', 'loc'), ('loc', 'near', 'loc'),
+           ('task', 'assigned_to', 'robot'), ('robot', 'com', 'robot'),
+           ('task', 'tin', 'state'), ('loc', 'lin', 'state'),
+           ('robot', 'rin', 'state'), ('state', 'sin', 'state'),
+           ('task', 'tto', 'value'), ('robot', 'rto', 'value'),
+           ('state', 'sto', 'value'), ('value', 'vto', 'value'),
+           ('task', 'take_time', 'robot'), ('robot', 'use_time', 'task')]
+
+num_heads = 8
+map_width = 2
+loc_dist_threshold = 1
+
+'''
+Runs the policy net once on the dgl.batch of a batch of HetGraphs
+    so that DistributedDataParallel sees a single forward per step
+Return
+    Q values of all graphs concatenated in batch order, (sum of actions, 1)
+'''
+class BatchForward(torch.nn.Module):
+    def __init__(self, policy_net):
+        super(BatchForward, self).__init__()
+        self.policy_net = policy_net
+
+    def forward(self, graphs, feat_dicts):
+        batched_g = dgl.batch(graphs)
+        # dgl.batch stacks the nodes of each type in graph order
+        feat_dict = {ntype: torch.cat([f[ntype] for f in feat_dicts])
+                     for ntype in feat_dicts[0]}
+        return self.policy_net(batched_g, feat_dict)['value']
+
+'''
+HetGraphs and input features of sampled transitions
+Return
+    graphs, feature dicts, unscheduled tasks of each transition
+'''
+def build_batch_graphs(batch, num_robots, device):
+    graphs = []
+    feat_dicts = []
+    unsch_list = []
+    for i in range(len(batch.curr_g)):
+        num_tasks = batch.curr_g[i].number_of_nodes() - 2
+        unsch_tasks = np.array(action_helper_rollout(num_tasks, batch.curr_partialw[i]),
+                               dtype=np.int64)
+        
+        with instrument.timer('train.build_graph'):
+            g = build_hetgraph(batch.curr_g[i], num_tasks, num_robots, batch.durs[i],
+                               map_width, np.array(batch.locs[i], dtype=np.int64),
+                               loc_dist_threshold, batch.curr_partials[i], unsch_tasks, 
+                               batch.act_robot[i], unsch_tasks)
+            g = g.to(device)
+        
+        num_actions = len(unsch_tasks)
+        with instrument.timer('train.features'):
+            feat_dict = hetgraph_node_helper(batch.curr_g[i].number_of_nodes(), 
+                                             batch.curr_partialw[i], 
+                                             batch.curr_partials[i],
+                                             batch.locs[i], batch.durs[i], 
+                                             map_width, num_robots, num_actions)
+            
+            feat_dict_tensor = {}
+            for key in feat_dict:
+                feat_dict_tensor[key] = torch.Tensor(feat_dict[key]).to(device)
+
+        graphs.append(g)
+        feat_dicts.append(feat_dict_tensor)
+        unsch_list.append(unsch_tasks)
+    return graphs, feat_dicts, unsch_list
+
+'''
+Calculate TD loss & LfD loss at the same time for a batch of transitions
+    q_pre: Q values of all transitions concatenated, (sum of actions, 1)
+    unsch_list: unscheduled tasks (actions) of each transition, in q_pre order
+    act_task: expert action of each transition
+    Alternative actions are pushed below reward_n - offset with weight
+    0.9/(num_actions-1), the expert action towards reward_n with weight 1.
+    Action metadata goes to the device in one transfer, each action knows
+    its transition through a segment id.
+Return
+    IS weighted mean loss, per-transition losses (detached)
+'''
+def batch_lfd_loss(q_pre, unsch_list, act_task, reward_n, is_weights, device,
+                   offset=5.0):
+    batch_size = len(unsch_list)
+    sizes = np.array([len(unsch_tasks) for unsch_tasks in unsch_list], dtype=np.int64)
+    num_q = int(sizes.sum())
+    meta = np.concatenate([np.concatenate(unsch_list), sizes, act_task, reward_n,
+                           is_weights]).astype(np.float64)
+    meta = torch.from_numpy(meta).to(device)
+    tasks, sizes_t, act_t, reward_t, is_weights_t = torch.split(
+        meta, [num_q, batch_size, batch_size, batch_size, batch_size])
+    sizes_t = sizes_t.long()
+
+    seg = torch.repeat_interleave(torch.arange(batch_size, device=device), sizes_t)
+    pos = torch.arange(num_q, device=device)
+    seg_start = torch.cumsum(sizes_t, 0) - sizes_t
+    
+    # expert mask, the first action stands in when act_task is not among them
+    expert = tasks == act_t[seg]
+    has_expert = torch.zeros(batch_size, device=device).index_add_(0, seg, expert.float()) > 0
+    expert = expert | (~has_expert[seg] & (pos == seg_start[seg]))
+    
+    # q value for alternative actions / expert action
+    alt_target = torch.min(q_pre.detach(), (reward_t - offset).float()[seg].unsqueeze(1))
+    target = torch.where(expert.unsqueeze(1), reward_t.float()[seg].unsqueeze(1), alt_target)
+    
+    # a single action is the expert action
+    alt_weights = (0.9 / (sizes_t - 1).clamp(min=1).double()).float()
+    LfD_weights = torch.where(expert, torch.ones_like(alt_weights[seg]), alt_weights[seg])
+    
+    loss_SL = F.mse_loss(q_pre, target, reduction='none').squeeze(1) * LfD_weights
+    sample_losses = torch.zeros(batch_size, device=device).index_add_(0, seg, loss_SL)
+    loss = (is_weights_t.float() * sample_losses).sum() / batch_size
+    return loss, sample_losses.detach()
+
+'''
+Contiguous share of [start_no, end_no] of one rank
+'''
+def shard_range(start_no, end_no, rank, world_size):
+    bounds = np.linspace(start_no, end_no + 1, world_size + 1).astype(int)
+    return bounds[rank], bounds[rank+1] - 1
+
+'''
+Training loop, run by every process in distributed mode
+    rank 0 prints, checkpoints and profiles; every rank fills its replay
+    memory from its own shard of the training instances (or of a loaded
+    buffer) and builds its own graphs, gradients are all-reduced by
+    DistributedDataParallel (gloo) every step
+    results: queue for the mean step time (after warmup steps) of a
+        scaling run, None otherwise
+'''
+def train(rank, world_size, args, results=None):
+    distributed = world_size > 1
+    is_main = rank == 0
+    if distributed:
+        os.environ.setdefault('MASTER_ADDR', '127.0.0.1')
+        os.environ.setdefault('MASTER_PORT', str(args.master_port))
+        dist.init_process_group('gloo', rank=rank, world_size=world_size)
+        torch.set_num_threads(args.threads_per_process)
 
     resume_training = args.resume_training
     load_memory = args.load_memory
@@ -151,44 +321,19 @@ if __name__ == '__main__':
     BATCH_SIZE = args.batch_size
     total_steps = args.steps
     
-    loss_history = []
-
-    device = torch.device("cpu") if args.cpu else torch.device("cuda")
-
-    in_dim = {'task': 6,
-              'loc': 1,
-              'robot': 1,
-              'state': 4,
-              'value': 1
-              }
-
-    hid_dim = {'task': 64,
-               'loc': 64,
-               'robot': 64,
-               'state': 64,
-               'value': 64
-               }
-
-    out_dim = {'task': 32,
-               'loc': 32,
-               'robot': 32,
-               'state': 32,
-               'value': 1
-               }
-
-    cetypes = [('task', 'temporal', 'task'),
-               ('task', 'located_in', 'loc'), ('loc', 'near', 'loc'),
-               ('task', 'assigned_to', 'robot'), ('robot', 'com', 'robot'),
-               ('task', 'tin', 'state'), ('loc', 'lin', 'state'),
-               ('robot', 'rin', 'state'), ('state', 'sin', 'state'),
-               ('task', 'tto', 'value'), ('robot', 'rto', 'value'),
-               ('state', 'sto', 'value'), ('value', 'vto', 'value'),
-               ('task', 'take_time', 'robot'), ('robot', 'use_time', 'task')]
-    
-    num_heads = 8
+    # checkpoints and buffers are written by a background thread, losses
+    # are appended to a text file instead of being kept in every checkpoint
+    writer = CheckpointWriter()
+    loss_log = None
+    if is_main and results is None:
+        loss_log = LossLog(args.cpsave + '/loss_history.txt')
+
+    if is_main and (args.profile or args.profile_trace is not None):
+        instrument.enable(trace=args.profile_trace is not None)
+
+    # gloo all-reduces CPU tensors
+    device = torch.device("cpu") if args.cpu or distributed else torch.device("cuda")
     num_robots = args.num_robots
-    map_width = 2
-    loc_dist_threshold = 1
     
     policy_net = ScheduleNet4Layer(in_dim, hid_dim, out_dim, cetypes, num_heads).to(device)
     optimizer = torch.optim.Adam(policy_net.parameters(), lr=args.lr, weight_decay=args.weight_decay)
@@ -199,7 +344,7 @@ if __name__ == '__main__':
     
     if resume_training:
         trained_checkpoint = args.path_to_checkpoint
-        cp = torch.load(trained_checkpoint)
+        cp = torch.load(trained_checkpoint, map_location=device)
         policy_net.load_state_dict(cp['policy_net_state_dict'])
         #target_net.load_state_dict(cp['target_net_state_dict'])
         optimizer.load_state_dict(cp['optimizer_state_dict'])
@@ -208,6 +353,11 @@ if __name__ == '__main__':
     else:
         start_step = 1
         training_steps_done = 0
+
+    model = BatchForward(policy_net)
+    if distributed:
+        # relations without edges in a graph leave their parameters unused
+        model = DDP(model, find_unused_parameters=True)
     
     if load_memory:
         # load replay buffer
@@ -215,119 +365,229 @@ if __name__ == '__main__':
         with open(bname, 'rb') as f: # open file with read-mode  
             memory = pickle.load(f) # serialize and save object
         print('Memory loaded, length: %d' % len(memory))
+        lazy = isinstance(memory, LazyReplayMemory)
+        backend = memory.backend if lazy else memory
+        # a buffer saved with(out) --prioritized is re-inserted into the
+        # other kind, sample() of the two returns different tuples
+        if args.prioritized != isinstance(backend, PrioritizedReplayMemory) or distributed:
+            # re-insert, so every transition gets max priority and each
+            # rank keeps its own share
+            transitions = list(backend.memory)[rank::world_size]
+            if args.prioritized:
+                backend = PrioritizedReplayMemory(backend.capacity, args.per_alpha)
+            else:
+                backend = ReplayMemory(backend.capacity)
+            for transition in transitions:
+                backend.store(transition)
+            if lazy:
+                memory.backend = backend
+            else:
+                memory = backend
+        elif args.prioritized and backend.alpha != args.per_alpha:
+            print('Replay buffer alpha %g -> --per-alpha %g' % (backend.alpha, args.per_alpha))
+            backend.set_alpha(args.per_alpha)
+        if lazy:
+            memory.cache_size = args.replay_cache_size
     else:
         folder = args.path_to_train
-        start_no = args.train_start_no
-        end_no = args.train_end_no
-        memory = fill_demo_data(folder, start_no, end_no, GAMMA)
+        start_no, end_no = shard_range(args.train_start_no, args.train_end_no,
+                                       rank, world_size)
+        if args.prioritized:
+            memory = PrioritizedReplayMemory(1000*20, args.per_alpha)
+        else:
+            memory = ReplayMemory(1000*20)
+        if args.lazy_replay:
+            memory = LazyReplayMemory(memory, args.temporal_edges, args.temporal_k,
+                                      args.replay_cache_size)
+        memory = fill_demo_data(folder, start_no, end_no, GAMMA, memory,
+                                args.temporal_edges, args.temporal_k)
     
+    if distributed:
+        print('[rank %d] memory: %d transitions' % (rank, len(memory)))
+        dist.barrier()
     print('Initialization done')
 
     '''
     Training phase
     '''
+    step_times = []
     #transitions = memory.sample(BATCH_SIZE)
     #batch = Transition(*zip(*transitions))
     for i_step in range(start_step, total_steps+1):
         start_t = time.time()
-        policy_net.train()
-        print('training no. %d' % i_step)
+        model.train()
+        if is_main:
+            print('training no. %d' % i_step)
         
-        transitions = memory.sample(BATCH_SIZE)
+        with instrument.timer('train.sample'):
+            if args.prioritized:
+                # anneal importance sampling exponent from per_beta to 1
+                beta = args.per_beta + (1.0 - args.per_beta) * i_step / total_steps
+                transitions, sample_idxs, is_weights = memory.sample(BATCH_SIZE, beta)
+            else:
+                transitions = memory.sample(BATCH_SIZE)
+                is_weights = np.ones(BATCH_SIZE, dtype=np.float32)
         #transitions = copy.deepcopy(memory.memory[11:19])
         batch = Transition(*zip(*transitions))
-        loss = torch.tensor(0.0).to(device)
+        graphs, feat_dicts, unsch_list = build_batch_graphs(batch, num_robots, device)
+        with instrument.timer('train.forward'):
+            q_pre = model(graphs, feat_dicts)
 
-        for i in range(BATCH_SIZE):
-            num_tasks = batch.curr_g[i].number_of_nodes() - 2
-            unsch_tasks = np.array(action_helper_rollout(num_tasks, batch.curr_partialw[i]),
-                                   dtype=np.int64)
-            
-            g = build_hetgraph(batch.curr_g[i], num_tasks, num_robots, batch.durs[i],
-                               map_width, np.array(batch.locs[i], dtype=np.int64),
-                               loc_dist_threshold, batch.curr_partials[i], unsch_tasks, 
-                               batch.act_robot[i], unsch_tasks)
-            g = g.to(device)
-            
-            num_actions = len(unsch_tasks)
-            feat_dict = hetgraph_node_helper(batch.curr_g[i].number_of_nodes(), 
-                                             batch.curr_partialw[i], 
-                                             batch.curr_partials[i],
-                                             batch.locs[i], batch.durs[i], 
-                                             map_width, num_robots, num_actions)
-            
-            feat_dict_tensor = {}
-            for key in feat_dict:
-                feat_dict_tensor[key] = torch.Tensor(feat_dict[key]).to(device)
-
-            outputs = policy_net(g, feat_dict_tensor)
-            q_pre = outputs['value']
-            
-            '''
-            Calculate TD loss & LfD loss at the same time
-            '''
-            if num_actions > 1:
-                # q value for alterantive actions                
-                offset = 5.0
-                target_list = np.full((num_actions, 1), 
-                                      batch.reward_n[i] - offset, dtype=np.float32)
-            
-                LfD_weights = np.full((num_actions, 1), 
-                                      0.9/(num_actions-1), dtype=np.float32)
-                     
-                q_s_a_alt_target1 = q_pre.clone().detach()
-                q_s_a_alt_target2 = torch.tensor(target_list).to(device)
-                q_s_a_alt_target = torch.min(q_s_a_alt_target1, q_s_a_alt_target2)
-                
-                # q value for expert action
-                expert_idx = 0
-                for j in range(num_actions):
-                    if unsch_tasks[j] == batch.act_task[i]:
-                        expert_idx = j
-                        break
-                q_s_a_alt_target[expert_idx, 0] = batch.reward_n[i]
-                LfD_weights[expert_idx, 0] = 1.0
-            else:
-                # num_actions == 1
-                target_list = np.full((1, 1), batch.reward_n[i], dtype=np.float32)
-            
-                LfD_weights = np.full((1, 1), 1.0, dtype=np.float32)
-                q_s_a_alt_target = torch.tensor(target_list).to(device)
-                
-            loss_SL = F.mse_loss(q_pre, q_s_a_alt_target, reduction='none')
-            LfD_weights = torch.Tensor(LfD_weights).to(device)
-            loss_SL = loss_SL * LfD_weights
-            loss += loss_SL.sum() / BATCH_SIZE
+        with instrument.timer('train.loss'):
+            loss, sample_losses = batch_lfd_loss(q_pre, unsch_list, batch.act_task,
+                                                 batch.reward_n, is_weights, device)
 
         loss_batch = loss.data.cpu().numpy()
+        if distributed:
+            # mean over ranks, so every lr_scheduler sees the same loss
+            loss_mean = loss.detach().clone()
+            dist.all_reduce(loss_mean)
+            loss_batch = (loss_mean / world_size).cpu().numpy()
         
         if i_step > 1:
             lr_scheduler.step(loss_batch)
         
-        optimizer.zero_grad()
-        loss.backward()
-        optimizer.step()
+        with instrument.timer('train.backward'):
+            optimizer.zero_grad()
+            loss.backward()
+        with instrument.timer('train.optimizer_step'):
+            optimizer.step()
+        if args.prioritized:
+            memory.update_priorities(sample_idxs, sample_losses.cpu().numpy())
         # tune offset (as in spreadsheet)
         
-        loss_history.append(loss_batch)
+        if loss_log is not None:
+            loss_log.append(i_step, loss_batch)
         end_t = time.time()
-        print('[step {}] Loss {:.4f}, time: {:.4f} s'
-              .format(i_step, loss_batch, end_t - start_t))        
+        if results is not None and i_step - start_step >= scaling_warmup(total_steps):
+            step_times.append(end_t - start_t)
+        if is_main:
+            print('[step {}] Loss {:.4f}, time: {:.4f} s'
+                  .format(i_step, loss_batch, end_t - start_t))        
 
         '''
         Save checkpoints
         '''
-        if i_step % args.checkpoint_interval == 0:
+        if is_main and results is None and i_step % args.checkpoint_interval == 0:
             checkpoint_path = args.cpsave + '/checkpoint_{:05d}.tar'.format(i_step)
-            torch.save({
+            # CPU copies, training goes on while they are written
+            writer.save_torch(to_cpu({
                 'training_steps': i_step,
                 'policy_net_state_dict': policy_net.state_dict(),
                 'optimizer_state_dict': optimizer.state_dict(),
-                'loss': loss_history
-            }, checkpoint_path)
-            print('checkpoint saved')
+                'loss_history_file': 'loss_history.txt'
+            }), checkpoint_path, done_msg='checkpoint saved')
+            loss_log.flush()
+            if instrument.is_enabled():
+                instrument.report()
+                instrument.save(args.cpsave + '/profile.json')
+
+    if is_main and results is not None:
+        # one float, a SimpleQueue put blocks once the pipe buffer is full
+        results.put(float(np.mean(step_times)))
 
-    # save replay buffer
+    if instrument.is_enabled():
+        instrument.report()
+        instrument.save(args.cpsave + '/profile.json')
+    if is_main and args.profile_trace is not None:
+        instrument.save_chrome_trace(args.profile_trace)
+        print('Chrome trace saved to %s' % args.profile_trace)
+
+    # save replay buffer, one file per rank in distributed mode
     if args.save_replay_buffer_to is not None:
-        with open(args.save_replay_buffer_to, 'wb') as f:  # open file with write-mode
-            pickle.dump(memory, f)  # serialize and save object
\ No newline at end of file
+        bname = args.save_replay_buffer_to
+        if distributed:
+            bname = bname + '.rank%d' % rank
+        writer.save_pickle(memory, bname, done_msg='Replay buffer saved to %s' % bname)
+
+    writer.close()
+    if loss_log is not None:
+        loss_log.close()
+    if distributed:
+        dist.destroy_process_group()
+
+'''
+Steps excluded from the step time of a scaling run
+'''
+def scaling_warmup(total_steps):
+    return min(5, total_steps // 2)
+
+'''
+Train with 1..N processes for --scaling-steps steps each and report
+    throughput and scaling efficiency (samples/s of N processes over N times 1)
+'''
+def scaling_test(args):
+    args = copy.copy(args)
+    # CPU scaling, also for the single process run
+    args.cpu = True
+    args.steps = args.scaling_steps
+    ctx = torch.multiprocessing.get_context('spawn')
+    rows = []
+    for world_size in args.scaling:
+        results = ctx.SimpleQueue()
+        if world_size == 1:
+            train(0, 1, args, results)
+        else:
+            torch.multiprocessing.spawn(train, args=(world_size, args, results),
+                                        nprocs=world_size)
+        step_time = results.get()
+        samples = world_size * args.batch_size / step_time
+        rows.append((world_size, step_time, samples))
+
+    base = rows[0][2] / rows[0][0]
+    print('%10s %12s %12s %11s' % ('processes', 'step ms', 'samples/s', 'efficiency'))
+    for world_size, step_time, samples in rows:
+        print('%10d %12.1f %12.1f %11.3f'
+              % (world_size, step_time * 1000, samples, samples / (world_size * base)))
+    
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cpu', default=False, action='store_true')
+    parser.add_argument('--path-to-train', default='./gen/r2t20_001', type=str)
+    parser.add_argument('--num-robots', default=2, type=int)
+    parser.add_argument('--train-start-no', default=1, type=int)
+    parser.add_argument('--train-end-no', default=1000, type=int)
+    parser.add_argument('--steps', default=30000, type=int)
+    parser.add_argument('--gamma', default=0.99, type=float)
+    parser.add_argument('--batch-size', default=8, type=int,
+                        help='per process in distributed mode')
+    parser.add_argument('--lr', default=1e-4, type=float)
+    parser.add_argument('--weight-decay', default=1e-5, type=float)
+    parser.add_argument('--resume-training', default=False, action='store_true')
+    parser.add_argument('--path-to-checkpoint', default='./sltrain02/checkpoint_07000.tar', type=str)
+    parser.add_argument('--load-memory', default=False, action='store_true')
+    parser.add_argument('--path-to-replay-buffer', default='./buffer/buffer_half_C3.pkl', type=str)
+    parser.add_argument('--checkpoint-interval', default=1000, type=int)
+    parser.add_argument('--save-replay-buffer-to', default=None, type=str)
+    parser.add_argument('--cpsave', default='./cp', type=str)
+    parser.add_argument('--prioritized', default=False, action='store_true')
+    parser.add_argument('--per-alpha', default=0.6, type=float)
+    parser.add_argument('--per-beta', default=0.4, type=float)
+    parser.add_argument('--temporal-edges', default='full', choices=['full', 'reduced', 'topk'],
+                        help='temporal edges of the HetGraph, see SchedulingEnv')
+    parser.add_argument('--temporal-k', default=8, type=int)
+    parser.add_argument('--lazy-replay', default=False, action='store_true',
+                        help='store demonstrations as action sequences and '
+                        'rebuild states when sampled (LazyReplayMemory)')
+    parser.add_argument('--replay-cache-size', default=512, type=int,
+                        help='states kept by --lazy-replay')
+    parser.add_argument('--profile', default=False, action='store_true')
+    parser.add_argument('--profile-trace', default=None, type=str,
+                        help='also save a Chrome trace JSON to this path')
+    parser.add_argument('--world-size', default=1, type=int,
+                        help='number of training processes (torch.distributed, gloo, CPU)')
+    parser.add_argument('--master-port', default=29500, type=int)
+    parser.add_argument('--threads-per-process', default=1, type=int)
+    parser.add_argument('--scaling', nargs='+', default=None, type=int,
+                        help='process counts of a scaling run, e.g. 1 2 4 8; '
+                        'no checkpoints are written')
+    parser.add_argument('--scaling-steps', default=30, type=int,
+                        help='training steps of each --scaling run')
+    args = parser.parse_args()
+
+    if args.scaling is not None:
+        scaling_test(args)
+    elif args.world_size > 1:
+        torch.multiprocessing.spawn(train, args=(args.world_size, args), nprocs=args.world_size)
+    else:
+        train(0, 1, args)
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 13:27:14 2026
+
+Packed binary storage for instances and labels
+    one file holds a stream of records instead of four small text files
+    per problem, written and read sequentially
+
+File layout
+    magic b'MRCPACK1'
+    record*
+Record layout (little endian)
+    kind      4 bytes, e.g. b'INST' for instances
+    rec_id    uint32, e.g. the problem number
+    size      uint32, bytes of the payload that follows
+    payload   uint16 number of arrays, then for every array
+                  uint8 name length, name (ascii)
+                  1 byte dtype code ('i' int32, 'f' float32, 'd' float64)
+                  uint8 ndim, uint32 * ndim shape, raw data
+"""
+
+import struct
+
+import numpy as np
+
+MAGIC = b'MRCPACK1'
+DTYPES = {'i': np.dtype('<i4'), 'f': np.dtype('<f4'), 'd': np.dtype('<f8')}
+DTYPE_CODES = {np.dtype('<i4'): 'i', np.dtype('<f4'): 'f', np.dtype('<f8'): 'd'}
+_record_header = struct.Struct('<4sII')
+
+'''
+Serialize a dict of arrays into a record payload
+    integer arrays are stored as int32, float arrays keep their precision
+'''
+def encode_arrays(arrays):
+    parts = [struct.pack('<H', len(arrays))]
+    for name, array in arrays.items():
+        array = np.asarray(array)
+        if array.dtype.kind in 'iub':
+            array = array.astype('<i4')
+        elif array.dtype != np.float32:
+            array = array.astype('<f8')
+        else:
+            array = array.astype('<f4')
+        name = name.encode('ascii')
+        parts.append(struct.pack('<B', len(name)) + name)
+        parts.append(DTYPE_CODES[array.dtype].encode('ascii'))
+        parts.append(struct.pack('<B%dI' % array.ndim, array.ndim, *array.shape))
+        parts.append(array.tobytes())
+    return b''.join(parts)
+
+def decode_arrays(payload):
+    arrays = {}
+    (num_arrays,) = struct.unpack_from('<H', payload, 0)
+    pos = 2
+    for _ in range(num_arrays):
+        (name_len,) = struct.unpack_from('<B', payload, pos)
+        name = payload[pos+1:pos+1+name_len].decode('ascii')
+        pos += 1 + name_len
+        dtype = DTYPES[payload[pos:pos+1].decode('ascii')]
+        (ndim,) = struct.unpack_from('<B', payload, pos+1)
+        shape = struct.unpack_from('<%dI' % ndim, payload, pos+2)
+        pos += 2 + 4 * ndim
+        size = int(np.prod(shape)) * dtype.itemsize
+        arrays[name] = np.frombuffer(payload, dtype=dtype, count=int(np.prod(shape)),
+                                     offset=pos).reshape(shape)
+        pos += size
+    return arrays
+
+'''
+Streaming writer, records are appended as they come
+'''
+class PackedWriter(object):
+    def __init__(self, path, append=False):
+        self.path = path
+        self.f = open(path, 'ab' if append else 'wb')
+        if self.f.tell() == 0:
+            self.f.write(MAGIC)
+        self.count = 0
+
+    def write(self, kind, rec_id, arrays):
+        payload = encode_arrays(arrays)
+        self.f.write(_record_header.pack(kind, rec_id, len(payload)))
+        self.f.write(payload)
+        self.count += 1
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+'''
+Sequential reader
+    iterating yields (kind, rec_id, arrays)
+    index() returns the file offset of every record for random access
+'''
+class PackedReader(object):
+    def __init__(self, path):
+        self.path = path
+        self.f = open(path, 'rb')
+        if self.f.read(len(MAGIC)) != MAGIC:
+            raise ValueError('%s is not a packed file' % path)
+
+    def _read_record(self):
+        header = self.f.read(_record_header.size)
+        if len(header) < _record_header.size:
+            return None
+        kind, rec_id, size = _record_header.unpack(header)
+        return kind, rec_id, decode_arrays(self.f.read(size))
+
+    def __iter__(self):
+        self.f.seek(len(MAGIC))
+        while True:
+            record = self._read_record()
+            if record is None:
+                return
+            yield record
+
+    # list of (kind, rec_id, offset), payloads are skipped, not decoded
+    def index(self):
+        entries = []
+        pos = len(MAGIC)
+        self.f.seek(pos)
+        while True:
+            header = self.f.read(_record_header.size)
+            if len(header) < _record_header.size:
+                return entries
+            kind, rec_id, size = _record_header.unpack(header)
+            entries.append((kind, rec_id, pos))
+            pos += _record_header.size + size
+            self.f.seek(pos)
+
+    def read_at(self, offset):
+        self.f.seek(offset)
+        return self._read_record()
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+'''
+Instance records hold dur, ddl, wait and loc
+'''
+def write_instance(writer, rec_id, dur, ddl, wait, loc):
+    writer.write(b'INST', rec_id, {'dur': dur, 'ddl': ddl, 'wait': wait, 'loc': loc})
+
+def iter_instances(path):
+    with PackedReader(path) as reader:
+        for kind, rec_id, arrays in reader:
+            if kind == b'INST':
+                yield rec_id, arrays
+
+'''
+Label records hold the solution arrays of solreader.parse_solution
+'''
+def write_label(writer, rec_id, labels):
+    writer.write(b'LABL', rec_id, labels)
+
+def iter_labels(path):
+    with PackedReader(path) as reader:
+        for kind, rec_id, arrays in reader:
+            if kind == b'LABL':
+                yield rec_id, arrays
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 25 14:31:09 2026
+
+Asynchronous batched scheduling service around a trained ScheduleNet
+    decide() takes the state of one robot team (env, robot_chosen,
+    valid_tasks) and returns the task picked by the policy net, same as
+    benchmark.gnnutils.gnn_pick_task
+    HetGraphs are built on a process pool (build_state_graph, the env is
+    pickled to the worker; graph building is Python/numpy bound and holds
+    the GIL, so threads would not overlap), or on the event loop itself
+    with build_workers=0 (default on a single core)
+    built graphs wait in a queue and are coalesced into one dgl.batch
+    forward, for at most max_latency after the first one arrives or
+    max_batch_size graphs
+    Q values are split back per request with batch_num_nodes('value')
+    stop() fails every decide() still pending with RuntimeError
+
+Latency (p50/p99, from decide() to its result) and throughput are kept in
+metrics(). See benchmark/service_load.py for a load generator.
+
+Usage
+    service = SchedulingService(policy_net, map_width=2)
+    async with service:
+        task = await service.decide(env, robot_chosen, valid_tasks)
+    print(service.metrics())
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import dgl
+import numpy as np
+import torch
+
+from benchmark.gnnutils import build_state_graph
+
+def _init_build_worker():
+    # one intra-op thread per worker, the workers already run in parallel
+    torch.set_num_threads(1)
+
+def _ping():
+    return True
+
+class SchedulingService(object):
+    '''
+    policy_net: trained ScheduleNet (benchmark.gnnutils.load_policy_net)
+    max_batch_size: most graphs per forward
+    max_latency: seconds the first graph of a batch waits for others
+    build_workers: processes building graphs, cpu_count - 1 if None,
+        0 builds them in decide()
+    build_executor: concurrent.futures executor for graph building
+        instead of the process pool, owned by the caller (not shut down
+        by stop())
+    '''
+    def __init__(self, policy_net, map_width, loc_dist_threshold=1.0, device='cpu',
+                 max_batch_size=32, max_latency=0.005, build_workers=None,
+                 build_executor=None):
+        self.policy_net = policy_net
+        self.map_width = map_width
+        self.loc_dist_threshold = loc_dist_threshold
+        self.device = torch.device(device)
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.build_executor = build_executor
+        self.build_workers = 0
+        self.owns_build_executor = False
+        if build_workers is None:
+            build_workers = max(0, os.cpu_count() - 1)
+        if build_executor is None and build_workers > 0:
+            self.build_workers = build_workers
+            self.build_executor = ProcessPoolExecutor(
+                build_workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_build_worker)
+            self.owns_build_executor = True
+        # forwards run one at a time off the event loop
+        self.model_executor = ThreadPoolExecutor(1)
+
+        self.queue = None
+        self.batcher = None
+        self.running = False
+        self.reset_metrics()
+
+    async def start(self):
+        # start the worker processes (imports of torch/dgl) before timing
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.build_executor, _ping)
+                               for _ in range(self.build_workers)])
+        self.queue = asyncio.Queue()
+        self.batcher = asyncio.get_running_loop().create_task(self.run_batches())
+        self.running = True
+        self.reset_metrics()
+
+    async def stop(self):
+        self.running = False
+        self.batcher.cancel()
+        try:
+            await self.batcher
+        except asyncio.CancelledError:
+            pass
+        # requests still queued would wait forever
+        while not self.queue.empty():
+            _, _, future = self.queue.get_nowait()
+            self.fail([future], RuntimeError('scheduling service stopped'))
+        # waiting for in-flight builds/forwards must not block the loop
+        loop = asyncio.get_running_loop()
+        if self.owns_build_executor:
+            await loop.run_in_executor(None, self.build_executor.shutdown)
+        await loop.run_in_executor(None, self.model_executor.shutdown)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    def reset_metrics(self):
+        self.latencies = []
+        self.batch_sizes = []
+        self.start_t = time.perf_counter()
+
+    '''
+    Pick a task for robot_chosen among valid_tasks
+        env must not change until the result is returned
+    Return
+        task number, -1 if valid_tasks is empty
+        RuntimeError if the service is stopped before the result is ready
+    '''
+    async def decide(self, env, robot_chosen, valid_tasks):
+        if not self.running:
+            raise RuntimeError('scheduling service is not running')
+        arrival_t = time.perf_counter()
+        valid_tasks = np.asarray(valid_tasks, dtype=np.int64)
+        if len(valid_tasks) <= 1:
+            self.latencies.append(time.perf_counter() - arrival_t)
+            return int(valid_tasks[0]) if len(valid_tasks) == 1 else -1
+
+        loop = asyncio.get_running_loop()
+        if self.build_executor is None:
+            g, feat_dict = build_state_graph(env, robot_chosen, valid_tasks,
+                                             self.map_width, self.loc_dist_threshold,
+                                             'cpu')
+        else:
+            g, feat_dict = await loop.run_in_executor(
+                self.build_executor, build_state_graph, env, robot_chosen, valid_tasks,
+                self.map_width, self.loc_dist_threshold, 'cpu')
+        if not self.running:
+            raise RuntimeError('scheduling service stopped')
+        future = loop.create_future()
+        await self.queue.put((g, feat_dict, future))
+        q_values = await future
+
+        self.latencies.append(time.perf_counter() - arrival_t)
+        return int(valid_tasks[int(q_values.argmax())])
+
+    '''
+    Batcher task, forms batches from the queue until cancelled
+    '''
+    async def run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = []
+            try:
+                batch.append(await self.queue.get())
+                deadline = loop.time() + self.max_latency
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                self.batch_sizes.append(len(batch))
+                results = await loop.run_in_executor(
+                    self.model_executor, self.forward,
+                    [g for g, _, _ in batch], [feat_dict for _, feat_dict, _ in batch])
+            except asyncio.CancelledError:
+                # stop(): requests taken off the queue are failed here
+                self.fail([future for _, _, future in batch],
+                          RuntimeError('scheduling service stopped'))
+                raise
+            except Exception as e:
+                self.fail([future for _, _, future in batch], e)
+                continue
+            for (_, _, future), q_values in zip(batch, results):
+                if not future.done():
+                    future.set_result(q_values)
+
+    def fail(self, futures, error):
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+
+    '''
+    One forward over a batch of HetGraphs
+    Return
+        list of Q value arrays, one per graph
+    '''
+    def forward(self, graphs, feat_dicts):
+        batched_g = dgl.batch(graphs).to(self.device)
+        # dgl.batch stacks the nodes of each type in graph order
+        feat_dict = {ntype: torch.cat([f[ntype] for f in feat_dicts]).to(self.device)
+                     for ntype in feat_dicts[0]}
+        with torch.no_grad():
+            q_s_a = self.policy_net(batched_g, feat_dict)['value']
+        sizes = batched_g.batch_num_nodes('value').tolist()
+        return [q.cpu().numpy().ravel() for q in torch.split(q_s_a, sizes)]
+
+    '''
+    Latency percentiles in ms, throughput in decisions/s and batch sizes
+    '''
+    def metrics(self):
+        elapsed = time.perf_counter() - self.start_t
+        latency = np.array(self.latencies) * 1000.0
+        if len(latency) == 0:
+            latency = np.array([np.nan])
+        return {'decisions': len(self.latencies),
+                'throughput': len(self.latencies) / max(elapsed, 1e-9),
+                'p50_ms': float(np.percentile(latency, 50)),
+                'p99_ms': float(np.percentile(latency, 99)),
+                'batches': len(self.batch_sizes),
+                'mean_batch_size': float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0}
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Oct 22 09:41:17 2026
+
+Reader for the Gurobi artifacts next to each solution
+    .sol: one 'name value' line per variable
+        s###/f###        start/finish time of a task (000 is the origin)
+        A<rrr><ttt>      task ttt is assigned to robot rrr
+        A<rrr><ttt><ttt> both tasks on robot rrr (not kept)
+        x<iii><jjj>      ordering binary of tasks i and j
+    .mps: only read for variable metadata (names and types), which gives
+        the problem size and the integer variables the .sol must contain
+
+Both files are streamed line by line. Labels are written as b'LABL'
+records of a packed file (see packed.py), keyed by problem number:
+    w (N,) global order, robot (N,) robot of each task (index ti-1),
+    start/finish (N,) times as solved, order (N, N) x values (index i-1, j-1),
+    objective (1,)
+w is the order of start times, ties kept in task order, as in the _w.txt
+files written next to the .sol.
+
+Usage
+    python solreader.py --path-to-solutions ./gen/r2t20_001v9 --start-no 1
+        --end-no 1000 --output r2t20_001_labels.pack --processes 8
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import re
+import time
+
+import numpy as np
+
+from packed import PackedWriter, write_label
+
+_time_var = re.compile(r'([sf])(\d{3})$')
+_assign_var = re.compile(r'A(\d{3})(\d{3})$')
+_order_var = re.compile(r'x(\d{3})(\d{3})$')
+
+'''
+Variable names and types from the COLUMNS and BOUNDS sections of an .mps
+Return
+    dict name -> 'C' continuous, 'I' integer or 'B' binary, in column order
+'''
+def read_mps_variables(path):
+    variables = {}
+    section = None
+    integer = False
+    with open(path) as f:
+        for line in f:
+            if not line.startswith(' '):
+                section = line.split()[0] if line.strip() else section
+                # nothing about variables follows the bounds
+                if section in ('INDICATORS', 'GENCONS', 'SOS', 'ENDATA'):
+                    break
+                continue
+            fields = line.split()
+            if section == 'COLUMNS':
+                if len(fields) >= 3 and fields[1] == "'MARKER'":
+                    integer = fields[2] == "'INTORG'"
+                elif fields[0] not in variables:
+                    variables[fields[0]] = 'I' if integer else 'C'
+            elif section == 'BOUNDS' and fields[0] == 'BV':
+                variables[fields[2]] = 'B'
+    return variables
+
+'''
+Number of tasks and robots of a model from its variable names
+'''
+def model_dims(names):
+    num_tasks = 0
+    num_robots = 0
+    for name in names:
+        m = _time_var.match(name)
+        if m:
+            num_tasks = max(num_tasks, int(m.group(2)))
+            continue
+        m = _assign_var.match(name)
+        if m:
+            num_robots = max(num_robots, int(m.group(1)) + 1)
+    return num_tasks, num_robots
+
+'''
+Stream an .sol file
+Return
+    objective (None if missing), dict name -> value
+'''
+def read_sol(path):
+    objective = None
+    values = {}
+    with open(path) as f:
+        for line in f:
+            if line.startswith('#'):
+                if 'Objective value' in line:
+                    objective = float(line.split('=')[1])
+                continue
+            fields = line.split()
+            if len(fields) == 2:
+                values[fields[0]] = float(fields[1])
+    return objective, values
+
+'''
+Extract the labels of one solution
+    variables: read_mps_variables output, or None to infer the size from
+        the .sol alone
+Return
+    dict of label arrays, list of problems found
+'''
+def parse_solution(sol_path, variables=None):
+    errors = []
+    objective, values = read_sol(sol_path)
+    num_tasks, num_robots = model_dims(variables if variables is not None else values)
+
+    if variables is not None:
+        missing = [name for name, vtype in variables.items()
+                   if vtype != 'C' and name not in values]
+        if len(missing) > 0:
+            errors.append('%d integer variables missing from .sol' % len(missing))
+
+    start = np.full(num_tasks, np.nan)
+    finish = np.full(num_tasks, np.nan)
+    robot = np.full(num_tasks, -1, dtype=np.int32)
+    order = np.zeros((num_tasks, num_tasks), dtype=np.int32)
+    for name, value in values.items():
+        m = _time_var.match(name)
+        if m:
+            ti = int(m.group(2))
+            if ti > 0:
+                (start if m.group(1) == 's' else finish)[ti-1] = value
+            continue
+        m = _assign_var.match(name)
+        if m:
+            if round(value) == 1:
+                robot[int(m.group(2))-1] = int(m.group(1))
+            continue
+        m = _order_var.match(name)
+        if m:
+            order[int(m.group(1))-1, int(m.group(2))-1] = round(value)
+
+    if np.isnan(start).any() or np.isnan(finish).any():
+        errors.append('missing start/finish times')
+    if (robot < 0).any():
+        errors.append('unassigned tasks: %s' % (np.flatnonzero(robot < 0) + 1).tolist())
+
+    w = np.argsort(start, kind='stable') + 1
+    labels = {'w': w.astype(np.int32), 'robot': robot, 'start': start, 'finish': finish,
+              'order': order,
+              'objective': np.array([np.nan if objective is None else objective])}
+    return labels, errors
+
+'''
+Per robot task sequences of a label, as read from the _<robot>.txt files
+'''
+def label_schedules(labels, num_robots):
+    w = labels['w']
+    robot_of_w = labels['robot'][w-1]
+    return [w[robot_of_w == rj] for rj in range(num_robots)]
+
+def parse_job(job):
+    graph_no, solname = job
+    if not os.path.isfile(solname + '.sol'):
+        return graph_no, None, ['.sol missing']
+    variables = None
+    if os.path.isfile(solname + '.mps'):
+        variables = read_mps_variables(solname + '.mps')
+    labels, errors = parse_solution(solname + '.sol', variables)
+    return graph_no, labels, errors
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path-to-solutions', default='./gen/r2t20_001v9', type=str)
+    parser.add_argument('--start-no', default=1, type=int)
+    parser.add_argument('--end-no', default=1000, type=int)
+    parser.add_argument('--output', default='./labels.pack', type=str)
+    parser.add_argument('--processes', default=os.cpu_count(), type=int)
+    args = parser.parse_args()
+
+    jobs = [(graph_no, args.path_to_solutions + '/%05d' % graph_no)
+            for graph_no in range(args.start_no, args.end_no+1)
+            if os.path.isfile(args.path_to_solutions + '/%05d.sol' % graph_no)]
+
+    written = 0
+    start_t = time.time()
+    with PackedWriter(args.output) as writer, mp.Pool(args.processes) as pool:
+        for graph_no, labels, errors in pool.imap(parse_job, jobs, chunksize=16):
+            if len(errors) > 0:
+                print('%05d: %s' % (graph_no, '; '.join(errors)))
+                continue
+            write_label(writer, graph_no, labels)
+            written += 1
+    end_t = time.time()
+
+    print('Converted %d/%d solutions to %s, %.2f s, %.1f files/s'
+          % (written, len(jobs), args.output, end_t - start_t,
+             len(jobs) / max(end_t - start_t, 1e-9)))
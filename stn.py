@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 11:05:37 2026
+
+Array-based STN helpers
+    Nodes follow SchedulingEnv.node_names: s000, f000, s001, f001, ...
+    so si has index 2*i and fi has index 2*i+1
+    An edge (u, v, w) encodes the constraint v - u <= w
+
+The scalar-loop kernels of stn_jit replace bellman_ford, add_edges and
+floyd_warshall_batch when it is enabled (MRC_JIT=1)
+"""
+
+import numpy as np
+
+import stn_jit
+
+'''
+Edge arrays of the initial STN, same constraints as
+    SchedulingEnv.initialize_STN
+    dur: (num_tasks, num_robots), ddl: (k, 2), wait: (m, 3)
+Return
+    num_nodes, u, v, w
+'''
+def stn_edges(dur, ddl, wait):
+    num_tasks = dur.shape[0]
+    num_nodes = 2 * (num_tasks + 1)
+    max_deadline = num_tasks * 10
+    tasks = np.arange(1, num_tasks + 1)
+    s, f = 2 * tasks, 2 * tasks + 1
+    zeros = np.zeros(num_tasks, dtype=np.int64)
+
+    ddl = np.asarray(ddl, dtype=np.int64).reshape(-1, 2)
+    wait = np.asarray(wait, dtype=np.int64).reshape(-1, 3)
+
+    u = np.concatenate([[0], s, np.ones(num_tasks, dtype=np.int64), s, f,
+                        np.zeros(len(ddl), dtype=np.int64), 2 * wait[:, 0]])
+    v = np.concatenate([[1], zeros, f, f, s,
+                        2 * ddl[:, 0] + 1, 2 * wait[:, 1] + 1])
+    w = np.concatenate([[max_deadline], zeros, zeros,
+                        dur.max(axis=1), -1 * dur.min(axis=1),
+                        ddl[:, 1], -1 * wait[:, 2]])
+
+    # a later edge between the same pair overwrites the earlier one,
+    # as it does in nx.DiGraph
+    key = (u * num_nodes + v)[::-1]
+    _, first = np.unique(key, return_index=True)
+    keep = len(key) - 1 - first
+    return num_nodes, u[keep], v[keep], w[keep].astype(np.float64)
+
+'''
+Vectorized Bellman-Ford from a virtual source linked to every node
+    relaxes all edges at once per round
+Return
+    (True, potentials) if consistent, (False, None) on a negative cycle
+'''
+def bellman_ford(num_nodes, u, v, w):
+    if stn_jit.is_enabled():
+        return stn_jit.bellman_ford(num_nodes, u, v, w)
+    dist = np.zeros(num_nodes)
+    for _ in range(num_nodes):
+        new_dist = dist.copy()
+        np.minimum.at(new_dist, v, dist[u] + w)
+        if np.array_equal(new_dist, dist):
+            return True, dist
+        dist = new_dist
+    return False, None
+
+'''
+Consistency check of the initial STN of an instance
+'''
+def is_consistent(dur, ddl, wait):
+    consistent, _ = bellman_ford(*stn_edges(dur, ddl, wait))
+    return consistent
+
+'''
+Incremental APSP update after adding (or tightening) edges u->v: w
+    dist: (num_nodes, num_nodes) shortest path distances of a consistent STN
+    edges sharing a head node are relaxed together, a shortest path never
+    needs two of them as that would revisit the head
+Return
+    updated distance matrix (a new array), None on a negative cycle
+'''
+def add_edges(dist, u, v, w):
+    if stn_jit.is_enabled():
+        return stn_jit.add_edges(dist, u, v, w)
+    for head in np.unique(v):
+        sel = v == head
+        # shortest distance from every node to head through a new edge
+        via = (dist[:, u[sel]] + w[sel]).min(axis=1)
+        if via[head] < 0:
+            return None
+        dist = np.minimum(dist, via[:, None] + dist[head][None, :])
+    return dist
+
+'''
+Dense weight matrix of an STN from its edge arrays
+    np.inf where there is no edge, 0 on the diagonal
+'''
+def stn_matrix(num_nodes, u, v, w):
+    weights = np.full((num_nodes, num_nodes), np.inf)
+    weights[u, v] = w
+    nodes = np.arange(num_nodes)
+    weights[nodes, nodes] = np.minimum(weights[nodes, nodes], 0)
+    return weights
+
+'''
+Stack weight matrices of different sizes into one (B, V, V) batch
+    padded nodes have no edges, so they leave the distances of the real
+    nodes unchanged
+Return
+    weights (B, V, V), number of real nodes of each STN (B,)
+'''
+def pad_batch(matrices):
+    sizes = np.array([m.shape[0] for m in matrices], dtype=np.int64)
+    num_nodes = sizes.max()
+    weights = np.full((len(matrices), num_nodes, num_nodes), np.inf)
+    for b, m in enumerate(matrices):
+        weights[b, :sizes[b], :sizes[b]] = m
+    nodes = np.arange(num_nodes)
+    weights[:, nodes, nodes] = np.minimum(weights[:, nodes, nodes], 0)
+    return weights, sizes
+
+'''
+Batched Floyd-Warshall over stacked STNs
+    weights: (..., V, V) edge weights, np.inf where there is no edge
+    every STN of the batch is relaxed through pivot k in one array op
+Return
+    dist (..., V, V) a new array, consistent (...,) bool, False where a
+    negative cycle shows up on the diagonal
+'''
+def floyd_warshall_batch(weights):
+    if stn_jit.is_enabled():
+        return stn_jit.floyd_warshall_batch(weights)
+    dist = np.array(weights, dtype=np.float64)
+    num_nodes = dist.shape[-1]
+    nodes = np.arange(num_nodes)
+    dist[..., nodes, nodes] = np.minimum(dist[..., nodes, nodes], 0)
+    for k in range(num_nodes):
+        np.minimum(dist, dist[..., :, k, None] + dist[..., None, k, :], out=dist)
+    consistent = (dist[..., nodes, nodes] >= 0).all(axis=-1)
+    return dist, consistent
+
+'''
+Edges of the minimal network that are not implied by the others
+    dist: (V, V) APSP distances of a consistent STN
+    nodes in a rigid component (zero cycle, d[a,b] + d[b,a] == 0) are
+    chained to its first node, edges between components are dropped when
+    d[a,b] == d[a,c] + d[c,b] for a third component c; without zero cycles
+    every remaining shortest path is made of kept edges
+Return
+    (V, V) bool mask of kept edges, diagonal included
+'''
+def dominance_mask(dist, tol=1e-6):
+    num_nodes = dist.shape[0]
+    nodes = np.arange(num_nodes)
+    rigid = np.abs(dist + dist.T) <= tol
+    rep = rigid.argmax(axis=1)
+
+    keep = np.eye(num_nodes, dtype=bool)
+    members = nodes[rep != nodes]
+    keep[rep[members], members] = True
+    keep[members, rep[members]] = True
+
+    reps = np.unique(rep)
+    d = dist[np.ix_(reps, reps)]
+    dominated = np.zeros(d.shape, dtype=bool)
+    for c in range(len(reps)):
+        implied = d[:, c, None] + d[None, c, :] <= d + tol
+        implied[c, :] = False
+        implied[:, c] = False
+        dominated |= implied
+    keep[np.ix_(reps, reps)] |= ~dominated
+    return keep
+
+'''
+The k tightest (smallest weight) outgoing edges of every node
+    plus the diagonal
+'''
+def topk_mask(dist, k):
+    num_nodes = dist.shape[0]
+    off_diag = dist + np.diag(np.full(num_nodes, np.inf))
+    k = min(k, num_nodes - 1)
+    cols = np.argpartition(off_diag, k - 1, axis=1)[:, :k]
+    keep = np.eye(num_nodes, dtype=bool)
+    keep[np.arange(num_nodes)[:, None], cols] = True
+    return keep
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 24 15:07:33 2026
+
+Optional compiled kernels for the scalar STN loops
+    relax_edges     incremental APSP after adding edges (stn.add_edges,
+                    SchedulingEnv.insertion_edges in benchmark/bnb.py)
+    spfa            single-source consistency check from a virtual source
+                    (stn.bellman_ford, stn.is_consistent)
+    floyd_warshall  in-place APSP of a (B, V, V) batch
+                    (stn.floyd_warshall_batch, SchedulingEnv rSTNs for EDF)
+    longest_path    earliest start pass of verify.earliest_starts
+
+Off by default, the callers then keep their numpy implementations. Turn on
+with the environment variable MRC_JIT=1 or by calling enable(), which
+compiles the kernels with numba (imported only then). Without numba the
+kernels still run as plain Python, which is only useful for parity checks.
+
+Usage
+    MRC_JIT=1 python -m benchmark.edf ...
+    python -m benchmark.jit_kernels     # parity and timing of both paths
+"""
+
+import os
+
+import numpy as np
+
+_jit_env = os.environ.get('MRC_JIT', '0')
+_enabled = False
+
+'''
+Add edges u->v: w one at a time to the APSP matrix dist, in place
+    an edge that is not tighter than dist[u, v] is implied and skipped
+Return
+    False on a negative cycle (dist is then partly updated)
+'''
+def _relax_edges(dist, u, v, w):
+    num_nodes = dist.shape[0]
+    for e in range(len(u)):
+        a = u[e]
+        b = v[e]
+        we = w[e]
+        if dist[a, b] <= we:
+            continue
+        if dist[b, a] + we < 0:
+            return False
+        # row b and column a cannot change, so updating in place is safe
+        for i in range(num_nodes):
+            via = dist[i, a] + we
+            if via == np.inf:
+                continue
+            for j in range(num_nodes):
+                nd = via + dist[b, j]
+                if nd < dist[i, j]:
+                    dist[i, j] = nd
+    return True
+
+'''
+SPFA from a virtual source with a zero edge to every node
+    u, v, w: edge arrays, edge u->v: v - u <= w
+Return
+    consistent, distances from the virtual source
+'''
+def _spfa(num_nodes, u, v, w):
+    order = np.argsort(u)
+    heads = v[order]
+    weights = w[order]
+    first = np.searchsorted(u[order], np.arange(num_nodes + 1))
+
+    dist = np.zeros(num_nodes)
+    count = np.zeros(num_nodes, dtype=np.int64)
+    in_queue = np.ones(num_nodes, dtype=np.bool_)
+    # every node is in the queue at most once, one spare slot
+    queue = np.empty(num_nodes + 1, dtype=np.int64)
+    queue[:num_nodes] = np.arange(num_nodes)
+    front = 0
+    back = num_nodes
+    size = num_nodes + 1
+    while front != back:
+        a = queue[front]
+        front = (front + 1) % size
+        in_queue[a] = False
+        for e in range(first[a], first[a+1]):
+            b = heads[e]
+            nd = dist[a] + weights[e]
+            if nd < dist[b]:
+                dist[b] = nd
+                if not in_queue[b]:
+                    count[b] += 1
+                    # a shortest path has at most num_nodes edges
+                    if count[b] > num_nodes:
+                        return False, dist
+                    queue[back] = b
+                    back = (back + 1) % size
+                    in_queue[b] = True
+    return True, dist
+
+'''
+In-place Floyd-Warshall of every STN in a (B, V, V) batch
+Return
+    (B,) consistent flags, False on a negative diagonal
+'''
+def _floyd_warshall(dist):
+    batch = dist.shape[0]
+    num_nodes = dist.shape[1]
+    consistent = np.ones(batch, dtype=np.bool_)
+    for s in range(batch):
+        for i in range(num_nodes):
+            if dist[s, i, i] > 0:
+                dist[s, i, i] = 0
+        for k in range(num_nodes):
+            for i in range(num_nodes):
+                dik = dist[s, i, k]
+                if dik == np.inf:
+                    continue
+                for j in range(num_nodes):
+                    nd = dik + dist[s, k, j]
+                    if nd < dist[s, i, j]:
+                        dist[s, i, j] = nd
+        for i in range(num_nodes):
+            if dist[s, i, i] < 0:
+                consistent[s] = False
+    return consistent
+
+'''
+Longest path pass over edges u -> v with u < v
+    start[v] = max(0, start[u] + c) over the edges into v
+'''
+def _longest_path(num_tasks, u, v, c):
+    start = np.zeros(num_tasks)
+    order = np.argsort(v)
+    for e in order:
+        nd = start[u[e]] + c[e]
+        if nd > start[v[e]]:
+            start[v[e]] = nd
+    return start
+
+_python_kernels = {'relax_edges': _relax_edges, 'spfa': _spfa,
+                   'floyd_warshall': _floyd_warshall, 'longest_path': _longest_path}
+_kernels = dict(_python_kernels)
+
+'''
+Turn the kernels on
+    compile: compile them with numba (ImportError if it is missing),
+        False runs them as plain Python
+'''
+def enable(compile=True):
+    global _enabled
+    if compile:
+        from numba import njit
+        for name, func in _python_kernels.items():
+            if _kernels[name] is func:
+                _kernels[name] = njit(cache=True)(func)
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+'''
+Same interfaces as the numpy versions they replace
+'''
+def add_edges(dist, u, v, w):
+    dist = np.array(dist, dtype=np.float64)
+    ok = _kernels['relax_edges'](dist, np.asarray(u, dtype=np.int64),
+                                 np.asarray(v, dtype=np.int64),
+                                 np.asarray(w, dtype=np.float64))
+    return dist if ok else None
+
+def bellman_ford(num_nodes, u, v, w):
+    consistent, dist = _kernels['spfa'](num_nodes, np.asarray(u, dtype=np.int64),
+                                        np.asarray(v, dtype=np.int64),
+                                        np.asarray(w, dtype=np.float64))
+    return (True, dist) if consistent else (False, None)
+
+def floyd_warshall_batch(weights):
+    dist = np.array(weights, dtype=np.float64)
+    shape = dist.shape
+    flat = dist.reshape(-1, shape[-2], shape[-1])
+    consistent = _kernels['floyd_warshall'](flat)
+    return flat.reshape(shape), consistent.reshape(shape[:-2])
+
+def earliest_starts(num_tasks, u, v, c):
+    return _kernels['longest_path'](num_tasks, np.asarray(u, dtype=np.int64),
+                                    np.asarray(v, dtype=np.int64),
+                                    np.asarray(c, dtype=np.float64))
+
+if _jit_env not in ('', '0'):
+    try:
+        enable()
+    except ImportError:
+        print('MRC_JIT is set but numba is not installed, using the numpy kernels')
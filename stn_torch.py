@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 24 10:26:51 2026
+
+Batched min-plus Floyd-Warshall in torch
+    APSP of many small STNs at once on a padded (B, V, V) tensor, for
+    vectorized envs, candidate scoring or labeling; see stn.pad_batch
+    for building the batch and benchmark/apsp_batch.py for timings
+
+Kept out of stn.py so that the numpy helpers do not import torch.
+"""
+
+import torch
+
+'''
+Blocked Floyd-Warshall over a batch of STNs
+    weights: (B, V, V) array or tensor, inf where there is no edge
+    block: pivots handled per pass; each pass first closes the pivot rows
+        (B, block, V), then sweeps the other rows one (B, block, V) tile at
+        a time, so a tile stays in cache for all pivots of the block
+    Distances are always lengths of real walks and never above the plain
+    Floyd-Warshall values, so they are exact for consistent STNs
+Return
+    dist (B, V, V) float64 tensor, consistent (B,) bool tensor, False
+    where a negative cycle shows up on the diagonal
+'''
+def floyd_warshall_batch(weights, block=64):
+    dist = torch.as_tensor(weights, dtype=torch.float64).clone()
+    num_nodes = dist.shape[-1]
+    nodes = torch.arange(num_nodes)
+    dist[:, nodes, nodes] = dist[:, nodes, nodes].clamp(max=0)
+
+    for k0 in range(0, num_nodes, block):
+        k1 = min(k0 + block, num_nodes)
+        # pivot rows, they only depend on each other
+        panel = dist[:, k0:k1, :]
+        for k in range(k1 - k0):
+            torch.minimum(panel, panel[:, :, k0+k, None] + panel[:, None, k, :], out=panel)
+        # every other row tile against the closed pivot rows
+        for i0 in range(0, num_nodes, block):
+            if i0 == k0:
+                continue
+            rows = dist[:, i0:i0+block, :]
+            for k in range(k1 - k0):
+                torch.minimum(rows, rows[:, :, k0+k, None] + panel[:, None, k, :], out=rows)
+
+    consistent = (dist[:, nodes, nodes] >= 0).all(dim=1)
+    return dist, consistent
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 28 09:12:40 2026
+
+Parity of the stn_jit kernels with the numpy paths they replace
+    on seeded instances, with the kernels run as plain Python and, when
+    numba is installed, compiled
+"""
+
+import numpy as np
+import pytest
+
+import stn
+import stn_jit
+import verify
+from benchmark.jit_kernels import (batch_cases, consistency_cases, insertion_cases,
+                                   longest_path_cases)
+
+@pytest.fixture(params=[False, True], ids=['python', 'numba'])
+def kernels(request):
+    if request.param:
+        pytest.importorskip('numba')
+    yield request.param
+    stn_jit.disable()
+
+'''
+Results of func on every case, with the kernels off and on
+'''
+def run_both(func, cases, compile):
+    stn_jit.disable()
+    ref = [func(*case) for case in cases]
+    stn_jit.enable(compile)
+    try:
+        res = [func(*case) for case in cases]
+    finally:
+        stn_jit.disable()
+    return ref, res
+
+def test_bellman_ford(kernels):
+    cases = consistency_cases(np.random.default_rng(0), 10, 12)
+    for (ok_ref, dist_ref), (ok, dist) in zip(*run_both(stn.bellman_ford, cases, kernels)):
+        assert ok == ok_ref
+        if ok:
+            np.testing.assert_array_equal(dist, dist_ref)
+
+def test_add_edges(kernels):
+    cases = insertion_cases(np.random.default_rng(1), 6, 10)
+    assert len(cases) > 0
+    for ref, res in zip(*run_both(stn.add_edges, cases, kernels)):
+        assert (ref is None) == (res is None)
+        if ref is not None:
+            np.testing.assert_array_equal(res, ref)
+
+def test_floyd_warshall(kernels):
+    cases = batch_cases(np.random.default_rng(2), 3, 10, batch_size=6)
+    for (dist_ref, ok_ref), (dist, ok) in zip(*run_both(stn.floyd_warshall_batch,
+                                                        cases, kernels)):
+        np.testing.assert_array_equal(ok, ok_ref)
+        # a negative cycle leaves order dependent values, compare consistent STNs
+        np.testing.assert_array_equal(dist[ok], dist_ref[ok_ref])
+
+def test_floyd_warshall_negative_cycle(kernels):
+    weights = np.full((1, 3, 3), np.inf)
+    weights[0, 0, 1] = 1.0
+    weights[0, 1, 2] = -2.0
+    weights[0, 2, 0] = 0.0
+    ref, res = run_both(stn.floyd_warshall_batch, [(weights,)], kernels)
+    assert not ref[0][1].any()
+    assert not res[0][1].any()
+
+def test_earliest_starts(kernels):
+    cases = longest_path_cases(np.random.default_rng(3), 10, 15)
+    for ref, res in zip(*run_both(verify.earliest_starts, cases, kernels)):
+        np.testing.assert_array_equal(res, ref)
@@ -7,262 +7,73 @@ Created on Sun Sep 20 14:58:41 2020
 Utility functions
 
 1. Replace floyd_warshall with Johnson's for STN preprocessing
+2. HetGraph construction moved to hetgraph.py, still reachable from here
 """
 
 
-import copy
 import random
-from collections import Counter
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 
-import dgl
 import networkx as nx
 import numpy as np
-import torch
 
-from benchmark.JohnsonUltra import johnsonU
+import instrument
+from benchmark.JohnsonUltra import johnson_dist
+from stn import dominance_mask, floyd_warshall_batch, topk_mask
 
+# graph/tensor helpers live in hetgraph.py, which imports dgl and torch
+# they are loaded on first access so env-only users skip that startup cost
+_hetgraph_names = ('build_hetgraph', 'hetgraph_node_helper', 'loc_near_edges')
 
-def build_hetgraph(halfDG, num_tasks, num_robots, dur, map_width, locs, loc_dist_threshold,
-                   partials, unsch_tasks, selected_robot, valid_tasks):
-    """
-    Helper function for building HetGraph
-    Q nodes are built w.r.t selected_robot & unsch_tasks
-        valid_tasks: available tasks filtered from unsch_tasks
-        
-    Args:
-        loc_dist_threshold: Distance threshold for two locations to be connected by an edge
-    """
-
-    num_locs = map_width * map_width
-    num_values = len(valid_tasks)
-    
-    num_nodes_dict = {'task': num_tasks + 2,
-                      'loc': num_locs,
-                      'robot': num_robots,
-                      'state': 1,
-                      'value': num_values}
-
-    # Serializing [x, y] locations to 1D array
-    # E.g. [1, 1] => 0 * width + 0 = 0
-    #      [2, 1] => 0 * width + 1 = 1
-    serialized_locs = [(locs[i, 1] - 1) * map_width + locs[i, 0] - 1 for i in range(locs.shape[0])]
-
-    # Sort the nodes and assign an index to each one
-    task_name_to_idx = {node: idx for idx, node in enumerate(sorted(halfDG.nodes))}
-    task_edge_to_idx = {(from_node, to_node): idx for idx, (from_node, to_node) in enumerate(halfDG.edges)}
-
-    loc_near_data = []
-    # Find neighbors of each location
-    for i in range(num_locs):
-        loc_near_data.append((i, i))
-        for j in range(i + 1, num_locs):
-            i_x, i_y = i % map_width, i // map_width
-            j_x, j_y = j % map_width, j // map_width
-            if (i_x - j_x) ** 2 + (i_y - j_y) ** 2 <= loc_dist_threshold ** 2:
-                loc_near_data.append((i, j))
-                loc_near_data.append((j, i))
-
-    # List of (task id, robot id) tuples
-    task_to_robot_data = []
-
-    for rj in range(num_robots):
-        # add f0
-        task_to_robot_data.append((0, rj))
-        # add si (including s0)
-        for i in range(len(partials[rj])):
-            ti = partials[rj][i].item()
-            task_id = ti + 1
-            task_to_robot_data.append((task_id, rj))
-
-    unsch_task_to_robot = []
-    for rj in range(num_robots):
-        for t in unsch_tasks:
-            task_id = t + 1
-            unsch_task_to_robot.append((task_id, rj))
-
-    robot_com_data = [(i, j) for i in range(num_robots) for j in range(num_robots)]
-
-    data_dict = {
-        ('task', 'temporal', 'task'): (
-            # Convert named edges to indexes
-            [task_name_to_idx[from_node] for from_node, _ in halfDG.edges],
-            [task_name_to_idx[to_node] for _, to_node in halfDG.edges],
-        ),
-        ('task', 'located_in', 'loc'): (
-            list(range(2, num_tasks + 2)),
-            serialized_locs,
-        ),
-        ('loc', 'near', 'loc'): (
-            [i for i, _ in loc_near_data],
-            [j for _, j in loc_near_data],
-        ),
-        ('task', 'assigned_to', 'robot'): (
-            [task for task, _ in task_to_robot_data],
-            [robot for _, robot in task_to_robot_data],
-        ),
-        ('task', 'take_time', 'robot'): (
-            [task for task, _ in unsch_task_to_robot],
-            [robot for _, robot in unsch_task_to_robot],
-        ),
-        ('robot', 'use_time', 'task'): (
-            [robot for _, robot in unsch_task_to_robot],
-            [task for task, _ in unsch_task_to_robot],
-        ),
-        ('robot', 'com', 'robot'): (
-            [i for i, _ in robot_com_data],
-            [j for _, j in robot_com_data],
-        ),
-        # 4. Add graph summary nodes
-        # [task] — [in] — [state]
-        ('task', 'tin', 'state'): (
-            list(range(num_tasks + 2)),
-            np.zeros(num_tasks + 2, dtype=np.int64),
-        ),
-        # [loc] — [in] — [state]
-        ('loc', 'lin', 'state'): (
-            list(range(num_locs)),
-            np.zeros(num_locs, dtype=np.int64),
-        ),
-        # [robot] — [in] — [state]
-        ('robot', 'rin', 'state'): (
-            list(range(num_robots)),
-            np.zeros(num_robots, dtype=np.int64),
-        ),
-        # [state] — [in] — [state] self-loop
-        ('state', 'sin', 'state'): (
-            [0],
-            [0],
-        ),
-        # 5.1 Q value node
-        # [task] — [to] — [value]
-        ('task', 'tto', 'value'): (
-            valid_tasks + 1,
-            list(range(num_values)),
-        ),
-        # [robot] — [to] — [value]
-        ('robot', 'rto', 'value'): (
-            np.full(num_values, selected_robot, dtype=np.int64),
-            list(range(num_values)),
-        ),
-        # [state] — [to] — [value]
-        ('state', 'sto', 'value'): (
-            np.zeros(num_values, dtype=np.int64),
-            list(range(num_values)),
-        ),
-        # [value] — [to] — [value] self-loop
-        ('value', 'vto', 'value'): (
-            list(range(num_values)),
-            list(range(num_values)),
-        ),
-    }
-
-    graph = dgl.heterograph(data_dict, num_nodes_dict=num_nodes_dict, idtype=torch.int64)
-
-    # Store data of edges by index, as DiGraph.edges.data does not guarantee to have exactly the same
-    # ordering as Digraph.edges
-    temporal_edge_weights = torch.zeros((len(halfDG.edges), 1), dtype=torch.float32)
-    # Unpack indexes of edge weights
-    weights_idx = [task_edge_to_idx[from_node, to_node] for from_node, to_node, _ in halfDG.edges.data('weight')]
-    # Put weights in tensor according to their indexes
-    temporal_edge_weights[weights_idx, :] = torch.tensor([[weight] for _, _, weight in halfDG.edges.data('weight')],
-                                                      dtype=torch.float32)
-    graph.edges['temporal'].data['weight'] = temporal_edge_weights
-
-    takes_time_weight = torch.zeros((len(unsch_task_to_robot), 1), dtype=torch.float32)
-    for idx, (task, robot) in enumerate(unsch_task_to_robot):
-        # Subtract 2 because task 1's node id is 2, but has index 0 in dur
-        takes_time_weight[idx] = dur[task - 2, robot]
-    graph.edges['take_time'].data['t'] = takes_time_weight
-    # Ordering of takes_time and uses_time edges are exactly the same
-    graph.edges['use_time'].data['t'] = takes_time_weight.detach().clone()
-
-    return graph
-
-def hetgraph_node_helper(number_of_nodes, curr_partialw, curr_partials,
-                         locations, durations, map_width, num_robots, num_values):
-    """
-    Generate initial node features for hetgraph
-    The input of hetgraph is a dictionary of node features for each type
-        number_of_nodes: numer of nodes in half distance graph (halfDG)
-        curr_partialw: partial solution/whole
-        curr_partials: partial solution/seperate
-        locations: np array locations
-        durations: np array task durations
-        map_width: map grid size
-        num_robots: number of robots
-        num_values: number of actions / Q values
-    Return
-        feat_dict: node features stored in a dict
-    """
-    feat_dict = {}
-    num_locations = map_width * map_width
-
-    # Task features.
-    # For scheduled tasks, the feature is [1 0 dur 0 dur 0]
-    # For unscheduled ones, the feature is [0 1 min max-min mean std]
-    feat_dict['task'] = np.zeros((number_of_nodes, 6))
-
-    max_dur, min_dur = durations.max(axis=1), durations.min(axis=1)
-    mean_dur, std_dur = durations.mean(axis=1), durations.std(axis=1)
-
-    # f0
-    feat_dict['task'][0, 0] = 1
-
-    # s0~si. s0 has index 1
-    for i in range(1, number_of_nodes):
-        ti = i-1
-        if ti in curr_partialw:
-            feat_dict['task'][i, 0] = 1
-            if ti > 0:
-                # Ignore s0
-                for j in range(num_robots):
-                    if ti in curr_partials[j]:
-                        rj = j
-                        break              
-                
-                feat_dict['task'][i, [2, 4]] = durations[ti-1][rj]
-        else:
-            feat_dict['task'][i] = [0, 1, min_dur[ti-1], max_dur[ti-1] - min_dur[ti-1], 
-                                    mean_dur[ti-1], std_dur[ti-1]]
-    
-    # [loc]
-    feat_dict['loc'] = np.zeros((num_locations, 1))
-    serialized_locs = [(locations[i, 1] - 1) * map_width + locations[i, 0] - 1 for i in range(locations.shape[0])]
-    loc_counter = Counter(serialized_locs)
-    for i in range(num_locations):
-        # number of tasks in location
-        feat_dict['loc'][i, 0] = loc_counter[i]
-    
-    # [robot]
-    feat_dict['robot'] = np.zeros((num_robots, 1))
-    for i in range(num_robots):
-        # number of tasks assigned so far
-        # including s0
-        feat_dict['robot'][i, 0] = len(curr_partials[i])
-    
-    # [state]
-    feat_dict['state'] = np.array((number_of_nodes-1, len(curr_partialw),
-                                   num_locations, num_robots)).reshape(1,4)
-    
-    # [value]
-    feat_dict['value'] = np.zeros((num_values, 1))
-
-    return feat_dict
+def __getattr__(name):
+    if name in _hetgraph_names:
+        import hetgraph
+        return getattr(hetgraph, name)
+    raise AttributeError("module 'utils' has no attribute '%s'" % name)
 
 
 '''
 Env class for maintaining current partial solution and updated graph
     during data collection process
+    temporal_edges: edges of halfDG (the 'temporal' relation of HetGraph)
+        'full': every finite APSP distance, O(n^2) edges
+        'reduced': drop edges implied by the others (stn.dominance_mask),
+            distances between halfDG nodes are unchanged
+        'topk': keep the temporal_k tightest outgoing edges of each node
+        edges to/from s000 (earliest/latest start times) are always kept
 '''
 class SchedulingEnv(object):
     # read problem info specified by fname
-    def __init__(self, fname):
+    def __init__(self, fname, temporal_edges='full', temporal_k=8):
         # load constraints
-        self.dur = np.loadtxt(fname+'_dur.txt', dtype=np.int32)
-        self.ddl = np.loadtxt(fname+'_ddl.txt', dtype=np.int32)
-        self.wait = np.loadtxt(fname+'_wait.txt', dtype=np.int32)
-        self.loc = np.loadtxt(fname+'_loc.txt', dtype=np.int32)
+        self.setup(np.loadtxt(fname+'_dur.txt', dtype=np.int32),
+                   np.loadtxt(fname+'_ddl.txt', dtype=np.int32),
+                   np.loadtxt(fname+'_wait.txt', dtype=np.int32),
+                   np.loadtxt(fname+'_loc.txt', dtype=np.int32),
+                   temporal_edges, temporal_k)
+
+    '''
+    Build the env from constraint arrays instead of text files
+        e.g. instances read from a packed file
+    '''
+    @classmethod
+    def from_arrays(cls, dur, ddl, wait, loc, temporal_edges='full', temporal_k=8):
+        env = cls.__new__(cls)
+        env.setup(np.array(dur, dtype=np.int32), np.array(ddl, dtype=np.int32),
+                  np.array(wait, dtype=np.int32), np.array(loc, dtype=np.int32),
+                  temporal_edges, temporal_k)
+        return env
+
+    def setup(self, dur, ddl, wait, loc, temporal_edges='full', temporal_k=8):
+        if temporal_edges not in ('full', 'reduced', 'topk'):
+            raise ValueError('unknown temporal_edges: %s' % temporal_edges)
+        self.temporal_edges = temporal_edges
+        self.temporal_k = temporal_k
+
+        self.dur = dur
+        self.ddl = ddl
+        self.wait = wait
+        self.loc = loc
         
         self.num_tasks = self.dur.shape[0]
         self.num_robots = self.dur.shape[1]
@@ -281,14 +92,32 @@ class SchedulingEnv(object):
 
         # initial partial solution with t0
         # t0 appears in all partial schedules
-        self.partials = []
-        for i in range(self.num_robots):
-            self.partials.append(np.zeros(1, dtype=np.int32))
-        
-        self.partialw = np.zeros(1, dtype=np.int32)
+        # schedules live in fixed-capacity buffers with length counters,
+        # partials/partialw are views of the filled part
+        self.partials_buf = np.zeros((self.num_robots, self.num_tasks + 1), dtype=np.int32)
+        self.partials_len = np.ones(self.num_robots, dtype=np.int64)
+        self.partialw_buf = np.zeros(self.num_tasks + 1, dtype=np.int32)
+        self.partialw_len = 1
+        # robot and position in its partial schedule of each task, -1 if unscheduled
+        self.task_robot = np.full(self.num_tasks + 1, -1, dtype=np.int64)
+        self.task_pos = np.full(self.num_tasks + 1, -1, dtype=np.int64)
+        # scheduled[ti] is True once ti is in partialw, index 0 is t0
+        self.scheduled = np.zeros(self.num_tasks + 1, dtype=bool)
+        self.scheduled[0] = True
+
+        # tasks grouped by location for proximity lookups
+        self.loc_buckets = {}
+        for i in range(self.num_tasks):
+            self.loc_buckets.setdefault(tuple(self.loc[i]), []).append(i + 1)
+        self.loc_buckets = {key: np.array(tasks) for key, tasks in self.loc_buckets.items()}
+        # (ti, diff) -> tasks within diff of ti
+        self.near_cache = {}
         
         # maintain a graph with min/max duration for unscheduled tasks
         self.g = self.initialize_STN()
+        # node order of distance matrices: s000, f000, s001, f001, ...
+        #   si has index 2*i, fi has index 2*i+1
+        self.node_names = list(self.g.nodes)
         
         # get initial min make span
         success, min_makespan = self.check_consistency_makespan()
@@ -342,8 +171,10 @@ class SchedulingEnv(object):
     '''
     def check_consistency_makespan(self, updateDG = True):
         consistent = True
+        instrument.count('env.apsp_calls')
         try:
-            p_ultra, d_ultra = johnsonU(self.g)
+            with instrument.timer('env.apsp'):
+                dist = johnson_dist(self.g, self.node_names)
         except Exception as e:
             consistent = False
             print('Infeasible:', e)
@@ -356,14 +187,9 @@ class SchedulingEnv(object):
             if len(self.partialw) == 1:
                 min_makespan = 0.0
             else:
-                tmp = []
-                for i in range(1,len(self.partialw)):
-                    ti = self.partialw[i]
-                    fi = 'f%03d' % ti
-                    tmp.append(-1.0 * d_ultra[fi]['s000'])
-    
-                tmp_np = np.array(tmp)
-                min_makespan = tmp_np.max()
+                # fi -> s000 of every scheduled task
+                fi = 2 * self.partialw[1:] + 1
+                min_makespan = (-1.0 * dist[fi, 0]).max()
         else:
             min_makespan = self.M
             return consistent, min_makespan
@@ -374,6 +200,15 @@ class SchedulingEnv(object):
         '''
         Min distance graph & Half min graph
         '''
+        with instrument.timer('env.half_graph'):
+            self.build_half_graph(dist)
+        
+        return consistent, min_makespan
+
+    '''
+    Build halfDG & min_dist from the Johnson's distance matrix
+    '''
+    def build_half_graph(self, dist):
         juDG = nx.DiGraph()
         for i in range(0, self.num_tasks+1):
             # Add si and fi
@@ -385,22 +220,41 @@ class SchedulingEnv(object):
             else:
                 juDG.add_node(si)
         
-        # add shortest path distance edges
-        for k_start in d_ultra:
-            for k_end in d_ultra[k_start]:
-                #print(key_start, key_end)
-                # check if path is inf
-                if d_ultra[k_start][k_end] < 9999:
-                    # minDG.add_edge(k_start, k_end, 
-                    #                weight = d_ultra[k_start][k_end])
-                    if juDG.has_node(k_start) and juDG.has_node(k_end):
-                        juDG.add_edge(k_start, k_end,
-                                      weight = d_ultra[k_start][k_end])
-        
-        # self.minDG = minDG
-        self.halfDG = juDG
+        '''
+        Min distance matrix
+            column 0 is s000, so -min_dist[2*i, 0] / -min_dist[2*i+1, 0]
+            are the earliest start / finish time of task i
+        '''
+        self.min_dist = dist
         
-        return consistent, min_makespan
+        # add shortest path distance edges selected by temporal_edges
+        self.halfDG = self.sparse_half_graph(juDG)
+
+    '''
+    Add the edges selected by temporal_edges to the halfDG nodes in juDG
+        'full' keeps every finite distance, the other modes fewer edges
+        in the same node and edge order
+    '''
+    def sparse_half_graph(self, juDG):
+        # s000, f000, s001, s002, ... in node_names order
+        half_idx = [0, 1] + list(range(2, 2*self.num_tasks+2, 2))
+        names = [self.node_names[i] for i in half_idx]
+        dist = self.min_dist[np.ix_(half_idx, half_idx)]
+
+        if self.temporal_edges == 'full':
+            keep = np.ones(dist.shape, dtype=bool)
+        elif self.temporal_edges == 'reduced':
+            keep = dominance_mask(dist)
+        else:
+            keep = topk_mask(dist, self.temporal_k)
+        keep[0, :] = True
+        keep[:, 0] = True
+        keep &= dist < 9999
+
+        rows, cols = np.nonzero(keep)
+        juDG.add_weighted_edges_from((names[a], names[b], dist[a, b])
+                                     for a, b in zip(rows, cols))
+        return juDG
     
     '''          
     ti is task number 1~num_tasks
@@ -408,67 +262,37 @@ class SchedulingEnv(object):
     append ti to rj's partial schedule
     also update the STN
     '''
+    @instrument.timed('env.insert_robot')
     def insert_robot(self, ti, rj, diff = 1.0, updateDG = True):
         # sanity check
         if rj < 0 or rj >= self.num_robots:
             print('invalid insertion')
             return False        
         
+        num_edges = self.g.number_of_edges()
         # find tj and update partial solution
         # tj is the last task of rj's partial schedule
         # insert ti right after tj
-        tj = self.partials[rj][-1]
-        self.partials[rj] = np.append(self.partials[rj], ti)
-        self.partialw = np.append(self.partialw, ti)
+        pos = self.partials_len[rj]
+        tj = self.partials_buf[rj, pos-1]
+        self.partials_buf[rj, pos] = ti
+        self.partials_len[rj] += 1
+        self.partialw_buf[self.partialw_len] = ti
+        self.partialw_len += 1
+        self.task_robot[ti] = rj
+        self.task_pos[ti] = pos
+        self.scheduled[ti] = True
 
         # update graph
-        # insert ti after tj, no need to add when tj==0    
-        # no need to insert if a wait constraint already exists
-        if tj != 0:
-            si = 's%03d' % ti
-            fj = 'f%03d' % tj
-            if not self.g.has_edge(si, fj):
-                self.g.add_edge(si, fj, weight = 0)
-        
-        '''
-        [New] Also, replace the task duration of ti with actual duration
-        '''
-        si = 's%03d' % ti
-        fi = 'f%03d' % ti
-        ti_dur = self.dur[ti-1][rj]
-        # this will rewrite previous edge weights
-        self.g.add_weighted_edges_from([(si, fi, ti_dur),
-                                        (fi, si, -1 * ti_dur)])
-        
-        '''
-        make sure the start time of all unscheduled tasks is no earlier thant si
-        '''
-        for k in range(1, self.num_tasks+1):
-            if k not in self.partialw:
-                # tk starts no earlier than si
-                # si <= sk, si-sk<=0, sk->si:0
-                si = 's%03d' % ti
-                sk = 's%03d' % k
-                if not self.g.has_edge(sk, si):
-                    self.g.add_edge(sk, si, weight = 0)
+        u, v, w = self.insertion_edges(ti, rj, tj, self.get_unscheduled_mask(), diff)
+        # duration edges come first and rewrite previous edge weights,
+        # no need to add the rest if an edge (e.g. a wait constraint) already exists
+        for k in range(len(u)):
+            un, vn = self.node_names[u[k]], self.node_names[v[k]]
+            if k < 2 or not self.g.has_edge(un, vn):
+                self.g.add_edge(un, vn, weight = int(w[k]))
 
-        '''
-        make sure the start time of all unscheduled tasks that
-        are within the allowed distance (diff) happen after fi
-        '''
-        for k in range(1, self.num_tasks+1):
-            if k not in self.partialw:
-                xi, yi = self.loc[ti-1]
-                xk, yk = self.loc[k-1]
-                dist_2 = (xi - xk) * (xi - xk) + (yi - yk) * (yi - yk)               
-                
-                if dist_2 <= diff * diff:
-                    # tk starts after fi
-                    # fi <= sk, fi-sk <=0, sk->fi:0
-                    fi = 'f%03d' % ti
-                    sk = 's%03d' % k
-                    if not self.g.has_edge(sk, fi):
-                        self.g.add_edge(sk, fi, weight=0)
+        instrument.count('env.edges_added', self.g.number_of_edges() - num_edges)
 
         # calculate reward for this insertion
         success, reward = self.calc_reward_discount(updateDG)
@@ -482,6 +306,64 @@ class SchedulingEnv(object):
         
         return success, reward, done
     
+    '''
+    STN edges added when ti is appended to rj's partial schedule after tj
+        unsch_mask: get_unscheduled_mask() after the insertion
+    Return
+        u, v, w as node indices (node_names order), edge u->v: v - u <= w
+        the first two edges replace the duration range of ti with the
+        actual duration, the others only order starts/finishes
+    '''
+    def insertion_edges(self, ti, rj, tj, unsch_mask, diff = 1.0):
+        si, fi = 2 * ti, 2 * ti + 1
+        ti_dur = self.dur[ti-1][rj]
+        u = [si, fi]
+        v = [fi, si]
+        w = [ti_dur, -1 * ti_dur]
+
+        # insert ti after tj, no need to add when tj==0
+        if tj != 0:
+            u.append(si)
+            v.append(2 * tj + 1)
+            w.append(0)
+
+        # make sure the start time of all unscheduled tasks is no earlier than si
+        # si <= sk, si-sk<=0, sk->si:0
+        unsch_tasks = np.flatnonzero(unsch_mask) + 1
+        u.extend(2 * unsch_tasks)
+        v.extend([si] * len(unsch_tasks))
+        w.extend([0] * len(unsch_tasks))
+
+        # make sure the start time of all unscheduled tasks that
+        # are within the allowed distance (diff) happen after fi
+        # fi <= sk, fi-sk <=0, sk->fi:0
+        near_tasks = self.near_tasks(ti, diff)
+        near_tasks = near_tasks[unsch_mask[near_tasks-1]]
+        u.extend(2 * near_tasks)
+        v.extend([fi] * len(near_tasks))
+        w.extend([0] * len(near_tasks))
+
+        return np.array(u, dtype=np.int64), np.array(v, dtype=np.int64), \
+            np.array(w, dtype=np.int64)
+
+    '''
+    Tasks other than ti located within diff of ti, in increasing order
+        looked up from the location buckets over the grid offsets in range
+    '''
+    def near_tasks(self, ti, diff = 1.0):
+        key = (ti, diff)
+        if key not in self.near_cache:
+            xi, yi = self.loc[ti-1]
+            r = int(np.floor(diff))
+            found = [np.zeros(0, dtype=np.int64)]
+            for dx in range(-r, r + 1):
+                for dy in range(-r, r + 1):
+                    if dx * dx + dy * dy <= diff * diff and (xi + dx, yi + dy) in self.loc_buckets:
+                        found.append(self.loc_buckets[(xi + dx, yi + dy)])
+            tasks = np.concatenate(found)
+            self.near_cache[key] = np.sort(tasks[tasks != ti])
+        return self.near_cache[key]
+
     '''
     Reward R of a state-action pair is defined as the change
         in objective values after taking the action,
@@ -512,16 +394,40 @@ class SchedulingEnv(object):
         self.min_makespan = min_makespan
         return success, reward
 
+    '''
+    Partial schedule of each robot, starting with t0
+        views of partials_buf, a view stays valid as schedules only grow
+    '''
+    @property
+    def partials(self):
+        return [self.partials_buf[i, :self.partials_len[i]] for i in range(self.num_robots)]
+
+    '''
+    Partial schedule of all tasks selected, starting with t0
+    '''
+    @property
+    def partialw(self):
+        return self.partialw_buf[:self.partialw_len]
+
+    '''
+    Return a bool mask over tasks 1~num_tasks (index ti-1)
+        True if the task is not in partialw yet
+    '''
+    def get_unscheduled_mask(self):
+        return ~self.scheduled[1:]
+
+    '''
+    Return the earliest start time of tasks 1~num_tasks (index ti-1)
+        read from the s000 column of min_dist
+    '''
+    def get_earliest_start_times(self):
+        return -1.0 * self.min_dist[2:2*self.num_tasks+2:2, 0]
+
     '''
     Return unscheduled tasks given partialw
     '''
     def get_unscheduled_tasks(self):
-        unsch_tasks = []
-        for i in range(1, self.num_tasks+1):
-            if i not in self.partialw:
-                unsch_tasks.append(i)
-        
-        return np.array(unsch_tasks)
+        return np.flatnonzero(~self.scheduled[1:]) + 1
 
     def get_duration_on_tasks(self, robot, tasks):
         """Returns durations of a robot on a list of tasks.
@@ -538,20 +444,13 @@ class SchedulingEnv(object):
         plus checking if the task can starts at current timepoint
     '''
     def get_valid_tasks(self, timepoint):
-        valid_tasks = []
-        for i in range(1, self.num_tasks+1):
-            if i not in self.partialw:
-                # check task start time
-                # si->s0: A
-                # s0 - si <= A
-                # si >= -A
-                si = 's%03d' % i
-                time_si = -1.0 * self.halfDG[si]['s000']['weight']
-                # time_si is the earliest time task i can happen
-                if time_si <= timepoint:
-                    valid_tasks.append(i)
-        
-        return np.array(valid_tasks)
+        # check task start time
+        # si->s0: A
+        # s0 - si <= A
+        # si >= -A
+        # the earliest time task i can happen, same as halfDG[si]['s000']
+        valid_mask = ~self.scheduled[1:] & (self.get_earliest_start_times() <= timepoint)
+        return np.flatnonzero(valid_mask) + 1
     
     '''
     Return an updated min robot STN
@@ -560,23 +459,8 @@ class SchedulingEnv(object):
         plus consistency check
     '''
     def get_rSTN(self, robot_chosen, valid_task):
-        rSTN = copy.deepcopy(self.g)
-        # modify STN
-        for i in range(len(valid_task)):
-            ti = valid_task[i]
-            si = 's%03d' % ti
-            fi = 'f%03d' % ti
-            ti_dur = self.dur[ti-1][robot_chosen]
-            rSTN.add_weighted_edges_from([(si, fi, ti_dur),
-                                          (fi, si, -1 * ti_dur)])       
-        
-        # check consistency
-        consistent = True    
-        try:
-            p_ultra, d_ultra = johnsonU(rSTN)
-        except Exception as e:
-            consistent = False
-            print('Infeasible:', e) 
+        dist = self.rSTN_distances(robot_chosen, valid_task)
+        consistent = dist is not None
 
         if consistent:    
             # get min STN
@@ -587,18 +471,65 @@ class SchedulingEnv(object):
                 fi = 'f%03d' % i
                 min_rSTN.add_nodes_from([si, fi])
             
-            # add shortest path distance edges
-            for k_start in d_ultra:
-                for k_end in d_ultra[k_start]:
-                    # check if path is valid
-                    if d_ultra[k_start][k_end] < 9999:
-                        min_rSTN.add_edge(k_start, k_end, 
-                                       weight = d_ultra[k_start][k_end])        
+            # add shortest path distance edges, skip invalid paths
+            rows, cols = np.nonzero(dist < 9999)
+            min_rSTN.add_weighted_edges_from((self.node_names[a], self.node_names[b], dist[a, b])
+                                             for a, b in zip(rows, cols))
             
             return min_rSTN, True
         else:
             return None, False
 
+    '''
+    Same as get_rSTN, but return the min rSTN as a distance matrix
+        following node_names instead of a networkx graph
+    '''
+    def get_rSTN_dist(self, robot_chosen, valid_task):
+        dist = self.rSTN_distances(robot_chosen, valid_task)
+        if dist is None:
+            return None, False
+        
+        return dist, True
+
+    '''
+    Min rSTN distance matrices of several robots at once
+        robots: robot numbers, default all of them
+        the STN is read into one (V, V) weight matrix, copied per robot
+        with that robot's durations on the valid tasks, and all copies go
+        through a batched Floyd-Warshall (stn.floyd_warshall_batch)
+    Return
+        dist (len(robots), V, V) in node_names order, consistent (len(robots),)
+    '''
+    def get_rSTN_dist_all(self, valid_task, robots=None):
+        if robots is None:
+            robots = np.arange(self.num_robots)
+        robots = np.asarray(robots, dtype=np.int64)
+        ti = np.asarray(valid_task, dtype=np.int64)
+
+        base = nx.to_numpy_array(self.g, nodelist=self.node_names, nonedge=np.inf)
+        weights = np.repeat(base[None], len(robots), axis=0)
+        ti_dur = self.dur[ti-1][:, robots].T
+        weights[:, 2*ti, 2*ti+1] = ti_dur
+        weights[:, 2*ti+1, 2*ti] = -1 * ti_dur
+
+        instrument.count('env.rstn_apsp_calls', len(robots))
+        with instrument.timer('env.rstn_apsp'):
+            dist, consistent = floyd_warshall_batch(weights)
+        return dist, consistent
+
+    '''
+    APSP of the STN with the task duration of valid tasks
+        replaced with the task duration of chosen robot
+        Return None if inconsistent
+    '''
+    def rSTN_distances(self, robot_chosen, valid_task):
+        dist, consistent = self.get_rSTN_dist_all(valid_task, [robot_chosen])
+        if not consistent[0]:
+            print('Infeasible: Negative cycle detected.')
+            return None
+        
+        return dist[0]
+
 
 '''
 Transition for n-step
@@ -645,9 +576,13 @@ class ReplayMemory(object):
 
     # Saves a transition
     def push(self, *args):
+        self.store(Transition(*args))
+
+    # Saves a record as is, e.g. a Transition or a LazyTransition
+    def store(self, record):
         if len(self.memory) < self.capacity:
             self.memory.append(None)
-        self.memory[self.position] = Transition(*args)
+        self.memory[self.position] = record
         self.position = (self.position + 1) % self.capacity
 
     def sample(self, batch_size):
@@ -656,6 +591,259 @@ class ReplayMemory(object):
     def __len__(self):
         return len(self.memory)
 
+'''
+Sum tree over transition priorities
+    leaves hold the priorities, each internal node holds the sum of its
+    two children, so the root is the total priority mass
+    tree[1] is the root, leaf i is stored at tree[num_leaves + i]
+    update and sample walk one root-to-leaf path: O(log n)
+'''
+class SumTree(object):
+    def __init__(self, capacity):
+        self.capacity = capacity
+        # pad the number of leaves to a power of two
+        self.num_leaves = 1
+        while self.num_leaves < capacity:
+            self.num_leaves *= 2
+        self.depth = int(np.log2(self.num_leaves))
+        self.tree = np.zeros(2 * self.num_leaves, dtype=np.float64)
+
+    def total(self):
+        return self.tree[1]
+
+    # Set priorities of leaves idxs (array-like) and refresh their ancestors
+    # one tree level at a time
+    def update(self, idxs, priorities):
+        pos = np.asarray(idxs, dtype=np.int64) + self.num_leaves
+        self.tree[pos] = priorities
+        for _ in range(self.depth):
+            pos = np.unique(pos // 2)
+            self.tree[pos] = self.tree[2 * pos] + self.tree[2 * pos + 1]
+
+    # Return the leaf index whose prefix-sum interval contains each value
+    #   all values descend the tree together, one level per iteration
+    def find(self, values):
+        values = np.array(values, dtype=np.float64)
+        pos = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = self.tree[2 * pos]
+            go_right = values > left
+            values -= left * go_right
+            pos = 2 * pos + go_right
+        return pos - self.num_leaves
+
+'''
+Prioritized replay buffer
+    transitions are sampled with probability P(i) = p_i^alpha / sum_k p_k^alpha
+    sample returns (transitions, idxs, weights), weights are the importance
+    sampling corrections (N * P(i))^-beta normalized by the batch max
+    call update_priorities(idxs, losses) after computing per-sample losses
+'''
+class PrioritizedReplayMemory(ReplayMemory):
+    def __init__(self, capacity, alpha=0.6, eps=1e-6):
+        super(PrioritizedReplayMemory, self).__init__(capacity)
+        self.alpha = alpha
+        self.eps = eps
+        self.tree = SumTree(capacity)
+        self.max_priority = 1.0
+
+    # Saves a record with the current max priority
+    #   so that every new transition is replayed at least once
+    def store(self, record):
+        idx = self.position
+        super(PrioritizedReplayMemory, self).store(record)
+        self.tree.update([idx], [self.max_priority ** self.alpha])
+
+    # Stratified sampling: one draw from each of batch_size equal slices
+    #   of the total priority mass
+    def sample(self, batch_size, beta=0.4):
+        total = self.tree.total()
+        segment = total / batch_size
+        values = (np.arange(batch_size) + np.random.uniform(size=batch_size)) * segment
+        idxs = self.tree.find(values)
+        # guard against float round-off landing on an empty leaf
+        idxs = np.clip(idxs, 0, len(self.memory) - 1)
+
+        probs = self.tree.tree[idxs + self.tree.num_leaves] / total
+        weights = (len(self.memory) * probs) ** (-beta)
+        weights = weights / weights.max()
+
+        transitions = [self.memory[i] for i in idxs]
+        return transitions, idxs, weights.astype(np.float32)
+
+    # priorities: per-sample losses of the sampled transitions
+    def update_priorities(self, idxs, priorities):
+        priorities = np.abs(np.asarray(priorities, dtype=np.float64)) + self.eps
+        self.max_priority = max(self.max_priority, priorities.max())
+        self.tree.update(idxs, priorities ** self.alpha)
+
+    # Switch to another alpha, stored p^alpha are converted to p^new_alpha
+    #   priorities cannot be recovered from alpha 0, they restart at max
+    def set_alpha(self, alpha):
+        idxs = np.arange(len(self.memory))
+        if self.alpha > 0:
+            leaves = self.tree.tree[idxs + self.tree.num_leaves]
+            priorities = leaves ** (1.0 / self.alpha)
+        else:
+            priorities = np.full(len(idxs), self.max_priority)
+        self.alpha = alpha
+        self.tree.update(idxs, priorities ** alpha)
+
+'''
+Compact record of a demonstration transition, see LazyReplayMemory
+    the transition goes from state step to state step+1 of the episode
+    of instance_id
+'''
+LazyTransition = namedtuple('LazyTransition', ('instance_id', 'step', 'reward_n'))
+
+'''
+Replay buffer that stores demonstrations as action sequences
+    every state of an episode follows from the instance and the actions
+    taken before it, so the backend (ReplayMemory or PrioritizedReplayMemory)
+    holds LazyTransition records and each episode keeps its constraint
+    arrays and actions once, instead of halfDG/partial copies per transition
+    sample() rebuilds the states of the sampled records by replaying their
+    episodes in a SchedulingEnv, one replay per episode and batch; the
+    cache_size most recently used states are kept in an LRU
+    sample/update_priorities/len follow the backend, transitions are the
+    same as the ones fill_demo_data stores eagerly
+'''
+class LazyReplayMemory(object):
+    def __init__(self, backend, temporal_edges='full', temporal_k=8, cache_size=512):
+        self.backend = backend
+        self.temporal_edges = temporal_edges
+        self.temporal_k = temporal_k
+        self.cache_size = cache_size
+        # instance_id -> (dur, ddl, wait, loc)
+        self.instances = {}
+        # instance_id -> (act_tasks, act_robots, terminates)
+        self.episodes = {}
+        # (instance_id, step) -> (halfDG, partials, partialw)
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # the cache is rebuilt on demand, pickled buffers stay small
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['cache'] = OrderedDict()
+        return state
+
+    @property
+    def capacity(self):
+        return self.backend.capacity
+
+    @property
+    def memory(self):
+        return self.backend.memory
+
+    '''
+    Register the episode of an instance
+        instance_id: unique key, e.g. the instance file name; a key that is
+            already registered raises ValueError, as its stored records
+            would rebuild states of the other instance
+        act_tasks, act_robots: action of each step
+        terminates: done flag of each state, num_steps+1 entries
+    '''
+    def add_episode(self, instance_id, dur, ddl, wait, loc, act_tasks, act_robots,
+                    terminates):
+        if instance_id in self.instances:
+            raise ValueError('episode already registered: %s' % (instance_id,))
+        self.instances[instance_id] = (np.array(dur, dtype=np.int32),
+                                       np.array(ddl, dtype=np.int32),
+                                       np.array(wait, dtype=np.int32),
+                                       np.array(loc, dtype=np.int32))
+        self.episodes[instance_id] = (np.array(act_tasks, dtype=np.int32),
+                                      np.array(act_robots, dtype=np.int64),
+                                      np.array(terminates, dtype=bool))
+
+    # Saves the transition from state step of a registered episode
+    def push(self, instance_id, step, reward_n):
+        self.backend.store(LazyTransition(instance_id, step, reward_n))
+
+    def store(self, record):
+        self.backend.store(record)
+
+    def sample(self, batch_size, *args):
+        if isinstance(self.backend, PrioritizedReplayMemory):
+            records, idxs, weights = self.backend.sample(batch_size, *args)
+            return self.materialize(records), idxs, weights
+        return self.materialize(self.backend.sample(batch_size))
+
+    def update_priorities(self, idxs, priorities):
+        self.backend.update_priorities(idxs, priorities)
+
+    def __len__(self):
+        return len(self.backend)
+
+    '''
+    Transitions of LazyTransition records
+    '''
+    def materialize(self, records):
+        steps = {}
+        for record in records:
+            steps.setdefault(record.instance_id, set()).update((record.step, record.step+1))
+        states = {}
+        for instance_id, episode_steps in steps.items():
+            episode_steps = sorted(episode_steps)
+            for step, state in zip(episode_steps, self.states(instance_id, episode_steps)):
+                states[instance_id, step] = state
+
+        transitions = []
+        for instance_id, step, reward_n in records:
+            dur, _, _, loc = self.instances[instance_id]
+            act_tasks, act_robots, terminates = self.episodes[instance_id]
+            curr_g, curr_partials, curr_partialw = states[instance_id, step]
+            next_g, next_partials, next_partialw = states[instance_id, step+1]
+            transitions.append(Transition(curr_g, curr_partials, curr_partialw,
+                                          loc, dur,
+                                          act_tasks[step], int(act_robots[step]),
+                                          reward_n, next_g, next_partials,
+                                          next_partialw, bool(terminates[step+1])))
+        return transitions
+
+    '''
+    States of an episode at steps (sorted), from the cache or by replaying
+        the episode up to the last of them
+    '''
+    def states(self, instance_id, steps):
+        keys = [(instance_id, step) for step in steps]
+        if all(key in self.cache for key in keys):
+            self.hits += 1
+            for key in keys:
+                self.cache.move_to_end(key)
+            return [self.cache[key] for key in keys]
+
+        self.misses += 1
+        replayed = self.replay(instance_id, steps[-1])
+        for step, state in enumerate(replayed):
+            self.cache[instance_id, step] = state
+            self.cache.move_to_end((instance_id, step))
+        # requested states are evicted last
+        for key in keys:
+            self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return [replayed[step] for step in steps]
+
+    '''
+    Replay the first last_step actions of an episode
+    Return
+        (halfDG, partials, partialw) of states 0~last_step
+    '''
+    def replay(self, instance_id, last_step):
+        dur, ddl, wait, loc = self.instances[instance_id]
+        act_tasks, act_robots, _ = self.episodes[instance_id]
+        env = SchedulingEnv.from_arrays(dur, ddl, wait, loc,
+                                        self.temporal_edges, self.temporal_k)
+        # halfDG is rebuilt by every insertion, schedules are views of buffers
+        states = [(env.halfDG, [p.copy() for p in env.partials], env.partialw.copy())]
+        for step in range(last_step):
+            env.insert_robot(act_tasks[step], int(act_robots[step]))
+            states.append((env.halfDG, [p.copy() for p in env.partials],
+                           env.partialw.copy()))
+        return states
+
 '''
 Enumerate all possible insertions (rollout version) based on
     num_tasks: number of total tasks 1~N
@@ -664,13 +852,10 @@ Return
     act_task: list of all possible insertions
 '''
 def action_helper_rollout(num_tasks, curr_partialw):
-    act_task = []
     # pick a task t_i from {unallocated}
-    for i in range(1, num_tasks + 1):
-        if i not in curr_partialw:
-            act_task.append(i)
-
-    return np.array(act_task)
+    unsch_mask = np.ones(num_tasks + 1, dtype=bool)
+    unsch_mask[np.asarray(curr_partialw, dtype=np.int64)] = False
+    return np.flatnonzero(unsch_mask[1:]) + 1
         
 if __name__ == '__main__':
     # problem path
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 15:02:36 2026
+
+Schedule verifier
+    checks a solution (global order w and per robot orders, gurobiv9
+    layout) against its instance without replaying it through
+    SchedulingEnv.insert_robot
+
+Under the env semantics every constraint except deadlines is a lower bound
+on a start time, and all of them point forward in w:
+    order:     s[w[k+1]] >= s[w[k]]
+    robot:     s[next] >= f[prev] on the same robot
+    wait:      s[ti] >= f[tj] + wait
+    proximity: s[k] >= f[i] if task k comes after i in w and the
+               locations are within diff
+so one pass over w gives the earliest start/finish times, deadlines and the
+rest are then checked with array ops. A wait (ti, tj) with ti before tj in w
+can never be met.
+
+Usage
+    python verify.py --path-to-test ./gen/r2t20_001 --start-no 1 --end-no 1000
+        --processes 8 --output report.csv
+"""
+
+import argparse
+import csv
+import multiprocessing as mp
+import os
+import time
+
+import numpy as np
+
+import stn_jit
+
+'''
+Load an instance in the _dur/_ddl/_wait/_loc layout
+'''
+def load_instance(fname):
+    return {'dur': np.loadtxt(fname + '_dur.txt', dtype=np.int32, ndmin=2),
+            'ddl': np.loadtxt(fname + '_ddl.txt', dtype=np.int32, ndmin=2).reshape(-1, 2),
+            'wait': np.loadtxt(fname + '_wait.txt', dtype=np.int32, ndmin=2).reshape(-1, 3),
+            'loc': np.loadtxt(fname + '_loc.txt', dtype=np.int32, ndmin=2)}
+
+'''
+Load a solution in the gurobiv9 layout, None if _w.txt is missing
+    robot files that do not exist are treated as empty schedules
+'''
+def load_solution(solname, num_robots):
+    if not os.path.isfile(solname + '_w.txt'):
+        return None
+    optimalw = np.loadtxt(solname + '_w.txt', dtype=np.int32, ndmin=1)
+    optimals = []
+    for i in range(num_robots):
+        if os.path.isfile(solname + '_%d.txt' % i) and os.path.getsize(solname + '_%d.txt' % i) > 0:
+            optimals.append(np.loadtxt(solname + '_%d.txt' % i, dtype=np.int32, ndmin=1))
+        else:
+            optimals.append(np.zeros(0, dtype=np.int32))
+    return optimalw, optimals
+
+'''
+Robot of each task from per robot schedules
+Return
+    (num_tasks,) array indexed ti-1, -1 if unassigned, list of errors
+'''
+def robot_assignment(num_tasks, optimals):
+    errors = []
+    robot = np.full(num_tasks, -1, dtype=np.int64)
+    for rj, seq in enumerate(optimals):
+        seq = np.asarray(seq, dtype=np.int64)
+        bad = (seq < 1) | (seq > num_tasks)
+        if bad.any():
+            errors.append('robot %d: invalid tasks %s' % (rj, seq[bad].tolist()))
+            seq = seq[~bad]
+        twice = seq[robot[seq-1] >= 0]
+        if len(twice) > 0:
+            errors.append('tasks assigned more than once: %s' % np.unique(twice).tolist())
+        robot[seq-1] = rj
+    missing = np.flatnonzero(robot < 0) + 1
+    if len(missing) > 0:
+        errors.append('unassigned tasks: %s' % missing.tolist())
+    return robot, errors
+
+'''
+Lower bound edges between positions in w: s[v] >= s[u] + c
+    pos: position of each task in w, indexed ti-1
+    d: duration of each task on its robot, indexed ti-1
+'''
+def precedence_edges(instance, optimalw, optimals, pos, d, diff):
+    num_tasks = len(optimalw)
+    us, vs, cs = [], [], []
+    # global start order
+    k = np.arange(num_tasks - 1)
+    us.append(k)
+    vs.append(k + 1)
+    cs.append(np.zeros(num_tasks - 1))
+    # robot order
+    for seq in optimals:
+        seq = np.asarray(seq, dtype=np.int64)
+        us.append(pos[seq[:-1]-1])
+        vs.append(pos[seq[1:]-1])
+        cs.append(d[seq[:-1]-1].astype(np.float64))
+    # waits, ti waits for tj
+    wait = instance['wait']
+    us.append(pos[wait[:, 1]-1])
+    vs.append(pos[wait[:, 0]-1])
+    cs.append((d[wait[:, 1]-1] + wait[:, 2]).astype(np.float64))
+    # proximity, later tasks close to an earlier one start after it finishes
+    loc = instance['loc'][np.asarray(optimalw)-1]
+    delta = loc[:, None, :] - loc[None, :, :]
+    dist_2 = (delta * delta).sum(axis=2)
+    iu, iv = np.nonzero(np.triu(dist_2 <= diff * diff, k=1))
+    us.append(iu)
+    vs.append(iv)
+    cs.append(d[np.asarray(optimalw)[iu]-1].astype(np.float64))
+    return np.concatenate(us), np.concatenate(vs), np.concatenate(cs)
+
+'''
+Earliest start times by a longest path pass in w order
+    u, v, c: precedence_edges, every edge must satisfy u < v
+Return
+    start time of each position in w
+'''
+def earliest_starts(num_tasks, u, v, c):
+    if stn_jit.is_enabled():
+        return stn_jit.earliest_starts(num_tasks, u, v, c)
+    order = np.argsort(v, kind='stable')
+    u, v, c = u[order], v[order], c[order]
+    bounds = np.searchsorted(v, np.arange(num_tasks + 1))
+    start = np.zeros(num_tasks)
+    for k in range(num_tasks):
+        lo, hi = bounds[k], bounds[k+1]
+        if hi > lo:
+            start[k] = max(0.0, (start[u[lo:hi]] + c[lo:hi]).max())
+    return start
+
+'''
+Check given start/finish times (indexed ti-1) against all constraints
+Return
+    list of violated constraint descriptions
+'''
+def check_times(instance, optimalw, optimals, robot, start, finish, diff=1.0):
+    errors = []
+    dur = instance['dur']
+    tasks = np.arange(1, len(robot) + 1)
+
+    bad = finish - start != dur[tasks-1, robot]
+    if bad.any():
+        errors.append('duration mismatch: %s' % tasks[bad].tolist())
+
+    ddl = instance['ddl']
+    bad = finish[ddl[:, 0]-1] > ddl[:, 1]
+    if bad.any():
+        errors.append('deadline missed: %s' % ddl[bad, 0].tolist())
+
+    # every task finishes before f000, at most max_deadline of SchedulingEnv
+    bad = finish > len(robot) * 10
+    if bad.any():
+        errors.append('horizon exceeded: %s' % tasks[bad].tolist())
+
+    wait = instance['wait']
+    bad = start[wait[:, 0]-1] < finish[wait[:, 1]-1] + wait[:, 2]
+    if bad.any():
+        errors.append('wait violated: %s' % wait[bad, :2].tolist())
+
+    for rj, seq in enumerate(optimals):
+        seq = np.asarray(seq, dtype=np.int64)
+        bad = start[seq[1:]-1] < finish[seq[:-1]-1]
+        if bad.any():
+            errors.append('robot %d overlap before tasks %s' % (rj, seq[1:][bad].tolist()))
+
+    w = np.asarray(optimalw, dtype=np.int64)
+    bad = start[w[1:]-1] < start[w[:-1]-1]
+    if bad.any():
+        errors.append('start order violated at tasks %s' % w[1:][bad].tolist())
+
+    loc = instance['loc'][w-1]
+    delta = loc[:, None, :] - loc[None, :, :]
+    near = np.triu((delta * delta).sum(axis=2) <= diff * diff, k=1)
+    iu, iv = np.nonzero(near & (start[w-1][None, :] < finish[w-1][:, None]))
+    if len(iu) > 0:
+        errors.append('proximity violated: %s' % np.stack([w[iu], w[iv]], axis=1).tolist())
+
+    return errors
+
+'''
+Verify one solution
+Return
+    dict with ok, makespan, start, finish (indexed ti-1) and errors
+'''
+def verify_schedule(instance, optimalw, optimals, diff=1.0):
+    num_tasks = instance['dur'].shape[0]
+    result = {'ok': False, 'makespan': np.nan, 'start': None, 'finish': None,
+              'errors': []}
+    optimalw = np.asarray(optimalw, dtype=np.int64)
+
+    if len(optimalw) != num_tasks or \
+       not np.array_equal(np.sort(optimalw), np.arange(1, num_tasks + 1)):
+        result['errors'].append('w is not a permutation of the tasks')
+        return result
+    robot, errors = robot_assignment(num_tasks, optimals)
+    if len(errors) > 0:
+        result['errors'] = errors
+        return result
+
+    pos = np.empty(num_tasks, dtype=np.int64)
+    pos[optimalw-1] = np.arange(num_tasks)
+    d = instance['dur'][np.arange(num_tasks), robot]
+
+    u, v, c = precedence_edges(instance, optimalw, optimals, pos, d, diff)
+    backward = u >= v
+    if backward.any():
+        result['errors'].append('%d constraints point backward in w (robot order or wait)'
+                                % np.count_nonzero(backward))
+        return result
+
+    start_w = earliest_starts(num_tasks, u, v, c)
+    start = np.empty(num_tasks)
+    start[optimalw-1] = start_w
+    finish = start + d
+
+    result['errors'] = check_times(instance, optimalw, optimals, robot, start, finish, diff)
+    result.update(ok=len(result['errors']) == 0, makespan=finish.max(),
+                  start=start, finish=finish)
+    return result
+
+def verify_job(job):
+    graph_no, fname, solname, diff = job
+    instance = load_instance(fname)
+    solution = load_solution(solname, instance['dur'].shape[1])
+    if solution is None:
+        return graph_no, False, np.nan, 'solution missing'
+    result = verify_schedule(instance, solution[0], solution[1], diff)
+    return graph_no, result['ok'], result['makespan'], '; '.join(result['errors'])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path-to-test', default='./gen/r2t20_001', type=str)
+    parser.add_argument('--path-to-solutions', default=None, type=str,
+                        help='default: <path-to-test>v9')
+    parser.add_argument('--start-no', default=1, type=int)
+    parser.add_argument('--end-no', default=1000, type=int)
+    parser.add_argument('--diff', default=1.0, type=float,
+                        help='proximity distance, same as insert_robot')
+    parser.add_argument('--processes', default=os.cpu_count(), type=int)
+    parser.add_argument('--output', default=None, type=str,
+                        help='write the per instance report to this CSV file')
+    args = parser.parse_args()
+
+    sol_folder = args.path_to_solutions
+    if sol_folder is None:
+        sol_folder = args.path_to_test + 'v9'
+
+    jobs = []
+    for graph_no in range(args.start_no, args.end_no+1):
+        fname = args.path_to_test + '/%05d' % graph_no
+        if os.path.isfile(fname + '_dur.txt'):
+            jobs.append((graph_no, fname, sol_folder + '/%05d' % graph_no, args.diff))
+
+    start_t = time.time()
+    with mp.Pool(args.processes) as pool:
+        rows = pool.map(verify_job, jobs, chunksize=max(1, len(jobs) // (4 * args.processes)))
+    end_t = time.time()
+
+    for graph_no, ok, makespan, errors in rows:
+        if not ok:
+            print('%05d: %s' % (graph_no, errors))
+    valid = sum(row[1] for row in rows)
+    print('Valid: %d/%d, %.4f s, %.1f instances/s'
+          % (valid, len(rows), end_t - start_t, len(rows) / max(end_t - start_t, 1e-9)))
+
+    if args.output is not None:
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['graph_no', 'ok', 'makespan', 'errors'])
+            writer.writerows(rows)
+        print('Report saved to %s' % args.output)